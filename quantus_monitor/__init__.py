@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+"""
+Monitor sald Quantus: python -m quantus_monitor {sweep,report,history}.
+
+Importy są leniwe – sam pakiet nie ładuje telethon / requests / rich / dotenv.
+"""
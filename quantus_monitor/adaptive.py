@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""
+Adaptacyjne odpytywanie: adresy, których saldo często się zmienia, pytamy
+w każdym sweepie, a "uśpione" rzadziej – ale nigdy rzadziej niż co
+`max_staleness` sekund.
+
+Tempo zmian liczymy z historii: liczba zmian salda / czas obserwacji
+w oknie `window`. Interwał odpytywania = połowa średniego odstępu między
+zmianami, przycięta do [min_interval, max_staleness].
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+class PollPlan:
+    __slots__ = ("due", "skipped", "intervals")
+
+    def __init__(self):
+        self.due: List[str] = []
+        self.skipped: Dict[str, Tuple[float, float]] = {}   # adres -> (ts, saldo) ostatniego pomiaru
+        self.intervals: Dict[str, float] = {}
+
+
+def change_rate(series: List[Tuple[float, float]]) -> Optional[float]:
+    """Zmiany salda na sekundę; None gdy za mało danych."""
+    if len(series) < 2:
+        return None
+    span = series[-1][0] - series[0][0]
+    if span <= 0:
+        return None
+    changes = sum(1 for (_, a), (_, b) in zip(series, series[1:]) if abs(b - a) > 1e-9)
+    return changes / span
+
+
+def poll_interval(rate: Optional[float], min_interval: float, max_staleness: float) -> float:
+    if rate is None:
+        return 0.0
+    if rate <= 0:
+        return max_staleness
+    return max(min_interval, min(max_staleness, 0.5 / rate))
+
+
+def plan_polls(
+    history,
+    addresses: Iterable[str],
+    now: float,
+    min_interval: float = 0.0,
+    max_staleness: float = 6 * 3600,
+    window: float = 3 * 86400,
+) -> PollPlan:
+    """
+    Dzieli adresy na te do odpytania teraz (`due`) i pominięte (`skipped`,
+    z ostatnią znaną wartością). `history` musi mieć series(addr, since).
+    """
+    plan = PollPlan()
+    for addr in addresses:
+        series = history.series(addr, since=now - window)
+        interval = poll_interval(change_rate(series), min_interval, max_staleness)
+        plan.intervals[addr] = interval
+        if not series or now - series[-1][0] >= interval:
+            plan.due.append(addr)
+        else:
+            plan.skipped[addr] = series[-1]
+    return plan
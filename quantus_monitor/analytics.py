@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+Analiza zarobków całej floty po każdym sweepie: dla każdego adresu naraz
+
+  tempo     – nachylenie prostej MNK przez salda z okna STALL_WINDOW (jednostki / h),
+  zarobek   – saldo teraz - saldo na początku okna,
+  oczekiwany – mediana tempa grupy (właściciela) × długość okna.
+
+Alerty (krótka lista pod raportem):
+
+  stall – saldo nie zmieniło się przez całe okno, a w poprzednim oknie rosło
+          (albo rośnie reszcie grupy),
+  low   – tempo poniżej STALL_RATIO × mediana grupy (grupa ma >= MIN_GROUP nodów z tempem).
+
+Wejście to macierz [wiersze × adresy] z NaN tam, gdzie adresu nie mierzono
+(historia kolumnowa, rzadkie wiersze z --subscribe / ADAPTIVE_POLLING) –
+brakujące wartości przenosimy z poprzedniego wiersza. Z numpy wszystko idzie
+wektorowo na całej macierzy (warstwy historii cięte wprost z mmap); bez numpy
+ten sam wynik w czystym Pythonie, kolumna po kolumnie – wolniej, ale numpy
+nie jest wymagane (opcjonalna zależność: requirements-optional.txt).
+"""
+
+import hashlib
+import math
+from statistics import median
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from . import metrics
+from .discord import Slot, pack_messages
+
+KINDS = ("stall", "low")
+MIN_GROUP = 3
+SLOT = "alerts"                 # DISCORD_EDIT: osobna wiadomość z alertami
+NAN = float("nan")
+
+_NUMPY = []
+
+
+def load_numpy():
+    """numpy albo None – importowane dopiero przy pierwszej analizie (start CLI ma być tani)."""
+    if not _NUMPY:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _NUMPY.append(numpy)
+    return _NUMPY[0]
+
+
+class NodeStats(NamedTuple):
+    rate: float         # jednostki / h (nachylenie w oknie)
+    earned: float       # zarobek w oknie
+    earned_prev: float  # zarobek w poprzednim oknie (NaN, gdy adres młodszy)
+
+
+class Alert(NamedTuple):
+    kind: str           # stall | low
+    group: str
+    label: str
+    earned: float
+    expected: float
+    earned_prev: float
+
+
+Alerts = Tuple[str, List[Alert]]    # (etykieta okna, alerty) – w wyniku sweepa; None = STALL_WINDOW=0
+
+
+# ----------------- STATYSTYKI -----------------
+def _stats_numpy(np, ts, m, end: float, span: float) -> List[Optional[NodeStats]]:
+    ts = np.asarray(ts, dtype=np.float64)
+    m = np.asarray(m, dtype=np.float64)
+    rows, cols = m.shape
+    gaps = np.isnan(m)
+    if gaps.any():
+        # przeniesienie ostatniej znanej wartości w dół kolumny
+        pos = np.where(gaps, 0, np.arange(rows)[:, None])
+        np.maximum.accumulate(pos, axis=0, out=pos)
+        f = m[pos, np.arange(cols)]
+    else:
+        f = m
+
+    start, prev_start = end - span, end - 2 * span
+    p0 = int(np.searchsorted(ts, start, side="right")) - 1
+    pp = int(np.searchsorted(ts, prev_start, side="right")) - 1
+    v_end = f[-1]
+    v_start = f[p0] if p0 >= 0 else np.full(cols, np.nan)
+    v_prev = f[pp] if pp >= 0 else np.full(cols, np.nan)
+
+    # MNK w oknie: wiersz bazowy (saldo na początku okna) + wszystko później;
+    # sumy jako iloczyny macierz × wektor, bez macierzy pośrednich t × kolumny
+    first = max(p0, 0)
+    t = (np.maximum(ts[first:], start) - end) / 3600.0
+    y = f[first:]
+    missing = np.isnan(y)
+    if missing.any():
+        w = (~missing).astype(np.float64)
+        y = np.where(missing, 0.0, y)
+        n, st, stt = w.sum(axis=0), t @ w, (t * t) @ w
+    else:
+        n, st, stt = float(len(t)), t.sum(), t @ t
+    sy, sty = y.sum(axis=0), t @ y
+    den = n * stt - st * st
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = np.where(den > 0, (n * sty - st * sy) / den, 0.0)
+
+    earned = v_end - v_start
+    earned_prev = v_start - v_prev
+    out: List[Optional[NodeStats]] = []
+    for c in range(cols):
+        if math.isnan(earned[c]):
+            out.append(None)
+        else:
+            out.append(NodeStats(float(slope[c]), float(earned[c]), float(earned_prev[c])))
+    return out
+
+
+def _stats_python(ts: Sequence[float], m: Sequence[Sequence[float]], end: float, span: float
+                  ) -> List[Optional[NodeStats]]:
+    start, prev_start = end - span, end - 2 * span
+    cols = len(m[0]) if m else 0
+    out: List[Optional[NodeStats]] = []
+    for c in range(cols):
+        last = v_start = v_prev = NAN
+        pts: List[Tuple[float, float]] = []
+        for r, t in enumerate(ts):
+            v = m[r][c]
+            if v == v:
+                last = v
+            if t <= prev_start:
+                v_prev = last
+            if t <= start:
+                v_start = last
+                pts = [(start, last)] if last == last else []
+            elif last == last:
+                pts.append((t, last))
+        if v_start != v_start:
+            out.append(None)
+            continue
+        n = len(pts)
+        st = sum((t - end) / 3600.0 for t, _ in pts)
+        sy = sum(v for _, v in pts)
+        stt = sum(((t - end) / 3600.0) ** 2 for t, _ in pts)
+        sty = sum((t - end) / 3600.0 * v for t, v in pts)
+        den = n * stt - st * st
+        slope = (n * sty - st * sy) / den if den > 0 else 0.0
+        out.append(NodeStats(slope, last - v_start, v_start - v_prev))
+    return out
+
+
+def with_row(ts, matrix, t: float, row: List[float]):
+    """Dokleja wiersz na koniec (bieżący pomiar, którego jeszcze nie ma w historii)."""
+    np = load_numpy()
+    if np is not None and not isinstance(matrix, list):
+        return np.append(ts, t), np.vstack([matrix, np.asarray(row, dtype=np.float64)])
+    return list(ts) + [t], list(matrix) + [row]
+
+
+def fleet_stats(ts, matrix, end: float, span: float) -> List[Optional[NodeStats]]:
+    """
+    `ts` rosnąco, `matrix[wiersz][kolumna]` (NaN = brak pomiaru), pierwszy wiersz
+    najpóźniej na początku poprzedniego okna (end - 2 × span). Kolumna -> NodeStats
+    albo None, gdy adres jest młodszy niż okno.
+    """
+    if not len(ts):
+        return []
+    np = load_numpy()
+    if np is not None:
+        return _stats_numpy(np, ts, matrix, end, span)
+    return _stats_python(ts, matrix, end, span)
+
+
+def fleet_alerts(ts, matrix, columns: Dict[str, int], groups: Sequence[Tuple[str, Sequence[Tuple[str, str]]]],
+                 end: float, window: Tuple[str, int], ratio: float) -> Alerts:
+    """Cała analiza: `columns` – klucz -> kolumna macierzy, `window` – (etykieta, minuty)."""
+    label, mins = window
+    span = mins * 60.0
+    with metrics.ANALYTICS_SECONDS.time():
+        per_col = fleet_stats(ts, matrix, end, span)
+        stats = {key: per_col[c] for key, c in columns.items() if c < len(per_col)}
+        return label, find_alerts(stats, groups, span, ratio)
+
+
+# ----------------- ALERTY -----------------
+def find_alerts(stats: Dict[str, Optional[NodeStats]], groups: Sequence[Tuple[str, Sequence[Tuple[str, str]]]],
+                span: float, ratio: float) -> List[Alert]:
+    """
+    `stats`: klucz kolumny (adres albo nazwa noda) -> NodeStats; `groups`:
+    [(grupa, [(etykieta, klucz), ...]), ...] – mediana liczona w obrębie grupy.
+    """
+    hours = span / 3600.0
+    alerts: List[Alert] = []
+    for group, members in groups:
+        rated = [(label, stats[key]) for label, key in members if stats.get(key) is not None]
+        if not rated:
+            continue
+        med = median(st.rate for _label, st in rated)
+        expected = max(med, 0.0) * hours
+        for label, st in rated:
+            if st.earned == 0 and (st.earned_prev > 0 or med > 0):
+                alerts.append(Alert("stall", group, label, st.earned, expected, st.earned_prev))
+            elif len(rated) >= MIN_GROUP and med > 0 and st.rate < ratio * med:
+                alerts.append(Alert("low", group, label, st.earned, expected, st.earned_prev))
+    for kind in KINDS:
+        metrics.EARNING_ALERTS.set(sum(1 for a in alerts if a.kind == kind), kind=kind)
+    return alerts
+
+
+def format_alerts(alerts: List[Alert], window_label: str, fmt) -> str:
+    """Blok do Discorda; `fmt(float) -> str` formatuje kwoty jak tabela raportu."""
+    if not alerts:
+        return f"**Alerty ({window_label})**: brak"
+    lines = [f"**Alerty ({window_label})**", "```"]
+    for a in alerts:
+        prev = "" if a.earned_prev != a.earned_prev else f", poprzednio {fmt(a.earned_prev)}"
+        lines.append(f"{a.kind:<6}{a.group}/{a.label}: {fmt(a.earned)} (oczekiwane ~{fmt(a.expected)}{prev})")
+    lines.append("```")
+    return "\n".join(lines)
+
+
+def report_blocks(alerts: Optional[Alerts], fmt) -> List[str]:
+    """Blok pod tabelami raportu – tylko gdy są alerty."""
+    if not alerts or not alerts[1]:
+        return []
+    return [format_alerts(alerts[1], alerts[0], fmt)]
+
+
+def report_slots(alerts: Optional[Alerts], fmt, slot: str = SLOT) -> List[Slot]:
+    """DISCORD_EDIT: alerty w osobnej wiadomości; "brak" też idzie, żeby nie wisiał stary alert."""
+    if alerts is None:
+        return []
+    text = format_alerts(alerts[1], alerts[0], fmt)
+    key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+    return [(slot if i == 0 else f"{slot}#{i + 1}", key, msg) for i, msg in enumerate(pack_messages([text]))]
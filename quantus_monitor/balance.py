@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+Saldo jako rekord parsowany raz – w chwili odpowiedzi bota albo noda.
+
+Kwota to liczba całkowita w planckach (10^-12 jednostki), więc sumy i delty
+liczymy bez dryfu floatów. Tekst "1234.56 QU" powstaje dopiero przy
+wyświetlaniu; z tekstu parsujemy tylko odpowiedzi bota i stare pliki.
+
+Historia kolumnowa nadal trzyma float64 w jednostkach – na granicy
+zamieniamy raz: planck -> float przy zapisie, float -> planck przy odczycie.
+"""
+
+import re
+import time
+from typing import Optional, Tuple
+
+DECIMALS = 12
+ONE = 10 ** DECIMALS
+
+OK = "ok"
+TIMEOUT = "timeout"
+FLOOD = "flood"
+ERROR = "error"
+
+# jak status wyglądał dotąd w tabelach / plikach
+_DISPLAY = {TIMEOUT: "—", FLOOD: "FloodWait", ERROR: "ERROR"}
+
+# nieudany odczyt w raportach – nie wchodzi do sum, delt ani historii
+UNKNOWN = "unknown"
+
+# liczby + jednostka QU lub QNT
+NUM_RE = r"(\d{1,3}(?:[ \u00A0,]\d{3})*(?:[.,]\d+)?|\d+(?:[.,]\d+)?)"
+Q_RE   = re.compile(NUM_RE + r"\s*(?:QU|QNT)\b", re.IGNORECASE)
+
+
+# ----------------- PARSOWANIE -----------------
+def normalize_num(txt: str) -> Optional[str]:
+    """Zamienia 1 234,56 / 1,234.56 -> 1234.56"""
+    if not txt:
+        return None
+    t = txt.replace("\u00A0", " ").strip()
+    if "." in t and "," in t:
+        t = t.replace(",", "")
+    else:
+        if "," in t and "." not in t:
+            t = t.replace(",", ".")
+        t = t.replace(" ", "")
+    return t
+
+
+def to_planck(num: str) -> Optional[int]:
+    """'1234.56' -> 1234560000000000 (bez floatów; nadmiarowe cyfry ucinane)."""
+    whole, _, frac = num.partition(".")
+    if not whole.isdigit() or (frac and not frac.isdigit()):
+        return None
+    return int(whole) * ONE + int((frac + "0" * DECIMALS)[:DECIMALS])
+
+
+def float_to_planck(value: float) -> int:
+    """Wartość z historii (float64 w jednostkach) -> plancki."""
+    return int(round(value * ONE))
+
+
+def parse_q_amount(text: str) -> Optional[Tuple[int, str]]:
+    """(plancki, 'QU'/'QNT') z tekstu bota albo None."""
+    if not text:
+        return None
+    m = Q_RE.search(text)
+    if not m:
+        return None
+    planck = to_planck(normalize_num(m.group(1)) or "")
+    if planck is None:
+        return None
+    unit = "QU" if "QU" in m.group(0).upper() else "QNT"
+    return planck, unit
+
+
+def looks_like_placeholder(text: str) -> bool:
+    """Ignoruje echo '/balance', 'Checking balance...' itd."""
+    if not text:
+        return True
+    t = text.strip().lower()
+    if t.startswith("/balance"):
+        return True
+    if "checking balance" in t or "sprawdzam" in t:
+        return True
+    if "balance" in t and ("qnt" not in t and " qu" not in t):
+        return True
+    return False
+
+
+# ----------------- FORMAT -----------------
+def format_fixed(planck: int, places: int) -> str:
+    """Plancki jako liczba z `places` miejscami (zaokrąglenie połówek od zera)."""
+    step = 10 ** (DECIMALS - places)
+    q, r = divmod(abs(planck), step)
+    if 2 * r >= step:
+        q += 1
+    sign = "-" if planck < 0 and q else ""
+    if not places:
+        return f"{sign}{q}"
+    whole, frac = divmod(q, 10 ** places)
+    return f"{sign}{whole}.{frac:0{places}d}"
+
+
+def format_planck(planck: int, unit: str = "QU") -> str:
+    """1234560000000000 -> '1234.56 QU' – ten sam format co z bota."""
+    whole, frac = divmod(planck, ONE)
+    frac_s = f"{frac:0{DECIMALS}d}".rstrip("0")
+    return f"{whole}.{frac_s or '0'} {unit}"
+
+
+# ----------------- REKORD -----------------
+class Balance:
+    __slots__ = ("address", "planck", "unit", "status", "ts")
+
+    def __init__(self, address: str, planck: Optional[int] = None, unit: str = "QU",
+                 status: str = OK, ts: Optional[float] = None):
+        self.address = address
+        self.planck = planck
+        self.unit = unit
+        self.status = status if planck is not None or status != OK else ERROR
+        self.ts = time.time() if ts is None else ts
+
+    @classmethod
+    def failed(cls, address: str, status: str, ts: Optional[float] = None) -> "Balance":
+        return cls(address, None, status=status, ts=ts)
+
+    @classmethod
+    def from_float(cls, address: str, value: float, unit: str = "QU", ts: Optional[float] = None) -> "Balance":
+        return cls(address, float_to_planck(value), unit, ts=ts)
+
+    @classmethod
+    def from_units(cls, address: str, amount: int, decimals: int, unit: str = "QU",
+                   ts: Optional[float] = None) -> "Balance":
+        """Kwota z noda w jego najmniejszej jednostce (10^-decimals)."""
+        if decimals <= DECIMALS:
+            planck = amount * 10 ** (DECIMALS - decimals)
+        else:
+            planck = amount // 10 ** (decimals - DECIMALS)
+        return cls(address, planck, unit, ts=ts)
+
+    @classmethod
+    def parse(cls, text: str, address: str = "", ts: Optional[float] = None) -> "Balance":
+        """Ze starego formatu tekstowego ('1234.5 QU', '—', 'FloodWait', 'ERROR: …')."""
+        t = (text or "").strip()
+        for status, shown in _DISPLAY.items():
+            if t == shown or (status == ERROR and t.startswith("ERROR")):
+                return cls.failed(address, status, ts)
+        got = parse_q_amount(t)
+        if got is None:
+            return cls.failed(address, ERROR, ts)
+        return cls(address, got[0], got[1], ts=ts)
+
+    @property
+    def ok(self) -> bool:
+        return self.status == OK
+
+    @property
+    def amount(self) -> int:
+        """Kwota albo 0 dla nieudanego odczytu – raporty i historia biorą tylko `ok`."""
+        return self.planck if self.ok else 0
+
+    def __str__(self) -> str:
+        if self.ok:
+            return format_planck(self.planck, self.unit)
+        return _DISPLAY.get(self.status, "ERROR")
+
+    def __repr__(self) -> str:
+        return f"Balance({self.address!r}, {self.planck!r}, {self.unit!r}, {self.status!r}, {self.ts!r})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Balance):
+            return NotImplemented
+        return (self.address, self.planck, self.unit, self.status) == \
+            (other.address, other.planck, other.unit, other.status)
+
+    __hash__ = None
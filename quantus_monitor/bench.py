@@ -0,0 +1,410 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarki bez prawdziwego Telegrama.
+
+  python -m quantus_monitor.bench --addresses 200 --latency 0.3 --flood-every 50 --out bench.json
+
+- fetch: fetch_balances przez FakeClient + FakeBot (opóźnienie odpowiedzi,
+  wiadomość "Checking balance…", wstrzykiwany FloodWait) -> adresy / minutę,
+- parse: parse_q_amount / Balance.parse / format_fixed (ns na wywołanie),
+- history: compute_deltas (ColumnarHistory i lista wpisów), fleet_alerts
+  (analiza zarobków, z numpy albo bez) oraz make_discord_messages na
+  syntetycznej historii 10^3 … 10^6 wpisów,
+- startup: zimny start CLI w nowym procesie (import, --help, history,
+  report --dry-run) i które ciężkie zależności ładuje.
+
+Wynik to jeden JSON (stdout albo --out), żeby dało się porównywać przebiegi.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from telethon.errors.rpcerrorlist import FloodWaitError
+from telethon.tl.types import InputPeerUser
+
+from . import groups
+from .balance import Balance, format_fixed, parse_q_amount
+from .columnar import ColumnarHistory
+from .fetch import fetch_balances
+from .settings import Settings
+
+BOT_ID = 5000000001
+
+
+# ----------------- FAKE TELEGRAM -----------------
+class _Message:
+    __slots__ = ("id", "message", "sender_id", "reply_to_msg_id")
+
+    def __init__(self, id: int, message: str, sender_id: int, reply_to_msg_id: Optional[int] = None):
+        self.id = id
+        self.message = message
+        self.sender_id = sender_id
+        self.reply_to_msg_id = reply_to_msg_id
+
+
+class _Event:
+    __slots__ = ("message",)
+
+    def __init__(self, message: _Message):
+        self.message = message
+
+
+class FakeBot:
+    """
+    Symulacja @QuantusFaucetBot: odpowiada po `latency` ± `jitter` s,
+    opcjonalnie najpierw wysyła "Checking balance…", co `flood_every`-tą
+    komendę odrzuca FloodWaitem na `flood_seconds` s. `tail` > 0 dokłada
+    ciężki ogon (opóźnienie × Pareto(tail)), a `anonymous` odpowiada bez
+    reply_to i bez adresu w treści – wtedy kolejność odpowiedzi to jedyna wskazówka.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        jitter: float = 0.0,
+        placeholder: bool = True,
+        flood_every: int = 0,
+        flood_seconds: int = 1,
+        seed: int = 0,
+        tail: float = 0.0,
+        anonymous: bool = False,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.placeholder = placeholder
+        self.flood_every = flood_every
+        self.flood_seconds = flood_seconds
+        self.tail = tail
+        self.anonymous = anonymous
+        self.rng = random.Random(seed)
+        self.commands = 0
+        self.floods = 0
+
+    def balance(self, address: str) -> str:
+        n = sum(map(ord, address)) * 7919 % 1000000
+        return f"{n // 1000},{n % 1000:03d}.5"
+
+    def expected(self, address: str) -> int:
+        """Plancki, które bot podaje dla adresu (do liczenia pomyłek w przypisaniu)."""
+        return parse_q_amount(f"{self.balance(address)} QU")[0]
+
+    def _delay(self) -> float:
+        delay = max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+        if self.tail > 0:
+            delay *= self.rng.paretovariate(self.tail)
+        return delay
+
+    def check_flood(self):
+        self.commands += 1
+        if self.flood_every and self.commands % self.flood_every == 0:
+            self.floods += 1
+            raise FloodWaitError(request=None, capture=self.flood_seconds)
+
+    async def reply(self, client: "FakeClient", sent: _Message):
+        address = sent.message.split()[-1]
+        delay = self._delay()
+        if self.placeholder:
+            await asyncio.sleep(delay / 2)
+            await client.deliver("Checking balance…", sent.id)
+            delay /= 2
+        await asyncio.sleep(delay)
+        if self.anonymous:
+            await client.deliver(f"Balance: {self.balance(address)} QU")
+        else:
+            await client.deliver(f"Balance of {address}: {self.balance(address)} QU", sent.id)
+
+
+class FakeClient:
+    """Tyle TelegramClienta, ile używają ReplyDispatcher i peers."""
+
+    def __init__(self, bot: FakeBot):
+        self.bot = bot
+        self.session = None          # brak pliku sesji -> peers nie zapisuje cache
+        self._ids = itertools.count(1)
+        self._handlers: List[Callable] = []
+        self._connected = True
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    async def connect(self):
+        self._connected = True
+
+    async def disconnect(self):
+        self._connected = False
+
+    async def get_input_entity(self, _username):
+        return InputPeerUser(BOT_ID, 1)
+
+    def add_event_handler(self, callback, _event=None):
+        self._handlers.append(callback)
+
+    def remove_event_handler(self, callback, _event=None):
+        if callback in self._handlers:
+            self._handlers.remove(callback)
+
+    async def get_messages(self, *_args, **_kwargs):
+        return []
+
+    async def send_message(self, _entity, text: str) -> _Message:
+        self.bot.check_flood()
+        sent = _Message(next(self._ids), text, 0)
+        asyncio.get_running_loop().create_task(self.bot.reply(self, sent))
+        return sent
+
+    async def deliver(self, text: str, reply_to: Optional[int] = None):
+        event = _Event(_Message(next(self._ids), text, BOT_ID, reply_to))
+        for handler in list(self._handlers):
+            await handler(event)
+
+
+# ----------------- POMOCNICZE -----------------
+def _best_of(fn: Callable[[], object], repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _per_call_ns(fn: Callable[[str], object], samples: List[str], loops: int) -> float:
+    def run():
+        for _ in range(loops):
+            for s in samples:
+                fn(s)
+    return _best_of(run) / (loops * len(samples)) * 1e9
+
+
+def _addresses(n: int) -> List[str]:
+    return [f"qzBench{i:06d}" for i in range(n)]
+
+
+# ----------------- BENCHMARKI -----------------
+def bench_fetch(n: int, bot: FakeBot, delay: float, burst: float, max_in_flight: int) -> Dict:
+    pairs = [(f"n{i}", a) for i, a in enumerate(_addresses(n))]
+    cfg = Settings({
+        "BALANCE_BACKEND": "bot",
+        "BALANCE_CACHE_TTL": "0",
+        "DELAY_BETWEEN": str(delay),
+        "BURST": str(burst),
+        "MAX_IN_FLIGHT": str(max_in_flight),
+    })
+
+    async def run():
+        client = FakeClient(bot)
+        t0 = time.perf_counter()
+        rows = await fetch_balances(client, pairs, cfg)
+        return time.perf_counter() - t0, rows
+
+    elapsed, rows = asyncio.run(run())
+
+    ok = sum(1 for _label, _addr, bal in rows if bal.ok)
+    wrong = sum(1 for _label, addr, bal in rows if bal.ok and bal.planck != bot.expected(addr))
+    return {
+        "addresses": n,
+        "ok": ok,
+        "wrong": wrong,
+        "seconds": round(elapsed, 4),
+        "addresses_per_min": round(n / elapsed * 60, 1) if elapsed else None,
+        "floods": bot.floods,
+        "latency": bot.latency,
+        "placeholder": bot.placeholder,
+        "anonymous": bot.anonymous,
+        "delay_between": delay,
+        "max_in_flight": max_in_flight,
+    }
+
+
+def bench_parse(loops: int = 2000) -> Dict:
+    replies = [
+        "Balance of qzAbc: 1,234.5 QU",
+        "Saldo: 12 345,67 QNT",
+        "Balance: 0 QU",
+        "Checking balance…",
+    ]
+    balances = ["1234.5 QU", "12 345,67 QNT", "0,5 QU", "1,234,567.89 QU", "ERROR", "—"]
+    amounts = [Balance.parse(b).amount for b in balances]
+    return {
+        "parse_q_amount_ns": round(_per_call_ns(parse_q_amount, replies, loops), 1),
+        "balance_parse_ns": round(_per_call_ns(Balance.parse, balances, loops), 1),
+        "format_fixed_ns": round(_per_call_ns(lambda p: format_fixed(p, 1), amounts, loops), 1),
+    }
+
+
+def _synthetic_entries(size: int, addresses: List[str], step: timedelta, seed: int = 0):
+    """`size` pomiarów co `step`, kończących się teraz; saldo rośnie losowo."""
+    rng = random.Random(seed)
+    start = datetime.now() - step * size
+    vals = {a: rng.uniform(0, 1000) for a in addresses}
+    for i in range(size):
+        for a in addresses:
+            if rng.random() < 0.3:
+                vals[a] += rng.uniform(0, 5)
+        yield {"ts": (start + step * i).isoformat(), "balances": dict(vals)}
+
+
+def bench_history(size: int, n_addresses: int, step: timedelta) -> Dict:
+    addresses = _addresses(n_addresses)
+    entries = list(_synthetic_entries(size, addresses, step))
+    now = {a: Balance.from_float(a, v + 1.0) for a, v in entries[-1]["balances"].items()}
+    now_vals = {a: b.amount for a, b in now.items()}
+    now_ts = datetime.now()
+    rows = [("Bench", [(f"n{i}", a, now[a]) for i, a in enumerate(addresses)])]
+    out = {"entries": size, "addresses": n_addresses}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # retencje wyłączone – mierzymy odczyt, nie rollup
+        store = ColumnarHistory(tmp, raw_retention=None, hourly_retention=None, daily_retention=None)
+        t0 = time.perf_counter()
+        store.import_entries(entries)
+        out["columnar_import_s"] = round(time.perf_counter() - t0, 4)
+        try:
+            out["compute_deltas_columnar_s"] = round(
+                _best_of(lambda: groups.compute_deltas(now_vals, store, now_ts)), 6)
+            deltas = groups.compute_deltas(now_vals, store, now_ts)
+            cfg = Settings({"STALL_WINDOW": "6h"})
+            out["fleet_alerts_s"] = round(
+                _best_of(lambda: groups.fleet_alerts(rows, store, now_vals, now_ts.timestamp(), cfg)), 6)
+        finally:
+            store.close()
+
+    out["compute_deltas_list_s"] = round(_best_of(lambda: groups.compute_deltas(now_vals, entries, now_ts)), 6)
+    out["make_discord_messages_s"] = round(
+        _best_of(lambda: groups.make_discord_messages(rows, now_vals, deltas)), 6)
+    return out
+
+
+# ----------------- START -----------------
+HEAVY_MODULES = ("telethon", "requests", "rich", "dotenv")
+
+# (nazwa, argumenty CLI albo None = sam import pakietu)
+STARTUP_CASES = [
+    ("import_cli", None),
+    ("help", ["--help"]),
+    ("history", ["history", "--headless"]),
+    ("report_dry_run", ["report", "--dry-run"]),
+]
+
+# wynik idzie ostatnią linią na stderr – stdout to wyjście samego CLI
+_STARTUP_SNIPPET = """
+import json, sys, time
+t0 = time.perf_counter()
+from quantus_monitor import cli
+if {argv!r} is not None:
+    try:
+        cli.main({argv!r})
+    except SystemExit:
+        pass
+print(json.dumps([time.perf_counter() - t0, [m for m in {heavy!r} if m in sys.modules]]), file=sys.stderr)
+"""
+
+
+def bench_startup(repeat: int = 5) -> Dict:
+    """
+    Każdy przypadek w świeżym procesie (w pustym katalogu, bez .env):
+    czas ścienny całego procesu (z samym interpreterem), czas od importu
+    CLI do końca i ciężkie zależności, które trafiły do sys.modules.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    for k in ("DISCORD_WEBHOOK", "MONITOR_LAYOUT", "HEADLESS"):
+        env.pop(k, None)
+
+    def wall(code: str, cwd: str):
+        best, inner, heavy = float("inf"), None, None
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            p = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            elapsed = time.perf_counter() - t0
+            if elapsed < best:
+                best = elapsed
+                lines = p.stderr.strip().splitlines()
+                if lines and lines[-1].startswith("["):
+                    inner, heavy = json.loads(lines[-1])
+        return best, inner, heavy
+
+    out = {"repeat": repeat}
+    with tempfile.TemporaryDirectory() as tmp:
+        out["python_s"] = round(wall("pass", tmp)[0], 4)
+        for name, argv in STARTUP_CASES:
+            total, inner, heavy = wall(_STARTUP_SNIPPET.format(argv=argv, heavy=HEAVY_MODULES), tmp)
+            out[name] = {
+                "process_s": round(total, 4),
+                "cli_s": round(inner, 4) if inner is not None else None,
+                "heavy_modules": heavy,
+            }
+    return out
+
+
+# ----------------- CLI -----------------
+def parse_args(argv=None) -> argparse.Namespace:
+    ap = argparse.ArgumentParser(description="Benchmarki monitora sald (bez Telegrama)")
+    ap.add_argument("--addresses", type=int, default=100, help="ile adresów w teście fetch")
+    ap.add_argument("--latency", type=float, default=0.05, help="opóźnienie odpowiedzi bota [s]")
+    ap.add_argument("--jitter", type=float, default=0.0, help="losowe ± do opóźnienia [s]")
+    ap.add_argument("--no-placeholder", action="store_true", help="bot bez 'Checking balance…'")
+    ap.add_argument("--flood-every", type=int, default=0, help="co która komenda dostaje FloodWait (0 = nigdy)")
+    ap.add_argument("--flood-seconds", type=int, default=1)
+    ap.add_argument("--tail", type=float, default=0.0,
+                    help="ciężki ogon opóźnień: × Pareto(TAIL), np. 1.5 (0 = wyłączony)")
+    ap.add_argument("--anonymous-replies", action="store_true",
+                    help="bot bez reply_to i bez adresu w odpowiedzi (przypisanie tylko po kolejności)")
+    ap.add_argument("--delay", type=float, default=0.01,
+                    help="DELAY_BETWEEN na czas testu (mały = mierzymy nasz narzut, nie limit Telegrama)")
+    ap.add_argument("--burst", type=float, default=3)
+    ap.add_argument("--max-in-flight", type=int, default=4)
+    ap.add_argument("--sizes", default="1000,10000,100000",
+                    help="rozmiary syntetycznej historii, np. 1000,10000,100000,1000000")
+    ap.add_argument("--history-addresses", type=int, default=20)
+    ap.add_argument("--step", type=float, default=300, help="odstęp między pomiarami w historii [s]")
+    ap.add_argument("--startup-repeat", type=int, default=5, help="ile razy uruchomić każdy przypadek startu")
+    ap.add_argument("--skip", default="", help="pomiń sekcje: fetch,parse,history,startup")
+    ap.add_argument("--out", default="-", help="plik wynikowy JSON ('-' = stdout)")
+    return ap.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    skip = {s.strip() for s in args.skip.split(",") if s.strip()}
+
+    result = {
+        "ts": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+    if "fetch" not in skip:
+        bot = FakeBot(args.latency, args.jitter, not args.no_placeholder, args.flood_every, args.flood_seconds,
+                      tail=args.tail, anonymous=args.anonymous_replies)
+        result["fetch"] = bench_fetch(args.addresses, bot, args.delay, args.burst, args.max_in_flight)
+    if "parse" not in skip:
+        result["parse"] = bench_parse()
+    if "history" not in skip:
+        sizes = [int(float(s)) for s in args.sizes.split(",") if s.strip()]
+        step = timedelta(seconds=args.step)
+        result["history"] = [bench_history(n, args.history_addresses, step) for n in sizes]
+    if "startup" not in skip:
+        result["startup"] = bench_startup(args.startup_repeat)
+
+    text = json.dumps(result, indent=2)
+    if args.out == "-":
+        print(text)
+    else:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+Dispatcher odpowiedzi bota oparty o event NewMessage.
+
+Zamiast odpytywać get_messages() co STEP_WAIT sekund, rejestrujemy jeden
+handler na czat z botem. Każda komenda /balance dostaje future, a handler
+przypisuje przychodzącą wiadomość do oczekującej komendy:
+  1. po reply_to_msg_id (jeśli bot odpowiada "w wątku"),
+  2. po adresie występującym w treści odpowiedzi,
+  3. w ostateczności po kolejności (FIFO) – tylko gdy czeka dokładnie jedna
+     komenda, wysłana raz (bez hedge).
+
+Wysłane wiadomości komend, które nie dostały odpowiedzi (timeout, drugi
+egzemplarz przy hedge), trafiają na listę "sierot": spóźniona odpowiedź na
+taką komendę (po reply_to albo adresie) jest odrzucana, zamiast trafić do
+innego adresu.
+
+Bot, który odpowiada bez reply_to i bez adresu w treści, przełącza dispatcher
+w tryb "serial": jedna komenda naraz, bez hedge, a po timeoucie następna
+komenda czeka (najwyżej SERIAL_GRACE × timeout), aż przyjdzie spóźniona
+odpowiedź – wtedy kolejność zawsze jednoznacznie wskazuje adres. Komendy,
+które czekały równolegle w chwili przełączenia, kończą się bez odpowiedzi
+(trafiają do rund ponowień), bo ich odpowiedzi nie da się już rozróżnić.
+"""
+
+import asyncio
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from telethon import events, utils
+from telethon.errors.rpcerrorlist import FloodWaitError
+
+from . import metrics
+from .peers import PEER_REJECTED, invalidate_peer, resolve_peer
+
+# (id klienta, bot) -> dispatcher; jeden handler na połączenie
+_DISPATCHERS: Dict[Tuple[int, str], "ReplyDispatcher"] = {}
+_ATTACHING: Dict[Tuple[int, str], asyncio.Future] = {}
+
+MAX_ORPHANS = 256       # wysłane komendy bez odpowiedzi, na które jeszcze może przyjść spóźniona
+ORPHAN_TTL = 180.0      # po tylu sekundach przestajemy czekać na spóźnioną odpowiedź
+MAX_EARLY = 64          # odpowiedzi z reply_to, które przyszły przed powrotem send_message
+SERIAL_GRACE = 2.0      # tryb serial: ile timeoutów czekać na spóźnioną odpowiedź przed następną komendą
+
+
+class _Pending:
+    __slots__ = ("address", "future", "timeout", "sent_ids", "hedged", "answered")
+
+    def __init__(self, address: str, future: asyncio.Future, timeout: float):
+        self.address = address
+        self.future = future
+        self.timeout = timeout
+        self.sent_ids: List[int] = []     # id wysłanych wiadomości (więcej niż jedno przy hedge)
+        self.hedged = False               # komenda może pójść drugi raz – bez FIFO
+        self.answered: Optional[int] = None   # id komendy, na którą przyszła odpowiedź (gdy wiadomo)
+
+
+class ReplyDispatcher:
+    def __init__(self, client, bot_username: str, entity, parse_reply: Callable[[str], Optional[str]], debug_log=None):
+        self.client = client
+        self.bot_username = bot_username
+        self.entity = entity
+        self.peer_id = utils.get_peer_id(entity)
+        self.parse_reply = parse_reply
+        self.debug_log = debug_log
+        self._pending: Dict[str, _Pending] = {}   # komenda -> oczekująca odpowiedź
+        self._by_msg_id: Dict[int, str] = {}      # id wysłanej wiadomości -> komenda
+        # id wysłanej wiadomości -> (adres, do kiedy czekamy) dla komend bez odpowiedzi
+        self._orphans: "OrderedDict[int, Tuple[str, float]]" = OrderedDict()
+        self._early: "OrderedDict[int, object]" = OrderedDict()   # reply_to -> odczytane saldo
+        self.serial = False                       # bot nie wskazuje komendy – jedna naraz
+        self._serial_lock = asyncio.Lock()
+        self._owed = 0                            # tryb serial: odpowiedzi winne komendom po timeoucie
+        self._owed_until = 0.0
+        self._owed_event = asyncio.Event()
+        self._event = None
+
+    @classmethod
+    async def attach(cls, client, bot_username: str, parse_reply, debug_log=None) -> "ReplyDispatcher":
+        """Zwraca dispatcher dla klienta (tworzy i rejestruje handler przy pierwszym użyciu)."""
+        key = (id(client), bot_username)
+        disp = _DISPATCHERS.get(key)
+        if disp is not None and disp.client is client:
+            return disp
+        # kilku workerów może wołać attach naraz – resolve tylko raz
+        pending = _ATTACHING.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(cls._create(client, bot_username, parse_reply, debug_log))
+            _ATTACHING[key] = pending
+            pending.add_done_callback(lambda _f: _ATTACHING.pop(key, None))
+        return await asyncio.shield(pending)
+
+    @classmethod
+    async def _create(cls, client, bot_username, parse_reply, debug_log) -> "ReplyDispatcher":
+        entity = await resolve_peer(client, bot_username)
+        disp = cls(client, bot_username, entity, parse_reply, debug_log)
+        disp.start()
+        _DISPATCHERS[(id(client), bot_username)] = disp
+        return disp
+
+    def start(self):
+        self._event = events.NewMessage(chats=self.entity, incoming=True)
+        self.client.add_event_handler(self._on_message, self._event)
+
+    def _unregister(self):
+        if self._event is not None:
+            self.client.remove_event_handler(self._on_message, self._event)
+            self._event = None
+
+    async def refresh_entity(self):
+        """Telegram odrzucił zapisany peer – kasujemy cache i rozwiązujemy od nowa."""
+        invalidate_peer(self.client, self.bot_username)
+        self._unregister()
+        self.entity = await resolve_peer(self.client, self.bot_username)
+        self.peer_id = utils.get_peer_id(self.entity)
+        self.start()
+
+    def stop(self):
+        self._unregister()
+        for p in self._pending.values():
+            if not p.future.done():
+                p.future.cancel()
+        self._pending.clear()
+        self._by_msg_id.clear()
+        self._orphans.clear()
+        self._early.clear()
+        for key, disp in list(_DISPATCHERS.items()):
+            if disp is self:
+                del _DISPATCHERS[key]
+
+    async def _on_message(self, event):
+        msg = event.message
+        t = (msg.message or "").strip()
+        if not t:
+            return
+        if self.debug_log:
+            self.debug_log(f"BOT[{msg.id}]: {t}")
+        got = self.parse_reply(t)
+        if not got:
+            metrics.BOT_MESSAGES.inc(kind="ignored")
+            return
+        reply_to = getattr(msg, "reply_to_msg_id", None)
+        cmd = self._match(msg, t)
+        if cmd is None:
+            if reply_to is not None and reply_to not in self._by_msg_id and not self._is_orphan(reply_to):
+                # odpowiedź szybsza niż powrót send_message – czeka, aż _send zapisze id
+                self._early[reply_to] = got
+                while len(self._early) > MAX_EARLY:
+                    self._early.popitem(last=False)
+                return
+            metrics.BOT_MESSAGES.inc(kind="unmatched")
+            return
+        metrics.BOT_MESSAGES.inc(kind="balance")
+        self._resolve(cmd, got, reply_to if self._by_msg_id.get(reply_to) == cmd else None)
+
+    def _resolve(self, cmd: str, got, sent_id: Optional[int]):
+        p = self._pending.pop(cmd)
+        for i in p.sent_ids:
+            self._by_msg_id.pop(i, None)
+        p.answered = sent_id if sent_id is not None else (p.sent_ids[0] if p.sent_ids else None)
+        if not p.future.done():
+            p.future.set_result(got)
+
+    def _match(self, msg, text: str) -> Optional[str]:
+        reply_to = getattr(msg, "reply_to_msg_id", None)
+        if reply_to is not None:
+            cmd = self._by_msg_id.get(reply_to)
+            if cmd in self._pending:
+                return cmd
+            if self._take_orphan(sent_id=reply_to):
+                return None     # spóźniona odpowiedź na komendę po timeoucie / drugi egzemplarz hedge
+        for cmd, p in self._pending.items():
+            if p.address and p.address in text:
+                return cmd
+        if self._take_orphan(text=text):
+            return None
+        if reply_to is not None:
+            return None         # odpowiedź na wiadomość, której nie znamy – nie zgadujemy
+        # bot nie wskazuje komendy: kolejność to jedyna wskazówka
+        if not self.serial:
+            self.serial = True
+            if len(self._pending) > 1:
+                self._abandon_pending()
+                return None
+        if self._owed:
+            self._owed -= 1             # spóźniona odpowiedź na komendę po timeoucie
+            self._owed_event.set()
+            return None
+        if len(self._pending) != 1:
+            return None
+        cmd, p = next(iter(self._pending.items()))
+        if p.hedged or len(p.sent_ids) != 1 or p.sent_ids[0] > msg.id:
+            return None
+        return cmd
+
+    def _abandon_pending(self):
+        """
+        Przełączenie w tryb serial przy kilku czekających komendach: ta odpowiedź
+        należy do jednej z nich, nie wiadomo której – wszystkie kończą się bez
+        odpowiedzi, a pozostałe odpowiedzi odrzucamy jako winne.
+        """
+        pending = list(self._pending.values())
+        for p in pending:
+            if not p.future.done():
+                p.future.set_result(None)
+        for p in pending[1:]:
+            self._owe(p.timeout)
+
+    def _owe(self, timeout: float):
+        self._owed += 1
+        self._owed_until = max(self._owed_until, asyncio.get_running_loop().time() + SERIAL_GRACE * timeout)
+
+    async def _drain(self):
+        """Tryb serial: przed następną komendą czekamy na winne odpowiedzi (najwyżej do _owed_until)."""
+        loop = asyncio.get_running_loop()
+        while self._owed and loop.time() < self._owed_until:
+            self._owed_event.clear()
+            try:
+                await asyncio.wait_for(self._owed_event.wait(), self._owed_until - loop.time())
+            except asyncio.TimeoutError:
+                break
+        self._owed = 0
+
+    def _prune_orphans(self):
+        now = asyncio.get_running_loop().time()
+        while self._orphans and next(iter(self._orphans.values()))[1] < now:
+            self._orphans.popitem(last=False)
+
+    def _is_orphan(self, sent_id: int) -> bool:
+        self._prune_orphans()
+        return sent_id in self._orphans
+
+    def _take_orphan(self, sent_id: Optional[int] = None, text: str = "") -> bool:
+        """Zdejmuje sierotę, do której pasuje odpowiedź (po id komendy albo adresie w treści); True = odrzucić."""
+        self._prune_orphans()
+        if sent_id is not None:
+            return self._orphans.pop(sent_id, None) is not None
+        for i, (address, _until) in self._orphans.items():
+            if address and address in text:
+                del self._orphans[i]
+                return True
+        return False
+
+    def _orphan(self, p: _Pending, ttl: float):
+        until = asyncio.get_running_loop().time() + ttl
+        for i in p.sent_ids:
+            if i != p.answered:
+                self._orphans[i] = (p.address, until)
+        while len(self._orphans) > MAX_ORPHANS:
+            self._orphans.popitem(last=False)
+
+    async def _send(self, cmd: str, p: _Pending):
+        entity = self.entity
+        try:
+            sent = await self.client.send_message(entity, cmd)
+        except PEER_REJECTED:
+            if self.entity is entity:
+                await self.refresh_entity()
+            sent = await self.client.send_message(self.entity, cmd)
+        if self._pending.get(cmd) is p:
+            p.sent_ids.append(sent.id)
+            self._by_msg_id[sent.id] = cmd
+            early = self._early.pop(sent.id, None)
+            if early is not None:
+                metrics.BOT_MESSAGES.inc(kind="balance")
+                self._resolve(cmd, early, sent.id)
+        if self.debug_log:
+            self.debug_log(f"CMD id={sent.id}: {cmd}")
+
+    async def ask(self, cmd: str, address: str, timeout: float, hedge_after: Optional[float] = None,
+                  before_hedge: Optional[Callable[[], Awaitable[None]]] = None) -> Optional[str]:
+        """
+        Wysyła komendę i czeka na odpowiedź; None = brak odpowiedzi w czasie `timeout`.
+        `hedge_after`: bez odpowiedzi po tylu sekundach komenda idzie drugi raz
+        (najpierw `before_hedge`, np. token z limitera); liczy się pierwsza odpowiedź.
+        FloodWait przy hedge'u tylko go pomija – dalej czekamy na pierwszą komendę.
+        """
+        if self.serial:
+            async with self._serial_lock:
+                await self._drain()
+                return await self._ask(cmd, address, timeout, None, None)
+        return await self._ask(cmd, address, timeout, hedge_after, before_hedge)
+
+    async def _ask(self, cmd: str, address: str, timeout: float, hedge_after: Optional[float],
+                   before_hedge: Optional[Callable[[], Awaitable[None]]]) -> Optional[str]:
+        loop = asyncio.get_running_loop()
+        p = _Pending(address, loop.create_future(), timeout)
+        p.hedged = hedge_after is not None and hedge_after < timeout
+        # future rejestrujemy przed wysyłką – szybka odpowiedź nie może nam uciec
+        self._pending[cmd] = p
+        deadline = loop.time() + timeout
+        try:
+            await self._send(cmd, p)
+            if p.hedged:
+                try:
+                    return await asyncio.wait_for(asyncio.shield(p.future), hedge_after)
+                except asyncio.TimeoutError:
+                    pass
+                try:
+                    if before_hedge is not None:
+                        await before_hedge()
+                    if not p.future.done() and not self.serial:
+                        metrics.BOT_HEDGES.inc()
+                        await self._send(cmd, p)
+                except FloodWaitError as e:
+                    # hedge jest tylko dodatkiem: pierwsza komenda już poszła, czekamy dalej na nią
+                    if self.debug_log:
+                        self.debug_log(f"HEDGE pominięty (FloodWait {e.seconds}s): {cmd}")
+            return await asyncio.wait_for(asyncio.shield(p.future), max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            if self.serial:
+                self._owe(timeout)
+            return None
+        finally:
+            if self._pending.get(cmd) is p:
+                del self._pending[cmd]
+            for sent_id in p.sent_ids:
+                self._by_msg_id.pop(sent_id, None)
+            # komendy bez odpowiedzi: spóźniona odpowiedź na nie będzie odrzucona
+            self._orphan(p, max(ORPHAN_TTL, timeout))
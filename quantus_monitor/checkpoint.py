@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Checkpoint sweepa: każdy wynik (adres -> saldo) jest dopisywany do pliku
+JSONL w chwili, gdy przychodzi, więc przerwany sweep (zerwane połączenie,
+FloodWait dłuższy niż interwał crona, OOM) nie zaczyna od zera.
+
+Następny sweep bierze z checkpointu poprawne salda młodsze niż `max_age`
+i pyta noda/bota tylko o resztę. Historia dostaje pomiar dopiero na końcu,
+w całości – potem checkpoint jest kasowany. Przerwany zapis zostawia co
+najwyżej uciętą ostatnią linię, którą odczyt pomija (jak w history.py).
+"""
+
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from .balance import Balance
+
+
+class SweepCheckpoint:
+    def __init__(self, path: str, max_age: float):
+        self.path = Path(path)
+        self.max_age = max_age
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_age > 0
+
+    def load(self, now: Optional[float] = None) -> Dict[str, Balance]:
+        """Adres -> saldo z przerwanego sweepa (tylko poprawne i młodsze niż max_age)."""
+        if not self.enabled:
+            return {}
+        now = now or time.time()
+        out: Dict[str, Balance] = {}
+        try:
+            with open(self.path, "r") as f:
+                for line in f:
+                    try:
+                        addr, planck, unit, ts = json.loads(line)
+                        bal = Balance(addr, int(planck), unit, ts=float(ts))
+                    except (TypeError, ValueError):
+                        # ucięta linia po przerwanym zapisie
+                        continue
+                    if now - bal.ts < self.max_age:
+                        out[addr] = bal
+        except OSError:
+            return {}
+        return out
+
+    def record(self, results: Dict[str, Balance]):
+        """Dopisuje poprawne salda i robi fsync (błędy i timeouty zostają do ponownego zapytania)."""
+        if not self.enabled:
+            return
+        lines = "".join(
+            json.dumps([addr, bal.planck, bal.unit, bal.ts], separators=(",", ":")) + "\n"
+            for addr, bal in results.items() if bal.ok
+        )
+        if not lines:
+            return
+        with open(self.path, "a+b") as f:
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    lines = "\n" + lines
+            f.write(lines.encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self):
+        """Sweep zakończony i zapisany w historii – następny zaczyna od zera."""
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
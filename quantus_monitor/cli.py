@@ -0,0 +1,495 @@
+# -*- coding: utf-8 -*-
+"""
+Jedno CLI dla obu układów raportu:
+
+  python -m quantus_monitor sweep   [--layout groups|pairs] [--daemon] [--dry-run] [--headless]
+  python -m quantus_monitor sweep --subscribe                         # salda z powiadomień noda (WebSocket)
+  python -m quantus_monitor report  [--layout ...] [--dry-run]       # z historii, bez Telegrama i noda
+  python -m quantus_monitor history [--layout ...] [NODE|ADRES] [--hours 24]
+  python -m quantus_monitor health                                    # nody i minery z hosts.txt
+  python -m quantus_monitor inventory [--layout ...]                  # walidacja nodes*.txt, bez sieci
+
+quantus_balance_tg.py i qmonitor1.py to teraz `sweep --layout groups` / `pairs`.
+
+Start ma być tani (cron co kilka minut na małym VPS): tu importujemy tylko
+stdlib i lekkie moduły pakietu; układ ładujemy dopiero po wyborze, a asyncio,
+telethon, requests i rich – w ścieżce, która ich faktycznie używa (report i
+history są synchroniczne). Czas startu mierzy
+`python -m quantus_monitor.bench --skip fetch,parse,history`.
+"""
+
+import argparse
+import importlib
+import math
+import sys
+import time
+from datetime import datetime
+
+_T_IMPORTS = time.perf_counter()   # --profile: czas importów
+
+from . import output, profiling
+from .settings import Settings
+
+_T_IMPORTED = time.perf_counter()
+
+LAYOUTS = ("groups", "pairs")
+
+
+def load_layout(name: str):
+    if name not in LAYOUTS:
+        raise SystemExit(f"nieznany układ: {name} (dostępne: {', '.join(LAYOUTS)})")
+    return importlib.import_module(f".{name}", __package__)
+
+
+def load_dotenv():
+    """.env, jeśli jest python-dotenv; bez niego zostają zmienne środowiska (systemd, cron)."""
+    try:
+        from dotenv import load_dotenv as _load
+    except ImportError:
+        return
+    _load()
+
+
+# ----------------- DISCORD -----------------
+def render(layout, result, status=None, now=None):
+    with profiling.stage("render", cpu=True):
+        return layout.render(result, status, now)
+
+
+def report(layout, result, cfg: Settings, dry_run: bool = False, status=None, now=None):
+    """Render + wysyłka; z DISCORD_EDIT=1 edytuje wiadomości poprzedniego raportu zamiast wysyłać nowe."""
+    if not cfg.discord_edit:
+        send(render(layout, result, status, now), cfg, dry_run)
+        return
+    with profiling.stage("render", cpu=True):
+        slots = layout.render_slots(result, status, now)
+    send_slots(slots, cfg, dry_run)
+
+
+def send(messages, cfg: Settings, dry_run: bool = False):
+    """Kolejkuje wiadomości – wysyła wątek w tle; --dry-run wypisuje je na stdout."""
+    with profiling.stage("discord"):
+        if dry_run:
+            for msg in messages:
+                sys.stdout.write(msg + "\n\n")
+            return
+        if not cfg.discord_webhook:
+            return
+        from .discord import get_webhook
+
+        hook = get_webhook(cfg.discord_webhook, output.console().print)
+        for msg in messages:
+            hook.submit(msg)
+        if profiling.active():
+            # wysyłka idzie w tle – przy profilowaniu czekamy, żeby ją zmierzyć
+            hook.flush()
+
+
+def send_slots(slots, cfg: Settings, dry_run: bool = False):
+    """
+    Tylko sloty, których treść zmieniła się od ostatniego raportu; wiadomości
+    slotów, których już nie ma, są kasowane. --dry-run niczego nie zapamiętuje.
+    """
+    from . import metrics
+    from .discord import get_board
+
+    with profiling.stage("discord"):
+        board = get_board(cfg.discord_state_path)
+        changed = board.changed(slots)
+        surplus = board.surplus(slots)
+        metrics.DISCORD_SKIPPED.inc(len(slots) - len(changed))
+        if dry_run:
+            for slot, _key, msg in changed:
+                sys.stdout.write(f"[{slot}]\n{msg}\n\n")
+            sent = {slot for slot, _key, _msg in changed}
+            unchanged = [slot for slot, _key, _msg in slots if slot not in sent]
+            if unchanged:
+                sys.stdout.write(f"(bez zmian: {', '.join(unchanged)})\n")
+            if surplus:
+                sys.stdout.write(f"(do skasowania: {', '.join(surplus)})\n")
+            return
+        if not cfg.discord_webhook:
+            return
+        from .discord import get_webhook
+
+        hook = get_webhook(cfg.discord_webhook, output.console().print)
+        for slot, key, msg in changed:
+            hook.submit_slot(board, slot, key, msg)
+        for slot in surplus:
+            hook.submit_delete(board, slot)
+        if profiling.active():
+            hook.flush()
+
+
+# ----------------- SWEEP -----------------
+async def check_hosts(groups, cfg: Settings, hosts):
+    """Adres -> stan noda/minera z hosts.txt (linie podsumowania idą na konsolę)."""
+    from . import health
+
+    with profiling.stage("health"):
+        checks = await health.collect(hosts, cfg.health_timeout)
+    con = output.console()
+    for line in health.summary_lines(checks, cfg.max_block_lag):
+        con.print(line)
+    return health.status_by_address(groups, checks, cfg.max_block_lag)
+
+
+def load_inventory(layout, cfg: Settings, con, last=None):
+    """
+    Nody z plików układu, zwalidowane przed siecią; problemy (zły adres, duplikat)
+    wypisujemy tylko przy nowym odczycie – daemon woła to co sweep, a niezmienione
+    pliki wracają z cache bez parsowania.
+    """
+    with profiling.stage("read_groups"):
+        inv = layout.load_inventory(cfg)
+    if inv is not last:
+        for problem in inv.problems:
+            con.print(f"[yellow]{problem}[/yellow]")
+    return inv
+
+
+async def sweep_once(layout, clients, groups, state, cfg: Settings, hosts):
+    """
+    Salda i stan hostów z hosts.txt naraz. Zwraca (wynik sweepa układu,
+    adres -> stan noda/minera albo None, gdy hosts.txt nie ma).
+    """
+    if not hosts:
+        return await layout.sweep(clients, groups, state, cfg), None
+
+    import asyncio
+
+    result, status = await asyncio.gather(layout.sweep(clients, groups, state, cfg), check_hosts(groups, cfg, hosts))
+    return result, status
+
+
+async def run_daemon(layout, clients, inv, state, cfg: Settings, args, hosts=()):
+    """
+    Stałe połączenia, sweep co `args.sweep_every` s, raport co `args.report_every` s.
+    Pliki z nodami sprawdzamy przed każdym sweepem – zmienione wchodzą bez restartu.
+    """
+    import asyncio
+
+    from . import metrics
+    from .daemon import ensure_connected, install_stop_handlers, run_jobs
+
+    con = output.console()
+    last = {"result": None, "reported": True, "inventory": inv}
+
+    async def sweep_job():
+        inv = load_inventory(layout, cfg, con, last["inventory"])
+        metrics.INVENTORY_PROBLEMS.set(len(inv.problems))
+        last["inventory"] = inv
+        if not inv.groups:
+            con.print(f"[red]{layout.NO_INVENTORY}[/red]")
+            return
+        for client in clients:
+            await ensure_connected(client, log=con.print)
+        last["result"] = await sweep_once(layout, clients, inv.groups, state, cfg, hosts)
+        last["reported"] = False
+        metrics.write_textfile(args.metrics_textfile)
+
+    async def report_job():
+        if last["result"] is None or last["reported"]:
+            return
+        if not args.no_report:
+            result, status = last["result"]
+            report(layout, result, cfg, args.dry_run, status)
+        last["reported"] = True
+
+    def on_error(name, e):
+        con.print(f"[red]{name}: {e}[/red]")
+
+    stop = asyncio.Event()
+    install_stop_handlers(stop)
+    await run_jobs([("sweep", args.sweep_every, sweep_job), ("report", args.report_every, report_job)],
+                   stop, on_error)
+
+
+async def run_subscribed(layout, inv, state, cfg: Settings, args, hosts=()):
+    """
+    --subscribe: salda z powiadomień noda (historia tylko dla zmienionych kont),
+    raport co `args.report_every` s z bieżących sald.
+    """
+    import asyncio
+
+    from . import metrics, subscribe
+    from .daemon import install_stop_handlers, run_jobs
+
+    con = output.console()
+    groups = inv.groups
+    watch = subscribe.BalanceWatch(groups, layout.known_balances(inv, state), cfg.token_decimals)
+    for addr in watch.invalid:
+        con.print(f"[yellow]Pomijam niepoprawny adres: {addr}[/yellow]")
+
+    def on_change(changed, block):
+        layout.record_changes(inv, state, changed)
+        con.print(f"blok {block if block is not None else '?'}: zmiana salda {len(changed)} kont")
+        metrics.write_textfile(args.metrics_textfile)
+
+    async def report_job():
+        if not watch.synced or args.no_report:
+            return
+        status = await check_hosts(groups, cfg, hosts) if hosts else None
+        result = layout.result_from_balances(groups, state, watch.balances, cfg)
+        report(layout, result, cfg, args.dry_run, status)
+
+    def on_error(name, e):
+        con.print(f"[red]{name}: {e}[/red]")
+
+    stop = asyncio.Event()
+    install_stop_handlers(stop)
+    url = cfg.node_ws_url or subscribe.ws_url(cfg.node_rpc_url)
+    listener = asyncio.ensure_future(subscribe.watch_balances(url, watch, on_change, stop, log=con.print))
+    try:
+        # pierwszy raport dopiero po pierwszym powiadomieniu – do tego czasu report_job nic nie robi
+        await run_jobs([("report", args.report_every, report_job)], stop, on_error)
+    finally:
+        stop.set()
+        await listener
+
+
+def cmd_sweep(args, cfg: Settings, layout) -> int:
+    import asyncio
+
+    return asyncio.run(_cmd_sweep(args, cfg, layout))
+
+
+async def _cmd_sweep(args, cfg: Settings, layout) -> int:
+    from . import health, metrics
+    from .fetch import open_clients
+    from .sessions import session_configs
+
+    con = output.console()
+    sessions = session_configs()
+    use_bot = cfg.use_bot and not args.subscribe
+    if use_bot and (not cfg.api_id or not cfg.api_hash or not all(phone for _name, phone in sessions)):
+        con.print("[red]Brakuje API_ID/API_HASH/PHONE w .env[/red]")
+        return 1
+
+    inv = load_inventory(layout, cfg, con)
+    metrics.INVENTORY_PROBLEMS.set(len(inv.problems))
+    groups = inv.groups
+    if not groups:
+        con.print(f"[red]{layout.NO_INVENTORY}[/red]")
+        return 1
+    hosts = health.read_hosts(cfg.hosts_file, cfg.miner_path)
+    if args.no_resume:
+        layout.checkpoint(cfg).clear()
+
+    clients = []
+    state = layout.open_state(cfg)
+    try:
+        if use_bot:
+            await open_clients(cfg, sessions, clients)
+
+        if args.subscribe:
+            metrics.serve(args.metrics_port)
+            await run_subscribed(layout, inv, state, cfg, args, hosts)
+        elif args.daemon:
+            metrics.serve(args.metrics_port)
+            await run_daemon(layout, clients, inv, state, cfg, args, hosts)
+        else:
+            result, status = await sweep_once(layout, clients, groups, state, cfg, hosts)
+            if not args.no_report:
+                report(layout, result, cfg, args.dry_run, status)
+    finally:
+        layout.close_state(state)
+        for client in clients:
+            await client.disconnect()
+    return 0
+
+
+# ----------------- REPORT / HISTORY -----------------
+def cmd_report(args, cfg: Settings, layout) -> int:
+    con = output.console()
+    groups = load_inventory(layout, cfg, con).groups
+    if not groups:
+        con.print(f"[red]{layout.NO_INVENTORY}[/red]")
+        return 1
+
+    state = layout.open_state(cfg)
+    try:
+        got = layout.history_result(groups, state, cfg)
+    finally:
+        layout.close_state(state)
+
+    if got is None:
+        con.print("[yellow]Historia jest pusta – najpierw sweep[/yellow]")
+        return 1
+    result, now = got
+    report(layout, result, cfg, args.dry_run, now=now)
+    return 0
+
+
+def cmd_history(args, cfg: Settings, layout) -> int:
+    from .balance import float_to_planck, format_fixed
+
+    con = output.console()
+    state = layout.open_state(cfg, readonly=True)
+    try:
+        if not layout.has_history(state):
+            con.print("[yellow]Brak historii[/yellow]")
+            return 1
+        if not args.node:
+            for key, value in layout.history_info(state):
+                con.print(f"{key:<12} {value}")
+            return 0
+
+        inv = load_inventory(layout, cfg, con)
+        since = time.time() - args.hours * 3600 if args.hours > 0 else -math.inf
+        series = layout.history_series(inv, state, args.node, since)
+        windows = layout.window_stats(inv, state, args.node, cfg) if series else {}
+    finally:
+        layout.close_state(state)
+
+    if not series:
+        con.print(f"[yellow]Brak historii dla {args.node}[/yellow]")
+        return 1
+    prev = None
+    for ts, planck in series:
+        delta = "" if prev is None else ("+" if planck > prev else "") + format_fixed(planck - prev, 3)
+        con.print(f"{datetime.fromtimestamp(ts):%Y-%m-%d %H:%M}  {format_fixed(planck, 3):>14}  {delta:>12}")
+        prev = planck
+
+    def fmt(v, signed=False):
+        planck = float_to_planck(v)
+        return ("+" if signed and planck > 0 else "") + format_fixed(planck, 3)
+
+    con.print("")
+    con.print(f"{'okno':<6}{'Δ':>14}{'Δ / h':>12}{'min':>16}{'max':>16}")
+    for label, st in windows.items():
+        if st is None:
+            con.print(f"{label:<6}{'-':>14}")
+            continue
+        con.print(f"{label:<6}{fmt(st.delta, True):>14}{fmt(st.rate, True):>12}{fmt(st.low):>16}{fmt(st.high):>16}")
+    return 0
+
+
+def cmd_health(args, cfg: Settings, _layout) -> int:
+    """Sam stan hostów; kod wyjścia 1, gdy któryś ma problem (do alertów z crona)."""
+    import asyncio
+
+    from . import health
+
+    con = output.console()
+    hosts = health.read_hosts(cfg.hosts_file, cfg.miner_path)
+    if not hosts:
+        con.print(f"[red]Brak hostów w {cfg.hosts_file}[/red]")
+        return 1
+    with profiling.stage("health"):
+        checks = asyncio.run(health.collect(hosts, cfg.health_timeout))
+    for line in health.summary_lines(checks, cfg.max_block_lag):
+        con.print(line)
+    best = health.fleet_best(checks)
+    return 1 if any(h.problems(best, cfg.max_block_lag) for h in checks.values()) else 0
+
+
+def cmd_inventory(args, cfg: Settings, layout) -> int:
+    """Sama walidacja plików z nodami (bez sieci); kod wyjścia 1 przy problemach albo braku nodów."""
+    con = output.console()
+    inv = load_inventory(layout, cfg, con)
+    if not inv.groups:
+        con.print(f"[red]{layout.NO_INVENTORY}[/red]")
+        return 1
+    for owner, pairs in inv.groups:
+        con.print(f"{owner:<16} {len(pairs):>4} adresów")
+    con.print(f"{'razem':<16} {len(inv.index):>4} adresów, problemów: {len(inv.problems)}")
+    return 1 if inv.problems else 0
+
+
+COMMANDS = {"sweep": cmd_sweep, "report": cmd_report, "history": cmd_history, "health": cmd_health,
+            "inventory": cmd_inventory}
+
+
+# ----------------- ARGUMENTY -----------------
+def parse_args(argv=None) -> argparse.Namespace:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--layout", choices=LAYOUTS, default=None,
+                        help="groups = nodes*.txt, delty 12h/24h; pairs = nodes.txt + nodes_other.txt, "
+                             "Δ od poprzedniego pomiaru (domyślnie MONITOR_LAYOUT albo groups)")
+    common.add_argument("--headless", action="store_true",
+                        help="bez rich – zwykły tekst (cron, brak terminala); też HEADLESS=1")
+    common.add_argument("--profile", nargs="?", const="profile.json", default="",
+                        help="zapisz czasy etapów (JSON + .folded dla flamegraph), domyślnie profile.json")
+    common.add_argument("--profile-cpu", action="store_true",
+                        help="z --profile: cProfile etapów obliczeniowych (.pstats)")
+
+    ap = argparse.ArgumentParser(prog="python -m quantus_monitor",
+                                 description="Salda Quantus (@QuantusFaucetBot / node RPC) -> Discord")
+    sub = ap.add_subparsers(dest="command", metavar="{sweep,report,history,health,inventory}")
+    sub.required = True
+
+    sp = sub.add_parser("sweep", parents=[common], help="pobierz salda, zapisz historię, wyślij raport")
+    sp.add_argument("--daemon", action="store_true", help="działaj w tle zamiast jednorazowego uruchomienia")
+    sp.add_argument("--subscribe", action="store_true",
+                    help="jak --daemon, ale salda z subskrypcji WebSocket noda zamiast sweepów "
+                         "(NODE_WS_URL; wymaga pakietu websockets)")
+    sp.add_argument("--sweep-every", type=float, default=None,
+                    help="co ile sekund pobierać salda (daemon; SWEEP_INTERVAL, domyślnie wg układu)")
+    sp.add_argument("--report-every", type=float, default=None,
+                    help="co ile sekund wysyłać raport na Discorda (daemon; REPORT_INTERVAL)")
+    sp.add_argument("--metrics-port", type=int, default=None,
+                    help="port endpointu Prometheusa /metrics (daemon, 0 = wyłączony)")
+    sp.add_argument("--metrics-textfile", default=None,
+                    help="plik .prom dla textfile collectora node_exportera")
+    sp.add_argument("--no-report", action="store_true", help="tylko pomiar i historia, bez raportu")
+    sp.add_argument("--no-resume", action="store_true",
+                    help="nie wznawiaj przerwanego sweepa – wyrzuć checkpoint i pytaj o wszystkie adresy")
+    sp.add_argument("--dry-run", action="store_true", help="raport na stdout zamiast na Discorda")
+
+    rp = sub.add_parser("report", parents=[common], help="raport z ostatniego pomiaru w historii (bez Telegrama)")
+    rp.add_argument("--dry-run", action="store_true", help="raport na stdout zamiast na Discorda")
+
+    hp = sub.add_parser("history", parents=[common],
+                        help="podsumowanie historii albo przebieg salda noda i jego okna WINDOWS")
+    hp.add_argument("node", nargs="?", default="", help="nazwa noda albo q-adres")
+    hp.add_argument("--hours", type=float, default=24, help="ile godzin wstecz (0 = całość)")
+
+    sub.add_parser("health", parents=[common], help="stan nodów i minerów z hosts.txt (bez sald)")
+    sub.add_parser("inventory", parents=[common],
+                   help="sprawdź pliki z nodami (format i checksum adresów, duplikaty) bez sieci")
+
+    return ap.parse_args(argv)
+
+
+def _apply_defaults(args, cfg: Settings, layout):
+    """Domyślne z env (.env jest już wczytany) i z układu."""
+    if args.command != "sweep":
+        args.metrics_textfile = ""
+        return
+    if args.sweep_every is None:
+        args.sweep_every = float(cfg.sweep_interval or layout.SWEEP_EVERY)
+    if args.report_every is None:
+        args.report_every = float(cfg.report_interval or layout.REPORT_EVERY)
+    if args.metrics_port is None:
+        args.metrics_port = cfg.metrics_port
+    if args.metrics_textfile is None:
+        args.metrics_textfile = cfg.metrics_textfile
+
+
+# ----------------- MAIN -----------------
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.profile:
+        profiling.enable(cpu=args.profile_cpu, t0=_T_IMPORTS)
+        profiling.record("imports", _T_IMPORTS, _T_IMPORTED)
+    with profiling.stage("load_dotenv"):
+        load_dotenv()
+    cfg = Settings()
+    # tabele rich ma tylko sweep; report/history piszą zwykły tekst
+    output.setup(headless=args.headless or cfg.headless or args.command != "sweep")
+    layout = load_layout(args.layout or cfg.layout)
+    _apply_defaults(args, cfg, layout)
+
+    try:
+        return COMMANDS[args.command](args, cfg, layout)
+    finally:
+        from .discord import flush_all
+
+        flush_all()
+        if args.metrics_textfile:
+            from . import metrics
+
+            metrics.write_textfile(args.metrics_textfile)
+        profiling.dump(args.profile)
+
@@ -0,0 +1,497 @@
+# -*- coding: utf-8 -*-
+"""
+Kolumnowa historia sald z warstwami rozdzielczości.
+
+  balances_history.col/meta.json   – lista adresów (kolejność = kolumny) + first_seen
+  balances_history.col/raw.f64     – każdy pomiar (np. co 5 min)
+  balances_history.col/1h.f64      – ostatnia wartość z każdej godziny
+  balances_history.col/1d.f64      – ostatnia wartość z każdego dnia
+
+Plik warstwy to macierz float64 zapisana wierszami: [ts, v0, v1, ...],
+brak wartości = NaN. Salda są w jednostkach (plancki / ONE): do 2^51 plancków
+(~2251 QU) float_to_planck odtwarza je co do plancka, wyżej błąd to kilka
+plancków – daleko poniżej precyzji raportu. Pierwszy wiersz to nagłówek [MAGIC, szerokość, 0...],
+więc plik sam mówi, ile ma kolumn. Odczyt idzie przez mmap (bez kopiowania),
+zapis to dopisanie wiersza + fsync. Starsze dane nie są kasowane, tylko
+zwijane do grubszej warstwy (raw -> 1h -> 1d) całymi dniami. Rollup i
+poszerzenie pliku o nowe kolumny idą strumieniem z mmap (blok float64 /
+kawałki po CHUNK_ROWS wierszy), bez zamiany warstwy na listy Pythona.
+
+Interfejs odczytu (baseline / first_seen_ts) jest taki sam jak w TimeIndex,
+więc compute_deltas czyta stąd bezpośrednio. Okna kroczące (windows.py)
+są budowane raz z kolumn ostatnich wierszy i potem aktualizowane przy append.
+"""
+
+import json
+import math
+import mmap
+import os
+from array import array
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .windows import WindowEngine, Windows
+
+MAGIC = 20251223.0
+NAN = float("nan")
+
+CHUNK_ROWS = 4096       # poszerzanie pliku: tyle wierszy naraz w pamięci
+
+# (nazwa warstwy, długość kubełka w s) – od najdrobniejszej
+TIERS: Tuple[Tuple[str, int], ...] = (("raw", 0), ("1h", 3600), ("1d", 86400))
+
+
+class _Tier:
+    """Jedna warstwa: plik wierszy float64 czytany przez mmap."""
+
+    def __init__(self, path: Path, readonly: bool = False):
+        self.path = path
+        self.readonly = readonly
+        self.width = 0
+        self.rows = 0
+        self._mm = None
+        self._view = None
+        self.open()
+
+    # ----------------- PLIK -----------------
+    def open(self):
+        self.close()
+        self.width = 0
+        self.rows = 0
+        try:
+            size = self.path.stat().st_size
+        except OSError:
+            return
+        if size < 16:
+            return
+        with open(self.path, "rb") as f:
+            head = array("d")
+            head.frombytes(f.read(16))
+            if head[0] != MAGIC:
+                raise ValueError(f"{self.path}: to nie jest plik historii")
+            width = int(head[1])
+            row_bytes = 8 * width
+            rows = size // row_bytes - 1
+            if rows < 0:
+                if self.readonly:
+                    return
+                # przerwany pierwszy zapis: jest początek nagłówka, ale nie cały –
+                # plik od zera, a nagłówek dopisze następny append_rows
+                os.truncate(self.path, 0)
+                return
+            if size % row_bytes and not self.readonly:
+                # ucięty ostatni wiersz po przerwanym zapisie (tylko do odczytu: pomijamy go)
+                os.truncate(self.path, (rows + 1) * row_bytes)
+            self.width = width
+            self.rows = max(0, rows)
+            if self.rows:
+                self._mm = mmap.mmap(f.fileno(), (self.rows + 1) * row_bytes, access=mmap.ACCESS_READ)
+                self._view = memoryview(self._mm).cast("d")
+
+    def close(self):
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def _header(self, width: int) -> array:
+        h = array("d", [0.0]) * width
+        h[0] = MAGIC
+        h[1] = float(width)
+        return h
+
+    # ----------------- ODCZYT -----------------
+    def ts(self, row: int) -> float:
+        return self._view[(row + 1) * self.width]
+
+    def row(self, row: int) -> List[float]:
+        start = (row + 1) * self.width + 1
+        return self._view[start:start + self.width - 1].tolist()
+
+    def block(self, start: int, stop: int) -> array:
+        """Wiersze [start, stop) jako płaski blok float64 (kopia – przeżywa zamknięcie mmap)."""
+        w = self.width
+        out = array("d")
+        if stop > start:
+            out.frombytes(self._mm[8 * (start + 1) * w:8 * (stop + 1) * w])
+        return out
+
+    def bisect(self, target: float) -> int:
+        """Ostatni wiersz z ts <= target; -1 gdy brak."""
+        lo, hi = 0, self.rows
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.ts(mid) <= target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo - 1
+
+    # ----------------- ZAPIS -----------------
+    def append_rows(self, rows: List[List[float]], width: int):
+        if not rows:
+            return
+        buf = array("d")
+        for r in rows:
+            buf.extend(r)
+            if len(r) < width:
+                buf.extend(_nans(width - len(r)))
+        self.append_block(buf, width, width)
+
+    def append_block(self, block: array, block_width: int, width: int):
+        """Dopisuje płaski blok wierszy o szerokości `block_width` (węższe dopełnia NaN)."""
+        if not block:
+            return
+        if self.width and self.width != width:
+            self.widen(width)
+        if block_width < width:
+            block = _widen_block(block, block_width, width)
+        buf = array("d")
+        if not self.width:
+            buf.extend(self._header(width))
+        buf.extend(block)
+        self.close()
+        with open(self.path, "ab") as f:
+            f.write(buf.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self.open()
+
+    def widen(self, width: int):
+        """Nowe kolumny (NaN) – przepisanie pliku kawałkami po CHUNK_ROWS wierszy."""
+        self._replace(self._chunks(0, width), width)
+
+    def drop_before(self, start: int):
+        """Usuwa wiersze sprzed `start`; reszta idzie do nowego pliku kawałkami z mmap."""
+        if start >= self.rows:
+            self.close()
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+            self.open()
+            return
+        self._replace(self._chunks(start, self.width), self.width)
+
+    def _chunks(self, start: int, width: int) -> Iterator[array]:
+        """Wiersze od `start` po CHUNK_ROWS, poszerzone do `width`."""
+        for first in range(start, self.rows, CHUNK_ROWS):
+            yield _widen_block(self.block(first, min(first + CHUNK_ROWS, self.rows)), self.width, width)
+
+    def _replace(self, chunks: Iterable[array], width: int):
+        """Nagłówek + `chunks` do pliku tmp, potem replace."""
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(self._header(width).tobytes())
+            for chunk in chunks:
+                f.write(chunk.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self.close()
+        os.replace(tmp, self.path)
+        self.open()
+
+
+def _nans(n: int) -> array:
+    return array("d", [NAN]) * n
+
+
+def _widen_block(block: array, width: int, new_width: int) -> array:
+    """Płaski blok wierszy `width` -> `new_width` (NaN w nowych kolumnach)."""
+    if new_width <= width:
+        return block
+    pad = _nans(new_width - width)
+    out = array("d")
+    for start in range(0, len(block), width):
+        out.extend(block[start:start + width])
+        out.extend(pad)
+    return out
+
+
+def _downsample(block: array, width: int, bucket: int) -> array:
+    """Ostatnia znana wartość każdej kolumny w kubełku; ts = ts ostatniego pomiaru."""
+    out = array("d")
+    cur_key = None
+    base = 0
+    for start in range(0, len(block), width):
+        ts = block[start]
+        key = int(ts // bucket)
+        if key != cur_key:
+            base = len(out)
+            out.extend(block[start:start + width])
+            cur_key = key
+            continue
+        out[base] = ts
+        for i in range(1, width):
+            v = block[start + i]
+            if v == v:
+                out[base + i] = v
+    return out
+
+
+class ColumnarHistory:
+    def __init__(
+        self,
+        directory: str,
+        raw_retention: timedelta = timedelta(days=90),
+        hourly_retention: timedelta = timedelta(days=365),
+        daily_retention: Optional[timedelta] = None,
+        readonly: bool = False,
+    ):
+        """`readonly`: nic nie tworzy ani nie naprawia na dysku (np. `history` obok działającego daemona)."""
+        self.dir = Path(directory)
+        self.retentions = {"raw": raw_retention, "1h": hourly_retention, "1d": daily_retention}
+        if not readonly:
+            self.dir.mkdir(parents=True, exist_ok=True)
+        self.addresses: List[str] = []
+        self.first_seen: Dict[str, float] = {}
+        self._load_meta()
+        self.col = {a: i for i, a in enumerate(self.addresses)}
+        self.tiers = {name: _Tier(self.dir / f"{name}.f64", readonly) for name, _ in TIERS}
+        self._windows: Optional[WindowEngine] = None
+
+    # ----------------- META -----------------
+    def _load_meta(self):
+        try:
+            with open(self.dir / "meta.json", "r") as f:
+                meta = json.load(f)
+            self.addresses = list(meta.get("addresses", []))
+            self.first_seen = {k: float(v) for k, v in meta.get("first_seen", {}).items()}
+        except Exception:
+            self.addresses, self.first_seen = [], {}
+
+    def _save_meta(self):
+        tmp = self.dir / "meta.json.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"addresses": self.addresses, "first_seen": self.first_seen}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.dir / "meta.json")
+
+    @property
+    def width(self) -> int:
+        return 1 + len(self.addresses)
+
+    def close(self):
+        for t in self.tiers.values():
+            t.close()
+
+    def __len__(self) -> int:
+        return sum(t.rows for t in self.tiers.values())
+
+    def is_empty(self) -> bool:
+        return len(self) == 0
+
+    # ----------------- ZAPIS -----------------
+    def append(self, balances: Dict[str, float], ts: Optional[datetime] = None):
+        """Dopisuje pomiar do warstwy raw (nowe adresy = nowe kolumny)."""
+        if not balances:
+            return
+        ts_s = (ts or datetime.now()).timestamp()
+        new = [a for a in balances if a not in self.col]
+        if new:
+            # meta najpierw: plik warstwy nigdy nie ma więcej kolumn niż meta
+            for a in new:
+                self.col[a] = len(self.addresses)
+                self.addresses.append(a)
+                self.first_seen[a] = ts_s
+            self._save_meta()
+        row = [ts_s] + [NAN] * len(self.addresses)
+        for a, v in balances.items():
+            row[1 + self.col[a]] = float(v)
+        self.tiers["raw"].append_rows([row], self.width)
+        if self._windows is not None:
+            self._windows.append(ts_s, {a: float(v) for a, v in balances.items()})
+
+    def import_entries(self, entries: Iterable[dict]):
+        """Jednorazowy import pomiarów w starym formacie {"ts", "balances"}."""
+        parsed = []
+        for e in entries:
+            try:
+                parsed.append((datetime.fromisoformat(e["ts"]), e.get("balances", {})))
+            except (KeyError, TypeError, ValueError):
+                continue
+        parsed.sort(key=lambda x: x[0])
+        rows = []
+        for dt, bal in parsed:
+            ts_s = dt.timestamp()
+            for a in bal:
+                if a not in self.col:
+                    self.col[a] = len(self.addresses)
+                    self.addresses.append(a)
+                    self.first_seen[a] = ts_s
+            row = [ts_s] + [NAN] * len(self.addresses)
+            for a, v in bal.items():
+                row[1 + self.col[a]] = float(v)
+            rows.append(row)
+        if rows:
+            self._save_meta()
+            self.tiers["raw"].append_rows(rows, self.width)
+            self._windows = None
+
+    def rollup(self, now: Optional[datetime] = None):
+        """
+        Zwija dane starsze niż retencja warstwy do następnej warstwy.
+        Granica jest wyrównana do pełnego dnia, więc plik przepisujemy
+        najwyżej raz na dobę.
+        """
+        now = now or datetime.now()
+        names = [name for name, _ in TIERS]
+        for i, name in enumerate(names):
+            retention = self.retentions.get(name)
+            tier = self.tiers[name]
+            if retention is None or not tier.rows:
+                continue
+            cutoff = (now - retention).replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+            if tier.ts(0) >= cutoff:
+                continue
+            split = tier.bisect(cutoff - 1e-6) + 1
+            if i + 1 < len(names):
+                nxt = names[i + 1]
+                old = _downsample(tier.block(0, split), tier.width, TIERS[i + 1][1])
+                self.tiers[nxt].append_block(old, tier.width, self.width)
+            tier.drop_before(split)
+
+    # ----------------- ODCZYT -----------------
+    def _ordered_tiers(self):
+        """Od najnowszej do najstarszej: raw, 1h, 1d."""
+        return [self.tiers[name] for name, _ in TIERS]
+
+    def baseline(self, target: float) -> Dict[str, float]:
+        """
+        Ostatnie znane saldo każdego adresu z ts <= target (epoch s).
+        Wiersze bywają rzadkie (adaptive polling, subskrypcja zapisuje tylko
+        zmienione konta), więc brakujące kolumny bierzemy z wcześniejszych
+        wierszy; przy pełnych wierszach kończy się na pierwszym.
+        """
+        wanted = sum(1 for a in self.addresses if self.first_seen.get(a, math.inf) <= target)
+        out: Dict[str, float] = {}
+        for tier in self._ordered_tiers():
+            if len(out) >= wanted:
+                break
+            if not tier.rows or tier.ts(0) > target:
+                continue
+            w = tier.width
+            view = tier._view
+            pos = tier.bisect(target)
+            while pos >= 0 and len(out) < wanted:
+                base = (pos + 1) * w + 1
+                for c in range(w - 1):
+                    v = view[base + c]
+                    if v == v:
+                        out.setdefault(self.addresses[c], v)
+                pos -= 1
+        return out
+
+    def rows(self, since: float = -math.inf) -> Iterator[Tuple[float, Dict[str, float]]]:
+        """(ts, adres -> saldo) dla wierszy z ts > since – od najstarszej warstwy do raw, bez NaN."""
+        for tier in reversed(self._ordered_tiers()):
+            if not tier.rows or tier.ts(tier.rows - 1) <= since:
+                continue
+            w = tier.width
+            view = tier._view
+            for r in range(tier.bisect(since) + 1, tier.rows):
+                base = (r + 1) * w
+                yield view[base], {
+                    self.addresses[c]: v for c, v in enumerate(view[base + 1:base + w].tolist()) if v == v
+                }
+
+    def matrix(self, since: float, np=None):
+        """
+        (ts, macierz [wiersz][kolumna]) dla analytics.py: pierwszy wiersz to stan
+        na `since` (baseline), potem wiersze z ts > since; kolumny jak
+        self.addresses, NaN = brak pomiaru. Z `np` tablice numpy cięte wprost
+        z mmap warstw (jedna kopia przy sklejaniu), bez – listy.
+        """
+        base = self.baseline(since)
+        head = [NAN] * len(self.addresses)
+        for a, v in base.items():
+            head[self.col[a]] = v
+        if np is None:
+            ts, rows = [since], [head]
+            for t, bal in self.rows(since):
+                row = [NAN] * len(self.addresses)
+                for a, v in bal.items():
+                    row[self.col[a]] = v
+                ts.append(t)
+                rows.append(row)
+            return ts, rows
+        parts = [np.array([[since] + head], dtype=np.float64)]
+        for tier in reversed(self._ordered_tiers()):
+            if not tier.rows or tier.ts(tier.rows - 1) <= since:
+                continue
+            first = tier.bisect(since) + 1
+            block = np.frombuffer(tier._view, dtype=np.float64).reshape(tier.rows + 1, tier.width)[first + 1:]
+            if tier.width < self.width:
+                block = np.hstack([block, np.full((len(block), self.width - tier.width), np.nan)])
+            parts.append(block)
+        out = np.concatenate(parts)
+        return out[:, 0], out[:, 1:]
+
+    def columns(self, since: float) -> Tuple[List[float], List[List[float]]]:
+        """
+        To samo co matrix(since) bez numpy, ale kolumnami: ts i lista sald
+        każdego adresu, wycinane z mmap krokiem szerokości wiersza.
+        """
+        base = self.baseline(since)
+        ts = [since]
+        cols = [[base.get(a, NAN)] for a in self.addresses]
+        for tier in reversed(self._ordered_tiers()):
+            if not tier.rows or tier.ts(tier.rows - 1) <= since:
+                continue
+            w = tier.width
+            first = tier.bisect(since) + 1
+            lo, hi = (first + 1) * w, (tier.rows + 1) * w
+            ts.extend(tier._view[lo:hi:w].tolist())
+            for c, col in enumerate(cols):
+                if c + 1 < w:
+                    col.extend(tier._view[lo + 1 + c:hi:w].tolist())
+                else:
+                    col.extend(_nans(tier.rows - first))
+        return ts, cols
+
+    def windows(self, windows: Windows, end: float) -> WindowEngine:
+        """
+        Okna kroczące dla zapytań z końcem >= `end` - zbudowane raz (stan na
+        początku najdłuższego okna + późniejsze wiersze), potem aktualizowane
+        przez append. Przebudowa tylko przy innych oknach albo starszym `end`.
+        """
+        start = end - max(mins for _label, mins in windows) * 60
+        engine = self._windows
+        if engine is None or engine.windows != list(windows) or engine.start > start:
+            ts, cols = self.columns(start)
+            engine = self._windows = WindowEngine.from_columns(windows, start, ts, zip(self.addresses, cols))
+        return engine
+
+    def first_seen_ts(self, addr: str) -> Optional[float]:
+        return self.first_seen.get(addr)
+
+    def latest(self) -> Dict[str, float]:
+        """Ostatnie znane saldo każdego adresu."""
+        return self.baseline(math.inf)
+
+    def latest_ts(self) -> Optional[float]:
+        for tier in self._ordered_tiers():
+            if tier.rows:
+                return tier.ts(tier.rows - 1)
+        return None
+
+    def series(self, addr: str, since: float = -math.inf) -> List[Tuple[float, float]]:
+        """(ts, saldo) dla adresu – od najstarszej warstwy do raw."""
+        c = self.col.get(addr)
+        if c is None:
+            return []
+        out = []
+        for tier in reversed(self._ordered_tiers()):
+            if not tier.rows or c + 1 >= tier.width:
+                continue
+            w = tier.width
+            start = max(0, tier.bisect(since - 1e-6) + 1) if since != -math.inf else 0
+            for r in range(start, tier.rows):
+                v = tier._view[(r + 1) * w + 1 + c]
+                if v == v:
+                    out.append((tier.ts(r), v))
+        return out
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Tryb --daemon: jeden proces, jedno połączenie z Telegramem, zadania
+(sweep sald, raport na Discorda) odpalane co zadany interwał.
+"""
+
+import asyncio
+import signal
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+Job = Tuple[str, float, Callable[[], Awaitable[None]]]
+
+
+async def ensure_connected(client, max_delay: float = 300.0, log=None):
+    """Łączy ponownie, jeśli połączenie padło (backoff 1s, 2s, 4s ... max_delay)."""
+    if client is None or client.is_connected():
+        return
+    delay = 1.0
+    while True:
+        try:
+            await client.connect()
+            if log:
+                log("Telegram: połączono ponownie")
+            return
+        except (OSError, ConnectionError, asyncio.TimeoutError) as e:
+            if log:
+                log(f"Telegram: brak połączenia ({e}), ponowna próba za {delay:.0f}s")
+            await asyncio.sleep(delay)
+            delay = min(max_delay, delay * 2)
+
+
+def install_stop_handlers(stop: asyncio.Event):
+    """SIGINT/SIGTERM kończą pętlę po bieżącym zadaniu."""
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+
+
+async def run_jobs(jobs: List[Job], stop: Optional[asyncio.Event] = None, on_error=None):
+    """
+    Prosty scheduler: każde zadanie (nazwa, interwał w s, korutyna) startuje
+    od razu, potem co `interwał`. Zadania idą po kolei, nigdy równolegle,
+    więc raport nie wejdzie w środek sweepa.
+    """
+    stop = stop or asyncio.Event()
+    next_run = {name: time.monotonic() for name, _interval, _fn in jobs}
+
+    while not stop.is_set():
+        now = time.monotonic()
+        for name, interval, fn in jobs:
+            if stop.is_set() or next_run[name] > now:
+                continue
+            try:
+                await fn()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if on_error:
+                    on_error(name, e)
+            # bez "doganiania" zaległych uruchomień po długim sweepie
+            next_run[name] = max(next_run[name] + interval, time.monotonic())
+
+        wait = max(0.0, min(next_run.values()) - time.monotonic())
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=wait)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+"""
+Wysyłka na Discorda (webhook).
+
+- jedna sesja HTTP na webhook (keep-alive), timeout na każdym POST,
+- 429: czekamy tyle, ile każe Retry-After / retry_after i ponawiamy,
+  X-RateLimit-Remaining == 0: czekamy X-RateLimit-Reset-After przed kolejną wiadomością,
+- wysyłka w osobnym wątku – wolny webhook nie blokuje sweepa,
+- pakowanie wielu grup do jednej wiadomości (limit 2000 znaków)
+  i bezpieczne dzielenie zbyt długich tabel (bloki ``` są domykane/otwierane),
+- DISCORD_EDIT=1: raport "w miejscu" – każda grupa (slot) ma swoją wiadomość,
+  edytowaną przez PATCH /messages/{id}; slot bez zmian nie idzie wcale
+  (MessageBoard pamięta id wiadomości i klucz treści w pliku). Gdy raport
+  się skurczy (mniej grup, krótsza tabela), nadmiarowe wiadomości są kasowane.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+from . import metrics
+
+DISCORD_LIMIT = 2000
+FENCE = "```"
+
+
+# ----------------- PAKOWANIE -----------------
+def split_block(text: str, limit: int = DISCORD_LIMIT) -> List[str]:
+    """Dzieli tekst po liniach na kawałki <= limit, nie rozrywając bloków ```."""
+    if len(text) <= limit:
+        return [text]
+
+    closing = len(FENCE) + 1
+    room = limit - 2 * closing      # linia musi się zmieścić między ``` a ```
+    lines: List[str] = []
+    for line in text.split("\n"):
+        while len(line) > room:
+            lines.append(line[:room])
+            line = line[room:]
+        lines.append(line)
+
+    chunks: List[str] = []
+    cur: List[str] = []
+    cur_len = 0
+    in_code = False
+    for line in lines:
+        is_fence = line.strip().startswith(FENCE)
+        after = in_code != is_fence
+        add = len(line) + (1 if cur else 0)
+        if cur and cur_len + add + (closing if after else 0) > limit:
+            if in_code:
+                cur.append(FENCE)
+            chunks.append("\n".join(cur))
+            cur = [FENCE] if in_code else []
+            cur_len = len(FENCE) if in_code else 0
+            add = len(line) + (1 if cur else 0)
+        cur.append(line)
+        cur_len += add
+        in_code = after
+
+    if cur:
+        chunks.append("\n".join(cur))
+    return chunks
+
+
+def pack_messages(blocks: List[str], header: str = "", limit: int = DISCORD_LIMIT) -> List[str]:
+    """
+    Skleja bloki (np. tabele grup) w jak najmniej wiadomości <= limit.
+    `header` trafia na początek każdej wiadomości.
+    """
+    budget = limit - (len(header) + 1 if header else 0)
+    messages: List[str] = []
+    cur = ""
+    for block in blocks:
+        for piece in split_block(block, budget):
+            if cur and len(cur) + 1 + len(piece) <= budget:
+                cur += "\n" + piece
+            else:
+                if cur:
+                    messages.append(cur)
+                cur = piece
+    if cur:
+        messages.append(cur)
+    return [f"{header}\n{m}" if header else m for m in messages]
+
+
+# ----------------- RAPORT W MIEJSCU -----------------
+Slot = Tuple[str, str, str]     # (slot, klucz treści, wiadomość)
+
+
+class RenderCache:
+    """Klucz treści grupy -> wyrenderowany blok (LRU) – grupa bez zmian nie jest renderowana."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._blocks: "OrderedDict[str, str]" = OrderedDict()
+
+    def get(self, key: str, render: Callable[[], str]) -> str:
+        block = self._blocks.get(key)
+        if block is None:
+            block = self._blocks[key] = render()
+            while len(self._blocks) > self.maxsize:
+                self._blocks.popitem(last=False)
+        else:
+            self._blocks.move_to_end(key)
+        return block
+
+
+class MessageBoard:
+    """
+    Slot -> {"id": id wiadomości, "key": klucz treści} w pliku JSON (tmp + os.replace).
+    Z niego wiadomo, którą wiadomość edytować i czy slot w ogóle się zmienił.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r") as f:
+                self.slots: Dict[str, dict] = json.load(f)
+        except Exception:
+            self.slots = {}
+
+    def changed(self, slots: List[Slot]) -> List[Slot]:
+        """Tylko sloty, których klucz różni się od ostatnio wysłanego."""
+        with self._lock:
+            return [s for s in slots if self.slots.get(s[0], {}).get("key") != s[1]]
+
+    def message_id(self, slot: str) -> Optional[str]:
+        with self._lock:
+            return self.slots.get(slot, {}).get("id")
+
+    def surplus(self, slots: List[Slot]) -> List[str]:
+        """Sloty z poprzednich raportów, których w tym raporcie już nie ma."""
+        current = {s[0] for s in slots}
+        with self._lock:
+            return [slot for slot in self.slots if slot not in current]
+
+    def record(self, slot: str, message_id: str, key: str):
+        with self._lock:
+            self.slots[slot] = {"id": message_id, "key": key}
+            self._save()
+
+    def forget(self, slot: str):
+        with self._lock:
+            if self.slots.pop(slot, None) is not None:
+                self._save()
+
+    def _save(self):
+        tmp = self.path.with_name(self.path.name + f".{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.slots, f)
+        os.replace(tmp, self.path)
+
+
+_BOARDS: Dict[str, MessageBoard] = {}
+
+
+def get_board(path: str) -> MessageBoard:
+    board = _BOARDS.get(path)
+    if board is None:
+        board = _BOARDS[path] = MessageBoard(path)
+    return board
+
+
+# ----------------- WYSYŁKA -----------------
+class DiscordWebhook:
+    def __init__(self, url: str, timeout: float = 10.0, max_retries: int = 5, log: Optional[Callable] = None):
+        self.url = url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.log = log or (lambda _msg: None)
+        import requests     # dopiero tu – pack_messages (render raportu) go nie potrzebuje
+
+        self.session = requests.Session()
+        self._not_before = 0.0
+        self._queue: "queue.Queue[Optional[Callable[[], bool]]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _respect_bucket(self, r):
+        """Jeśli wyczerpaliśmy bucket, następna wiadomość poczeka do resetu."""
+        if r.headers.get("X-RateLimit-Remaining") == "0":
+            try:
+                reset_after = float(r.headers.get("X-RateLimit-Reset-After", "0"))
+            except ValueError:
+                reset_after = 0.0
+            self._not_before = time.monotonic() + reset_after
+
+    @staticmethod
+    def _retry_after(r) -> float:
+        try:
+            return float(r.json().get("retry_after"))
+        except Exception:
+            pass
+        try:
+            return float(r.headers.get("Retry-After", "1"))
+        except ValueError:
+            return 1.0
+
+    def _message_url(self, message_id: str) -> str:
+        """URL webhooka + /messages/{id} (query, np. ?thread_id=, zostaje)."""
+        u = urlsplit(self.url)
+        return urlunsplit(u._replace(path=u.path.rstrip("/") + f"/messages/{message_id}"))
+
+    def _request(self, method: str, url: str, content: Optional[str], params: Optional[dict] = None,
+                 missing_ok: bool = False):
+        """
+        Żądanie z obsługą 429 i 5xx; zwraca odpowiedź 2xx (albo 404 przy
+        `missing_ok`) lub None, gdy wiadomość przepadła. `content` None = bez treści (DELETE).
+        """
+        body = None if content is None else {"content": content}
+        import requests
+
+        for attempt in range(self.max_retries + 1):
+            wait = self._not_before - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            t0 = time.perf_counter()
+            try:
+                r = self.session.request(method, url, params=params, json=body, timeout=self.timeout)
+            except requests.RequestException as e:
+                metrics.DISCORD_RESPONSES.inc(status="error")
+                self.log(f"[red]Błąd wysyłki Discord: {e}[/red]")
+                time.sleep(min(30.0, 2 ** attempt))
+                continue
+            finally:
+                metrics.DISCORD_POST_SECONDS.observe(time.perf_counter() - t0)
+
+            metrics.DISCORD_RESPONSES.inc(status=r.status_code)
+            self._respect_bucket(r)
+            if 200 <= r.status_code < 300 or (missing_ok and r.status_code == 404):
+                return r
+            if r.status_code == 429:
+                wait = self._retry_after(r)
+                self.log(f"[yellow]Discord 429 – czekam {wait:.1f}s[/yellow]")
+                time.sleep(wait)
+                continue
+            if r.status_code >= 500:
+                time.sleep(min(30.0, 2 ** attempt))
+                continue
+            self.log(f"[red]Discord error: {r.status_code}[/red]")
+            return None
+        self.log("[red]Discord: wiadomość porzucona po ponowieniach[/red]")
+        return None
+
+    def post(self, content: str) -> bool:
+        """Synchroniczny POST; True = dostarczone."""
+        return self._request("POST", self.url, content) is not None
+
+    def upsert(self, board: MessageBoard, slot: str, key: str, content: str) -> bool:
+        """
+        Edytuje wiadomość slotu (PATCH); bez zapisanego id albo gdy wiadomość
+        skasowano (404) – nowa wiadomość (POST ?wait=true zwraca jej id).
+        """
+        message_id = board.message_id(slot)
+        if message_id:
+            r = self._request("PATCH", self._message_url(message_id), content, missing_ok=True)
+            if r is None:
+                return False
+            if r.status_code != 404:
+                metrics.DISCORD_EDITS.inc()
+                board.record(slot, message_id, key)
+                return True
+        r = self._request("POST", self.url, content, params={"wait": "true"})
+        if r is None:
+            return False
+        try:
+            message_id = str(r.json()["id"])
+        except Exception:
+            self.log("[yellow]Discord: brak id wiadomości – slot będzie wysłany od nowa[/yellow]")
+            return True
+        board.record(slot, message_id, key)
+        return True
+
+    def delete_slot(self, board: MessageBoard, slot: str) -> bool:
+        """Kasuje wiadomość slotu (już skasowana = 404 też się liczy) i zapomina slot."""
+        message_id = board.message_id(slot)
+        if message_id:
+            r = self._request("DELETE", self._message_url(message_id), None, missing_ok=True)
+            if r is None:
+                return False
+            metrics.DISCORD_DELETES.inc()
+        board.forget(slot)
+        return True
+
+    # ----------------- ASYNC -----------------
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    return
+                job()
+            except Exception as e:
+                # np. brak miejsca na plik stanu – wątek musi obsłużyć resztę kolejki
+                self.log(f"[red]Discord: {e}[/red]")
+            finally:
+                self._queue.task_done()
+
+    def _enqueue(self, job: Callable[[], bool]):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="discord-webhook", daemon=True)
+                self._worker.start()
+        self._queue.put(job)
+
+    def submit(self, content: str):
+        """Wrzuca wiadomość do kolejki; wysyła wątek w tle, w kolejności wrzucania."""
+        self._enqueue(partial(self.post, content))
+
+    def submit_slot(self, board: MessageBoard, slot: str, key: str, content: str):
+        """Jak submit(), ale edytuje wiadomość slotu zamiast wysyłać nową."""
+        self._enqueue(partial(self.upsert, board, slot, key, content))
+
+    def submit_delete(self, board: MessageBoard, slot: str):
+        """Kasowanie nadmiarowego slotu – w tej samej kolejce, po edycjach."""
+        self._enqueue(partial(self.delete_slot, board, slot))
+
+    def flush(self):
+        """Czeka, aż kolejka się opróżni."""
+        self._queue.join()
+
+    def close(self):
+        with self._lock:
+            worker = self._worker
+            self._worker = None
+        if worker is not None and worker.is_alive():
+            self._queue.put(None)
+            worker.join()
+        self.session.close()
+
+
+_WEBHOOKS: Dict[str, DiscordWebhook] = {}
+
+
+def get_webhook(url: str, log: Optional[Callable] = None) -> DiscordWebhook:
+    hook = _WEBHOOKS.get(url)
+    if hook is None:
+        hook = _WEBHOOKS[url] = DiscordWebhook(url, log=log)
+    return hook
+
+
+def flush_all():
+    """Na koniec jednorazowego uruchomienia – dowieź wszystko z kolejek."""
+    for hook in list(_WEBHOOKS.values()):
+        hook.flush()
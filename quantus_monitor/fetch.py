@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Pobieranie sald wspólne dla obu układów raportu: cache -> node (RPC) -> bot.
+
+telethon (bot.py, peers.py) i requests (rpc.py) importujemy dopiero, gdy
+są potrzebne – `report`/`history` i sam start CLI ich nie ładują.
+"""
+
+import asyncio
+import math
+import time
+from typing import List, Optional, Tuple
+
+from . import metrics, output, profiling
+from .balance import ERROR, FLOOD, TIMEOUT, Balance, looks_like_placeholder, parse_q_amount
+from .checkpoint import SweepCheckpoint
+from .inventory import Groups, Pairs
+from .latency import tracker_for
+from .pipeline import Shard, fetch_pipelined
+from .ratelimit import limiter_for
+from .resultcache import BalanceCache
+from .settings import Settings
+
+
+def parse_bot_reply(text: str) -> Optional[Tuple[int, str]]:
+    """(plancki, jednostka) z odpowiedzi bota albo None dla echa/placeholdera."""
+    if looks_like_placeholder(text):
+        return None
+    return parse_q_amount(text)
+
+
+async def ask_bot_for_balance(client, cfg: Settings, address: str, limiter=None, fallback: bool = False) -> Balance:
+    """
+    Wysyła /balance <address> i czeka na odpowiedź bota (event NewMessage).
+    Timeout i hedge biorą się z rozkładu czasów odpowiedzi tego połączenia (latency.py).
+    `fallback`: po timeoucie jednorazowo przegląda ostatnie wiadomości
+    (gdyby event nie dotarł, np. przy reconnect).
+    """
+    from telethon.errors.rpcerrorlist import FloodWaitError
+
+    from .bot import ReplyDispatcher
+
+    cmd = cfg.cmd_template.format(address)
+    debug_log = output.console().log if cfg.debug else None
+    tracker = tracker_for(client, cfg.reply_timeout, cfg.reply_timeout_min)
+    t0 = time.perf_counter()
+    result = "error"
+
+    try:
+        dispatcher = await ReplyDispatcher.attach(client, cfg.bot_username, parse_bot_reply, debug_log)
+        if limiter:
+            await limiter.acquire()
+        timeout = tracker.timeout()
+        metrics.REPLY_TIMEOUT_SECONDS.set(timeout)
+        t_sent = time.perf_counter()
+        got = await dispatcher.ask(
+            cmd, address, timeout,
+            hedge_after=tracker.hedge_after() if cfg.hedge else None,
+            before_hedge=limiter.acquire if limiter else None,
+        )
+        # brak odpowiedzi to próbka równa timeoutowi – wolniejący bot podnosi timeout
+        tracker.observe(time.perf_counter() - t_sent if got else timeout)
+        if limiter:
+            limiter.on_success()
+        if got:
+            result = "ok"
+            return Balance(address, *got)
+
+        if fallback:
+            msgs = await client.get_messages(dispatcher.entity, limit=30)
+            msgs = [m for m in msgs if m.sender_id == dispatcher.peer_id and address in (m.message or "")]
+            msgs.sort(key=lambda x: x.id, reverse=True)
+            for m in msgs:
+                got = parse_bot_reply((m.message or "").strip())
+                if got:
+                    result = "fallback"
+                    return Balance(address, *got)
+
+        result = "timeout"
+        metrics.REPLY_TIMEOUTS.inc(address=address)
+        return Balance.failed(address, TIMEOUT)
+
+    except FloodWaitError as e:
+        result = "floodwait"
+        wait_s = int(getattr(e, "seconds", 10))
+        metrics.FLOODWAIT_SECONDS.inc(wait_s)
+        output.console().print(f"[yellow]FloodWait – pauza {wait_s}s[/yellow]")
+        if limiter:
+            limiter.on_flood_wait(wait_s)
+        else:
+            await asyncio.sleep(wait_s)
+        return Balance.failed(address, FLOOD)
+
+    except Exception as e:
+        if cfg.debug:
+            output.console().log(f"ERROR ask_bot_for_balance: {e}")
+        return Balance.failed(address, ERROR)
+
+    finally:
+        metrics.BOT_REPLY_SECONDS.observe(time.perf_counter() - t0, result=result)
+
+
+async def fetch_groups(clients: list, groups: Groups, cfg: Settings, fallback: bool = False,
+                       checkpoint: Optional[SweepCheckpoint] = None):
+    """
+    Wszystkie grupy naraz: najpierw cache i node (RPC), reszta przez bota.
+    Każda sesja z `clients` to osobny shard z własnym limiterem.
+    `checkpoint`: wyniki przerwanego sweepa nie są pytane ponownie, a nowe
+    trafiają tam od razu – zapis do historii zostaje po stronie układu.
+    """
+    addrs = list(dict.fromkeys(addr for _owner, pairs in groups for _label, addr in pairs))
+
+    # świeże wyniki (także z drugiego układu / procesu) nie idą ani do noda, ani do bota
+    cache = BalanceCache(cfg.balance_cache_path, cfg.balance_cache_ttl)
+    known = cache.get_fresh(addrs)
+
+    if checkpoint is not None:
+        wanted = set(addrs)
+        resumed = {a: b for a, b in checkpoint.load().items() if a in wanted and a not in known}
+        if resumed:
+            output.console().print(f"[cyan]Wznawiam przerwany sweep: {len(resumed)}/{len(addrs)} adresów "
+                                   f"z {checkpoint.path}[/cyan]")
+            known.update(resumed)
+    rest = [a for a in addrs if a not in known]
+
+    if rest and cfg.use_rpc:
+        from .rpc import fetch_balances_rpc
+
+        with profiling.stage("rpc"):
+            from_node = await fetch_balances_rpc(cfg.node_rpc_url, rest, cfg.token_decimals)
+        known.update(from_node)
+        if checkpoint is not None:
+            checkpoint.record(from_node)
+
+    # --profile: adres liczony w pierwszej grupie, w której występuje
+    owner_of = {}
+    for owner, pairs in groups:
+        for _label, addr in pairs:
+            owner_of.setdefault(addr, owner)
+
+    shards: List[Shard] = []
+    if cfg.use_bot:
+        # DELAY_BETWEEN <= 0: tempo bez limitu, zostaje tylko pauza po FloodWait
+        rate = 1 / cfg.delay_between if cfg.delay_between > 0 else math.inf
+        for client in clients:
+            limiter = limiter_for(client, rate, cfg.burst)
+
+            async def ask(addr: str, client=client, limiter=limiter) -> Balance:
+                with profiling.stage(owner_of.get(addr, ""), addr):
+                    return await ask_bot_for_balance(client, cfg, addr, limiter, fallback)
+
+            shards.append(Shard(ask, limiter))
+
+    on_result = (lambda addr, bal: checkpoint.record({addr: bal})) if checkpoint is not None else None
+    groups_with_rows = await fetch_pipelined(
+        groups, shards or None, cfg.max_in_flight, known=known,
+        missing=lambda addr: Balance.failed(addr, ERROR),
+        retry=lambda bal: bal.status == FLOOD,
+        on_result=on_result,
+    )
+    if shards and cfg.retry_rounds > 0:
+        with profiling.stage("retry"):
+            groups_with_rows = await _retry_failed(groups_with_rows, shards, cfg, on_result)
+    cache.update({addr: bal for _owner, rows in groups_with_rows for _label, addr, bal in rows})
+    return groups_with_rows
+
+
+async def _retry_failed(groups_with_rows, shards: List[Shard], cfg: Settings, on_result=None):
+    """
+    Nieudane adresy (timeout, błąd, FloodWait ponad limit prób) jeszcze raz na
+    końcu sweepa, po pauzie RETRY_BACKOFF s (potem ×2) – dopiero potem "unknown".
+    """
+    delay = cfg.retry_backoff
+    for _round in range(cfg.retry_rounds):
+        failed = list(dict.fromkeys(
+            (label, addr) for _owner, rows in groups_with_rows for label, addr, bal in rows if not bal.ok
+        ))
+        if not failed:
+            break
+        output.console().print(f"[yellow]Ponawiam {len(failed)} nieudanych adresów za {delay:.0f}s[/yellow]")
+        metrics.RETRY_ROUNDS.inc()
+        await asyncio.sleep(delay)
+        ((_, rows),) = await fetch_pipelined(
+            [("", failed)], shards, cfg.max_in_flight,
+            missing=lambda addr: Balance.failed(addr, ERROR),
+            retry=lambda bal: bal.status == FLOOD,
+            on_result=on_result,
+        )
+        got = {addr: bal for _label, addr, bal in rows}
+        groups_with_rows = [
+            (owner, [(label, addr, got.get(addr, bal)) for label, addr, bal in rows])
+            for owner, rows in groups_with_rows
+        ]
+        delay *= 2
+    return groups_with_rows
+
+
+async def fetch_balances(client, pairs: Pairs, cfg: Settings):
+    groups_with_rows = await fetch_groups([client], [("", pairs)], cfg)
+    return groups_with_rows[0][1]
+
+
+# ----------------- SESJE -----------------
+async def login(client, phone: str):
+    from telethon.errors.rpcerrorlist import SessionPasswordNeededError
+
+    await client.connect()
+    if not await client.is_user_authorized():
+        await client.send_code_request(phone)
+        code = input("Kod z Telegrama: ")
+        try:
+            await client.sign_in(phone=phone, code=code)
+        except SessionPasswordNeededError:
+            pw = input("Hasło 2FA: ")
+            await client.sign_in(password=pw)
+
+
+async def open_clients(cfg: Settings, sessions: List[Tuple[str, str]], clients: list):
+    """
+    Loguje każdą sesję i dopisuje klienta do `clients` (lista od wołającego,
+    żeby finally rozłączył też te zalogowane przed błędem).
+    """
+    from telethon import TelegramClient
+
+    for session_name, phone in sessions:
+        client = TelegramClient(session_name, cfg.api_id, cfg.api_hash)
+        clients.append(client)
+        with profiling.stage(f"login:{session_name}"):
+            await login(client, phone)
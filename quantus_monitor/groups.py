@@ -0,0 +1,491 @@
+# -*- coding: utf-8 -*-
+"""
+Układ "groups" (dawny quantus_balance_tg.py): pliki nodes*.txt, jeden na
+właściciela, historia kolumnowa, delty w oknach WINDOWS (domyślnie 12h / 24h)
+i alerty zarobku (analytics.py) pod tabelami.
+"""
+
+import hashlib
+import re
+from datetime import datetime, timedelta
+from glob import glob
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from . import analytics, inventory, metrics, output, profiling
+from .adaptive import plan_polls
+from .balance import ERROR, ONE, UNKNOWN, Balance, float_to_planck, format_fixed
+from .checkpoint import SweepCheckpoint
+from .columnar import NAN, TIERS, ColumnarHistory
+from .discord import RenderCache, Slot, pack_messages
+from .health import OK as HEALTHY
+from .history import HistoryStore
+from .inventory import Groups, Inventory
+from .settings import Settings
+from .timeindex import TimeIndex
+from .windows import Windows, WindowStats
+
+SWEEP_EVERY = 600
+REPORT_EVERY = 3600
+
+HISTORY_COL_DIR = "balances_history.col"    # historia kolumnowa (raw -> 1h -> 1d)
+HISTORY_DIR    = "balances_history.d"       # segmenty JSONL – importowane przy pierwszym starcie
+HISTORY_PATH   = "balances_history.json"    # stary format – j.w.
+CHECKPOINT_PATH = "balances_sweep.jsonl"    # wyniki bieżącego sweepa (wznawianie po przerwaniu)
+
+# Domyślne okna czasowe (etykieta, minuty); WINDOWS w .env podaje inne
+TIMEFRAMES: Windows = [
+    ("12h", 720),
+    ("24h", 1440),
+]
+
+SPECIAL_OWNERS = {
+    "nodes":  "Cerveza",
+    "nodes2": "Baku",
+}
+
+NO_INVENTORY = "Brak plików nodes*.txt"
+
+
+# ----------------- NODY -----------------
+def _owner(path: str) -> str:
+    stem = Path(path).stem
+    if stem in SPECIAL_OWNERS:
+        return SPECIAL_OWNERS[stem]
+    m = re.match(r"nodes(\d+)", stem)
+    if m:
+        return f"{m.group(1)}-Nodes"
+    return stem
+
+
+def load_inventory(cfg: Optional[Settings] = None) -> Inventory:
+    """Pliki nodes*.txt (puste pomijamy); historia jest po adresie, więc nazwy mogą się powtarzać."""
+    return inventory.load_inventory([(_owner(path), path) for path in sorted(glob("nodes*.txt"))])
+
+
+# ----------------- HISTORIA -----------------
+def _days(n):
+    return timedelta(days=n) if n > 0 else None
+
+
+def open_state(cfg: Settings, path: str = HISTORY_COL_DIR, readonly: bool = False) -> ColumnarHistory:
+    """`readonly` (CLI `history`): bez tworzenia katalogu i bez migracji starych plików."""
+    with profiling.stage("load_history"), metrics.HISTORY_SECONDS.time(op="load"):
+        store = ColumnarHistory(path, readonly=True) if readonly else _open_history(cfg, path)
+    metrics.HISTORY_BYTES.set(metrics.dir_size(path))
+    metrics.HISTORY_ROWS.set(len(store))
+    return store
+
+
+def close_state(store: ColumnarHistory):
+    store.close()
+
+
+def _open_history(cfg: Settings, path: str) -> ColumnarHistory:
+    store = ColumnarHistory(
+        path,
+        raw_retention=_days(cfg.history_raw_days),
+        hourly_retention=_days(cfg.history_hourly_days),
+        daily_retention=_days(cfg.history_daily_days),
+    )
+    if store.is_empty():
+        # migracja: balances_history.json -> segmenty JSONL -> kolumny
+        legacy = HistoryStore(HISTORY_DIR, timedelta(days=36500))
+        legacy.import_legacy(HISTORY_PATH)
+        store.import_entries(legacy.entries())
+    return store
+
+
+def append_current_to_history(now_vals: Dict[str, int], store: ColumnarHistory):
+    """`now_vals`: adres -> plancki; historia trzyma float64 w jednostkach."""
+    with profiling.stage("append_current_to_history"), metrics.HISTORY_SECONDS.time(op="save"):
+        store.append({addr: planck / ONE for addr, planck in now_vals.items()})
+        store.rollup()
+    metrics.HISTORY_BYTES.set(metrics.dir_size(store.dir))
+    metrics.HISTORY_ROWS.set(len(store))
+
+
+def compute_deltas(now_vals: Dict[str, int], history, now_ts, as_of: Optional[Dict[str, float]] = None,
+                   windows: Windows = TIMEFRAMES):
+    """
+    `now_vals`: adres -> plancki; delty też w planckach (int).
+    `history` to ColumnarHistory (okna kroczące, O(1) na adres i okno) albo
+    TimeIndex (cokolwiek z baseline/first_seen_ts); lista wpisów też przejdzie
+    – wtedy indeks budujemy tu.
+    `as_of`: adres -> epoch ostatniego prawdziwego pomiaru dla adresów pominiętych
+    w tym sweepie; ich okno kończy się wtedy, a nie teraz.
+    """
+    now_s = now_ts.timestamp()
+    as_of = as_of or {}
+    if isinstance(history, ColumnarHistory):
+        return _window_deltas(now_vals, history, now_s, as_of, windows)
+    index = history if hasattr(history, "baseline") else TimeIndex.from_entries(history)
+
+    baselines = {}
+
+    def baseline(end, mins):
+        key = (end, mins)
+        if key not in baselines:
+            baselines[key] = index.baseline(end - mins * 60)
+        return baselines[key]
+
+    deltas: Dict[str, Dict[str, Optional[int]]] = {}
+
+    for addr, now_val in now_vals.items():
+        node_deltas = {}
+        end = as_of.get(addr, now_s)
+
+        first_seen = index.first_seen_ts(addr)
+        for label, mins in windows:
+
+            if first_seen is None or (end - first_seen) < mins * 60:
+                node_deltas[label] = None
+                continue
+
+            prev_val = baseline(end, mins).get(addr)
+            if prev_val is None:
+                node_deltas[label] = None
+            else:
+                node_deltas[label] = now_val - float_to_planck(prev_val)
+
+        deltas[addr] = node_deltas
+
+    return deltas
+
+
+def _window_deltas(now_vals: Dict[str, int], store: ColumnarHistory, now_s: float, as_of: Dict[str, float],
+                   windows: Windows):
+    """Jak compute_deltas, ale baza każdego okna z WindowEngine zamiast szukania w historii."""
+    engine = store.windows(windows, min([now_s] + [as_of[a] for a in now_vals if a in as_of]))
+    deltas: Dict[str, Dict[str, Optional[int]]] = {}
+    for addr, now_val in now_vals.items():
+        stats = engine.stats(addr, as_of.get(addr, now_s))
+        deltas[addr] = {
+            label: None if st is None else now_val - float_to_planck(st.start) for label, st in stats.items()
+        }
+    return deltas
+
+
+def fleet_alerts(groups_with_rows, store: ColumnarHistory, now_vals: Dict[str, int], now_s: float, cfg: Settings,
+                 stale: Optional[Dict[str, float]] = None) -> Optional[analytics.Alerts]:
+    """
+    Alerty zarobku (analytics.py) dla wszystkich adresów naraz – z historii
+    z dwóch okien STALL_WINDOW i bieżącego pomiaru; None przy STALL_WINDOW=0.
+    """
+    if cfg.stall_window is None:
+        return None
+    stale = stale or {}
+    with profiling.stage("analytics", cpu=True):
+        ts, m = store.matrix(now_s - 2 * cfg.stall_window[1] * 60, analytics.load_numpy())
+        if now_s > ts[-1]:
+            # bieżący pomiar jeszcze nie jest w historii
+            row = [NAN] * len(store.addresses)
+            for addr, planck in now_vals.items():
+                if addr in store.col and addr not in stale:
+                    row[store.col[addr]] = planck / ONE
+            ts, m = analytics.with_row(ts, m, now_s, row)
+        columns = {addr: store.col[addr] for addr in now_vals if addr in store.col}
+        members = [(owner, [(label, addr) for label, addr, _bal in rows]) for owner, rows in groups_with_rows]
+        return analytics.fleet_alerts(ts, m, columns, members, now_s, cfg.stall_window, cfg.stall_ratio)
+
+
+# ----------------- DISCORD FORMAT -----------------
+def _layout(windows: Windows):
+    """Nagłówki i szerokości kolumn: NODE, BAL i po jednej kolumnie na okno."""
+    return ["NODE", "BAL"] + [label for label, _ in windows], [24, 10] + [8] * len(windows)
+
+
+_RENDERED = RenderCache()
+
+
+def _header(now: datetime) -> str:
+    return f"**Quantus — Balances (@QuantusFaucetBot)**  \n*{now:%Y-%m-%d %H:%M}*"
+
+
+def _fmt_units(v: float) -> str:
+    return format_fixed(float_to_planck(v), 1)
+
+
+def _fmt_delta(x):
+    if x is None:
+        return "-"
+    if x == 0:
+        return "0"
+    sign = "+" if x > 0 else ""
+    return f"{sign}{format_fixed(x, 1)}"
+
+
+def _oldest_stale(rows, stale) -> Optional[float]:
+    """Epoch najstarszego pomiaru wśród stale w grupie – stały między raportami, więc może być w kluczu."""
+    group_stale = [stale[addr] for _label, addr, _bal in rows if addr in stale]
+    return min(group_stale) if group_stale else None
+
+
+def _group_block(owner, rows, now_vals, deltas, stale, status, windows: Windows) -> str:
+    """Tabela jednej grupy (właściciela) w bloku ```."""
+    headers, widths = _layout(windows)
+    rule = "-" * (sum(widths) + (12 if status else 0))
+
+    def fmt_row(cols, state=""):
+        line = f"{cols[0]:<{widths[0]}}{cols[1]:>{widths[1]}}"
+        for i in range(2, len(cols)):
+            line += f"{cols[i]:>{widths[i]}}"
+        if state:
+            line += f"  {state}"
+        return line
+
+    lines = []
+    lines.append(f"{owner}")
+    lines.append("```")
+    lines.append(fmt_row(headers, "STATUS" if status else ""))
+    lines.append(rule)
+
+    owner_total_now = 0
+    owner_delta_total = {label: 0 for label, _ in windows}
+
+    unknown = 0
+    for label, addr, _bal in rows:
+        val_now = now_vals.get(addr)
+        if val_now is None:
+            unknown += 1
+            lines.append(fmt_row([label, UNKNOWN] + ["-"] * len(windows), status.get(addr, "")))
+            continue
+        d = deltas.get(addr, {})
+
+        owner_total_now += val_now
+        for tf_label, _ in windows:
+            v = d.get(tf_label)
+            if v is not None:
+                owner_delta_total[tf_label] += v
+
+        cols = [label + ("*" if addr in stale else ""), format_fixed(val_now, 1)]
+        for tf_label, _ in windows:
+            cols.append(_fmt_delta(d.get(tf_label)))
+
+        lines.append(fmt_row(cols, status.get(addr, "")))
+
+    lines.append(rule)
+
+    total_cols = [f"TOTAL ({owner})", format_fixed(owner_total_now, 1)]
+    for tf_label, _ in windows:
+        total_cols.append(_fmt_delta(owner_delta_total[tf_label]))
+
+    checked = [status[addr] for _label, addr, _bal in rows if addr in status]
+    healthy = sum(1 for st in checked if st == HEALTHY)
+    lines.append(fmt_row(total_cols, f"{healthy}/{len(checked)} ok" if checked else ""))
+    lines.append("```")
+    if unknown:
+        lines.append(f"*{UNKNOWN}: brak odpowiedzi ({unknown}) – saldo nie wchodzi do sum*")
+    oldest = _oldest_stale(rows, stale)
+    if oldest is not None:
+        lines.append(f"*\\* saldo z poprzedniego pomiaru (najstarsze z {datetime.fromtimestamp(oldest):%H:%M})*")
+
+    return "\n".join(lines)
+
+
+def _group_key(owner, rows, now_vals, deltas, stale, status, windows: Windows) -> str:
+    """Klucz treści grupy: wszystko, co widać w jej tabeli (bez czasu raportu)."""
+    oldest = _oldest_stale(rows, stale)
+    sig = (
+        owner, bool(status), None if oldest is None else f"{datetime.fromtimestamp(oldest):%H:%M}",
+        [(label, addr, now_vals.get(addr), tuple(deltas.get(addr, {}).get(tf) for tf, _ in windows),
+          addr in stale, status.get(addr)) for label, addr, _bal in rows],
+    )
+    return hashlib.blake2b(repr(sig).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def make_discord_messages(groups_with_rows, now_vals, deltas, stale=None, now: Optional[datetime] = None,
+                          status: Optional[Dict[str, str]] = None, windows: Windows = TIMEFRAMES,
+                          alerts: Optional[analytics.Alerts] = None):
+    """
+    `now_vals` ma tylko udane odczyty; reszta to "unknown" – poza sumami i deltami.
+    `stale`: adres -> epoch ostatniego pomiaru dla adresów pominiętych w sweepie.
+    `now`: czas w nagłówku (raport z historii podaje czas ostatniego pomiaru).
+    `status`: adres -> stan noda/minera (health.status_by_address) – dodatkowa kolumna.
+    `windows`: kolumny delt (jak w compute_deltas).
+    `alerts`: wynik fleet_alerts – lista pod tabelami, jeśli nie jest pusta.
+    """
+    now = now or datetime.now()
+    stale = stale or {}
+    status = status or {}
+    blocks = [_group_block(owner, rows, now_vals, deltas, stale, status, windows)
+              for owner, rows in groups_with_rows]
+    blocks += analytics.report_blocks(alerts, _fmt_units)
+    # kilka grup w jednej wiadomości, za długie tabele dzielone (limit 2000 znaków)
+    return pack_messages(blocks, _header(now))
+
+
+def make_discord_slots(groups_with_rows, now_vals, deltas, stale=None, now: Optional[datetime] = None,
+                       status: Optional[Dict[str, str]] = None, windows: Windows = TIMEFRAMES,
+                       alerts: Optional[analytics.Alerts] = None) -> List[Slot]:
+    """
+    Jak make_discord_messages, ale każda grupa to osobny slot (wiadomość
+    edytowana w miejscu). Grupa o tym samym kluczu treści nie jest renderowana
+    ponownie, a MessageBoard pominie ją przy wysyłce.
+    """
+    now = now or datetime.now()
+    stale = stale or {}
+    status = status or {}
+    out: List[Slot] = []
+    for owner, rows in groups_with_rows:
+        key = _group_key(owner, rows, now_vals, deltas, stale, status, windows)
+        block = _RENDERED.get(key, lambda: _group_block(owner, rows, now_vals, deltas, stale, status, windows))
+        for i, msg in enumerate(pack_messages([block], _header(now))):
+            out.append((owner if i == 0 else f"{owner}#{i + 1}", key, msg))
+    return out + analytics.report_slots(alerts, _fmt_units)
+
+
+# ----------------- SWEEP / RAPORT -----------------
+def checkpoint(cfg: Settings) -> SweepCheckpoint:
+    return SweepCheckpoint(CHECKPOINT_PATH, cfg.sweep_resume_max_age)
+
+
+async def sweep(clients: list, groups: Groups, store: ColumnarHistory, cfg: Settings):
+    """
+    Pobiera salda, liczy delty względem historii i dopisuje pomiar.
+    Z ADAPTIVE_POLLING=1 pyta tylko adresy, na które przyszła pora;
+    reszta dostaje ostatnią znaną wartość i jest oznaczona jako stale.
+    """
+    with profiling.stage("sweep"), metrics.SWEEP_SECONDS.time():
+        return await _sweep(clients, groups, store, cfg)
+
+
+async def _sweep(clients: list, groups: Groups, store: ColumnarHistory, cfg: Settings):
+    from .fetch import fetch_groups     # asyncio/telethon tylko dla sweepa
+
+    ckpt = checkpoint(cfg)
+    stale = {}
+    if cfg.adaptive_polling:
+        addrs = list(dict.fromkeys(addr for _owner, pairs in groups for _label, addr in pairs))
+        plan = plan_polls(store, addrs, datetime.now().timestamp(), cfg.min_poll_interval, cfg.max_staleness)
+        due = set(plan.due)
+        with profiling.stage("fetch_balances"):
+            fetched = await fetch_groups(clients, [
+                (owner, [(label, addr) for label, addr in pairs if addr in due]) for owner, pairs in groups
+            ], cfg, checkpoint=ckpt)
+        got = {addr: bal for _owner, rows in fetched for _label, addr, bal in rows}
+        groups_with_rows = []
+        for owner, pairs in groups:
+            rows = []
+            for label, addr in pairs:
+                if addr in got:
+                    rows.append((label, addr, got[addr]))
+                else:
+                    last_ts, last_val = plan.skipped[addr]
+                    stale[addr] = last_ts
+                    rows.append((label, addr, Balance.from_float(addr, last_val, ts=last_ts)))
+            groups_with_rows.append((owner, rows))
+    else:
+        with profiling.stage("fetch_balances"):
+            groups_with_rows = await fetch_groups(clients, groups, cfg, checkpoint=ckpt)
+
+    for owner, rows in groups_with_rows:
+        output.print_table(rows, f"Nody: {owner}")
+
+    # mapowanie addr → plancki; nieudany odczyt to "unknown", nie 0 – nie trafia ani do delt, ani do historii
+    all_rows = [r for _owner, rows in groups_with_rows for r in rows]
+    now_vals = {addr: bal.planck for _label, addr, bal in all_rows if bal.ok}
+
+    now_ts = datetime.now()
+    with profiling.stage("compute_deltas", cpu=True):
+        deltas = compute_deltas(now_vals, store, now_ts, as_of=stale, windows=cfg.windows)
+    alerts = fleet_alerts(groups_with_rows, store, now_vals, now_ts.timestamp(), cfg, stale)
+
+    # do historii tylko to, co faktycznie zmierzyliśmy – cały pomiar naraz, potem checkpoint do kosza
+    append_current_to_history({a: v for a, v in now_vals.items() if a not in stale}, store)
+    ckpt.clear()
+    return groups_with_rows, now_vals, deltas, stale, cfg.windows, alerts
+
+
+def render(result, status: Optional[Dict[str, str]] = None, now: Optional[datetime] = None) -> List[str]:
+    groups_with_rows, now_vals, deltas, stale, windows, alerts = result
+    return make_discord_messages(groups_with_rows, now_vals, deltas, stale, now=now, status=status, windows=windows,
+                                 alerts=alerts)
+
+
+def render_slots(result, status: Optional[Dict[str, str]] = None, now: Optional[datetime] = None) -> List[Slot]:
+    groups_with_rows, now_vals, deltas, stale, windows, alerts = result
+    return make_discord_slots(groups_with_rows, now_vals, deltas, stale, now=now, status=status, windows=windows,
+                              alerts=alerts)
+
+
+def history_result(groups: Groups, store: ColumnarHistory, cfg: Settings):
+    """
+    (wynik jak z sweep(), czas pomiaru) z ostatniego zapisanego pomiaru – bez
+    Telegrama i noda; None, gdy historia jest pusta.
+    """
+    last_ts = store.latest_ts()
+    if last_ts is None:
+        return None
+    latest = store.latest()
+    now_vals = {addr: float_to_planck(v) for addr, v in latest.items()}
+    groups_with_rows = [
+        (owner, [
+            (label, addr, Balance.from_float(addr, latest[addr], ts=last_ts) if addr in latest
+             else Balance.failed(addr, ERROR, ts=last_ts))
+            for label, addr in pairs
+        ])
+        for owner, pairs in groups
+    ]
+    now = datetime.fromtimestamp(last_ts)
+    with profiling.stage("compute_deltas", cpu=True):
+        deltas = compute_deltas(now_vals, store, now, windows=cfg.windows)
+    alerts = fleet_alerts(groups_with_rows, store, now_vals, last_ts, cfg)
+    return (groups_with_rows, now_vals, deltas, {}, cfg.windows, alerts), now
+
+
+# ----------------- SUBSKRYPCJA -----------------
+def known_balances(_inv: Inventory, store: ColumnarHistory) -> Dict[str, int]:
+    """Ostatnie zapisane salda (adres -> plancki) – od nich subskrypcja liczy zmiany."""
+    return {addr: float_to_planck(v) for addr, v in store.latest().items()}
+
+
+def record_changes(_inv: Inventory, store: ColumnarHistory, changed: Dict[str, int]):
+    """Wiersz historii tylko ze zmienionymi kontami; reszta kolumn zostaje NaN."""
+    append_current_to_history(changed, store)
+
+
+def result_from_balances(groups: Groups, store: ColumnarHistory, balances: Dict[str, Balance], cfg: Settings):
+    """Wynik jak z sweep(), ale z sald utrzymywanych przez subskrypcję (bez zapisu do historii)."""
+    groups_with_rows = [
+        (owner, [(label, addr, balances.get(addr) or Balance.failed(addr, ERROR)) for label, addr in pairs])
+        for owner, pairs in groups
+    ]
+    now_vals = {addr: bal.planck for _owner, rows in groups_with_rows for _label, addr, bal in rows if bal.ok}
+    now = datetime.now()
+    with profiling.stage("compute_deltas", cpu=True):
+        deltas = compute_deltas(now_vals, store, now, windows=cfg.windows)
+    alerts = fleet_alerts(groups_with_rows, store, now_vals, now.timestamp(), cfg)
+    return groups_with_rows, now_vals, deltas, {}, cfg.windows, alerts
+
+
+# ----------------- HISTORIA (CLI) -----------------
+def has_history(store: ColumnarHistory) -> bool:
+    return not store.is_empty()
+
+
+def history_info(store: ColumnarHistory) -> List[Tuple[str, str]]:
+    info = [("katalog", str(store.dir)), ("adresy", str(len(store.addresses)))]
+    for name, _bucket in TIERS:
+        tier = store.tiers[name]
+        if tier.rows:
+            span = f"{datetime.fromtimestamp(tier.ts(0)):%Y-%m-%d %H:%M} … " \
+                   f"{datetime.fromtimestamp(tier.ts(tier.rows - 1)):%Y-%m-%d %H:%M}"
+        else:
+            span = "-"
+        info.append((f"warstwa {name}", f"{tier.rows} wierszy, {span}"))
+    info.append(("rozmiar", f"{metrics.dir_size(store.dir)} B"))
+    return info
+
+
+def history_series(inv: Inventory, store: ColumnarHistory, key: str, since: float) -> List[Tuple[float, int]]:
+    """(ts, plancki) dla adresu albo nazwy noda z plików nodes*.txt."""
+    return [(ts, float_to_planck(v)) for ts, v in store.series(inv.address(key), since)]
+
+
+def window_stats(inv: Inventory, store: ColumnarHistory, key: str, cfg: Settings) -> Dict[str, Optional[WindowStats]]:
+    """Okna WINDOWS (Δ, tempo, min/max) dla adresu albo nazwy noda – na chwilę ostatniego pomiaru."""
+    last_ts = store.latest_ts()
+    if last_ts is None:
+        return {label: None for label, _ in cfg.windows}
+    return store.windows(cfg.windows, last_ts).stats(inv.address(key), last_ts)
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Stan nodów i minerów obok sald – żeby płaskie saldo od razu było widać
+jako "miner down" albo "syncing".
+
+  hosts.txt (HOSTS_FILE):
+    # LABEL   NODE                    [MINER]
+    Baku-1    10.0.0.5                            # node :9944, miner :9833
+    Baku-2    http://10.0.0.6:9944    http://10.0.0.6:9833
+    Cerveza   node.example.org        -           # bez minera
+
+LABEL to nazwa noda z nodes*.txt (albo od razu q-adres). Wszystkie hosty
+sprawdzamy naraz: node jednym batchem JSON-RPC (system_health +
+chain_getHeader), miner zwykłym GET – odpowiedź HTTP < 500 znaczy, że żyje.
+Każdy URL ma własną sesję requests (keep-alive, jak w rpc.py), zapytania
+idą w puli wątków, a każdy host ma swój timeout – wolny host nie wstrzymuje
+reszty.
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from . import metrics
+from .inventory import Groups
+
+NODE_PORT = 9944
+MINER_PORT = 9833
+MAX_WORKERS = 32
+
+OK = "ok"
+
+
+class HostTarget:
+    __slots__ = ("label", "node_url", "miner_url")
+
+    def __init__(self, label: str, node_url: str, miner_url: str = ""):
+        self.label = label
+        self.node_url = node_url
+        self.miner_url = miner_url
+
+
+class HostHealth:
+    __slots__ = ("label", "node_ok", "syncing", "peers", "best", "miner_ok", "error", "seconds")
+
+    def __init__(self, label: str):
+        self.label = label
+        self.node_ok = False
+        self.syncing = False
+        self.peers: Optional[int] = None
+        self.best: Optional[int] = None
+        self.miner_ok: Optional[bool] = None      # None = miner nie jest sprawdzany
+        self.error = ""
+        self.seconds = 0.0
+
+    def problems(self, fleet_best: Optional[int] = None, max_lag: int = 0) -> List[str]:
+        """Krótkie opisy problemów; pusta lista = wszystko w porządku."""
+        out = []
+        if not self.node_ok:
+            out.append("node down")
+        else:
+            if self.syncing:
+                out.append("syncing")
+            if self.peers == 0:
+                out.append("no peers")
+            if fleet_best is not None and self.best is not None and max_lag and fleet_best - self.best > max_lag:
+                out.append(f"lag {fleet_best - self.best}")
+        if self.miner_ok is False:
+            out.append("miner down")
+        return out
+
+
+# ----------------- KONFIGURACJA -----------------
+def _url(spec: str, port: int, path: str = "") -> str:
+    """'10.0.0.5' / 'host:9944' / 'http://host' -> pełny URL z domyślnym portem."""
+    u = urlsplit(spec if "://" in spec else "http://" + spec)
+    if u.port is None:
+        host = f"[{u.hostname}]" if ":" in (u.hostname or "") else u.hostname
+        u = u._replace(netloc=f"{host}:{port}")
+    if path and not u.path:
+        u = u._replace(path=path)
+    return urlunsplit(u)
+
+
+def read_hosts(path: str, miner_path: str = "/") -> List[HostTarget]:
+    """Lista hostów z pliku; brak pliku = collector wyłączony."""
+    try:
+        with open(path, "r") as f:
+            lines = f.readlines()
+    except OSError:
+        return []
+    out = []
+    for line in lines:
+        parts = line.split("#", 1)[0].split()
+        if len(parts) < 2:
+            continue
+        label, node = parts[0], parts[1]
+        miner = parts[2] if len(parts) > 2 else urlsplit(_url(node, NODE_PORT)).hostname
+        miner_url = "" if miner == "-" else _url(miner, MINER_PORT, miner_path)
+        out.append(HostTarget(label, _url(node, NODE_PORT), miner_url))
+    return out
+
+
+# ----------------- ZAPYTANIA -----------------
+_SESSIONS: Dict[str, object] = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+def _miner_session(url: str):
+    """Jedna sesja HTTP na miner (węzły idą przez rpc.get_rpc)."""
+    with _SESSIONS_LOCK:
+        s = _SESSIONS.get(url)
+        if s is None:
+            import requests
+
+            s = _SESSIONS[url] = requests.Session()
+        return s
+
+
+def _check_node(h: HostHealth, url: str, timeout: float):
+    from .rpc import get_rpc
+
+    try:
+        health, header = get_rpc(url, timeout).batch([("system_health", []), ("chain_getHeader", [])])
+    except Exception as e:
+        h.error = f"node: {e}"
+        return
+    h.node_ok = True
+    h.syncing = bool((health or {}).get("isSyncing"))
+    h.peers = (health or {}).get("peers")
+    try:
+        h.best = int((header or {}).get("number"), 16)
+    except (TypeError, ValueError):
+        h.best = None
+
+
+def _check_miner(h: HostHealth, url: str, timeout: float):
+    try:
+        r = _miner_session(url).get(url, timeout=timeout)
+        h.miner_ok = r.status_code < 500
+    except Exception as e:
+        h.miner_ok = False
+        h.error = (h.error + "; " if h.error else "") + f"miner: {e}"
+
+
+def _check_host(target: HostTarget, timeout: float) -> HostHealth:
+    h = HostHealth(target.label)
+    t0 = time.perf_counter()
+    _check_node(h, target.node_url, timeout)
+    if target.miner_url:
+        _check_miner(h, target.miner_url, timeout)
+    h.seconds = time.perf_counter() - t0
+    return h
+
+
+async def collect(targets: Iterable[HostTarget], timeout: float = 5.0) -> Dict[str, HostHealth]:
+    """
+    Label -> HostHealth dla wszystkich hostów naraz. Host, który nie zmieści
+    się w `timeout` (node + miner), dostaje "node down" z błędem timeout.
+    """
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    targets = list(targets)
+    if not targets:
+        return {}
+    loop = asyncio.get_running_loop()
+    pool = ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(targets)), thread_name_prefix="health")
+
+    async def one(t: HostTarget) -> HostHealth:
+        try:
+            # każdy z dwóch requestów ma `timeout`; łącznie host dostaje 2x
+            return await asyncio.wait_for(loop.run_in_executor(pool, _check_host, t, timeout), 2 * timeout)
+        except asyncio.TimeoutError:
+            h = HostHealth(t.label)
+            h.error = f"timeout {2 * timeout:.0f}s"
+            return h
+
+    try:
+        results = await asyncio.gather(*(one(t) for t in targets))
+    finally:
+        pool.shutdown(wait=False)
+
+    for h in results:
+        metrics.NODE_UP.set(1 if h.node_ok else 0, host=h.label)
+        if h.peers is not None:
+            metrics.NODE_PEERS.set(h.peers, host=h.label)
+        if h.best is not None:
+            metrics.NODE_BEST_BLOCK.set(h.best, host=h.label)
+        if h.miner_ok is not None:
+            metrics.MINER_UP.set(1 if h.miner_ok else 0, host=h.label)
+    return {h.label: h for h in results}
+
+
+# ----------------- RAPORT -----------------
+def fleet_best(results: Dict[str, HostHealth]) -> Optional[int]:
+    blocks = [h.best for h in results.values() if h.node_ok and h.best is not None]
+    return max(blocks) if blocks else None
+
+
+def status_by_address(groups: Groups, results: Dict[str, HostHealth], max_lag: int = 0) -> Dict[str, str]:
+    """
+    Adres -> "ok" / "miner down, syncing" … dla wierszy raportu.
+    Host z hosts.txt pasuje po nazwie noda albo po adresie.
+    """
+    if not results:
+        return {}
+    best = fleet_best(results)
+    out = {}
+    for _owner, pairs in groups:
+        for label, addr in pairs:
+            h = results.get(label) or results.get(addr)
+            if h is not None:
+                out[addr] = ", ".join(h.problems(best, max_lag)) or OK
+    return out
+
+
+def summary_lines(results: Dict[str, HostHealth], max_lag: int = 0) -> List[str]:
+    """Jedna linia na host – do konsoli i `python -m quantus_monitor health`."""
+    best = fleet_best(results)
+    lines = []
+    for label, h in sorted(results.items()):
+        block = "-" if h.best is None else str(h.best)
+        peers = "-" if h.peers is None else str(h.peers)
+        miner = {True: "up", False: "down", None: "-"}[h.miner_ok]
+        status = ", ".join(h.problems(best, max_lag)) or OK
+        line = f"{label:<20} block {block:>9}  peers {peers:>3}  miner {miner:<4}  {status}"
+        if h.error:
+            line += f"  ({h.error})"
+        lines.append(line)
+    return lines
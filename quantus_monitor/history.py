@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Historia sald jako segmenty JSONL – jeden plik na dzień:
+
+  balances_history.d/2025-12-23.jsonl
+  balances_history.d/2025-12-24.jsonl
+
+Każdy pomiar to jedna linia {"ts": ..., "balances": {...}} dopisana na
+koniec segmentu (O(1), bez przepisywania całej historii). Retencja kasuje
+całe segmenty starsze niż `retention`. Przerwany zapis zostawia co najwyżej
+uciętą ostatnią linię, którą odczyt pomija – reszta historii jest cała.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+SEGMENT_SUFFIX = ".jsonl"
+
+
+class HistoryStore:
+    def __init__(self, directory: str, retention: timedelta = timedelta(days=3)):
+        self.dir = Path(directory)
+        self.retention = retention
+
+    # ----------------- SEGMENTY -----------------
+    def _segment_path(self, ts: datetime) -> Path:
+        return self.dir / f"{ts.date().isoformat()}{SEGMENT_SUFFIX}"
+
+    def segments(self) -> List[Path]:
+        """Pliki segmentów posortowane od najstarszego."""
+        if not self.dir.is_dir():
+            return []
+        return sorted(p for p in self.dir.iterdir() if p.name.endswith(SEGMENT_SUFFIX))
+
+    @staticmethod
+    def _segment_day(path: Path) -> Optional[datetime]:
+        try:
+            return datetime.fromisoformat(path.name[: -len(SEGMENT_SUFFIX)])
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _read_segment(path: Path) -> Iterator[dict]:
+        try:
+            with open(path, "r") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        # ucięta linia po przerwanym zapisie
+                        continue
+        except OSError:
+            return
+
+    # ----------------- ZAPIS -----------------
+    def append(self, balances: Dict, ts: Optional[datetime] = None) -> dict:
+        """Dopisuje jeden pomiar na koniec segmentu z dnia `ts` i robi fsync."""
+        ts = ts or datetime.now()
+        entry = {"ts": ts.isoformat(timespec="seconds"), "balances": balances}
+        self.dir.mkdir(parents=True, exist_ok=True)
+        path = self._segment_path(ts)
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with open(path, "a+b") as f:
+            # jeśli poprzedni zapis się urwał, zaczynamy od nowej linii
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    line = "\n" + line
+            f.write(line.encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+        return entry
+
+    def prune(self, now: Optional[datetime] = None) -> int:
+        """Usuwa segmenty w całości starsze niż retencja; zwraca liczbę usuniętych."""
+        now = now or datetime.now()
+        cutoff_day = (now - self.retention).replace(hour=0, minute=0, second=0, microsecond=0)
+        removed = 0
+        for path in self.segments():
+            day = self._segment_day(path)
+            if day is not None and day < cutoff_day:
+                try:
+                    path.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    # ----------------- ODCZYT -----------------
+    def entries(self, now: Optional[datetime] = None) -> List[dict]:
+        """Pomiary z okna retencji, od najstarszego."""
+        now = now or datetime.now()
+        cutoff = now - self.retention
+        cutoff_day = cutoff.replace(hour=0, minute=0, second=0, microsecond=0)
+        out = []
+        for path in self.segments():
+            day = self._segment_day(path)
+            if day is not None and day < cutoff_day:
+                continue
+            for e in self._read_segment(path):
+                try:
+                    if datetime.fromisoformat(e["ts"]) >= cutoff:
+                        out.append(e)
+                except (KeyError, TypeError, ValueError):
+                    pass
+        return out
+
+    def latest(self) -> Optional[dict]:
+        """Ostatni zapisany pomiar (czyta tylko najnowszy niepusty segment)."""
+        for path in reversed(self.segments()):
+            last = None
+            for e in self._read_segment(path):
+                last = e
+            if last is not None:
+                return last
+        return None
+
+    # ----------------- MIGRACJA -----------------
+    def import_legacy(self, legacy_path: str, as_balances: bool = False):
+        """
+        Jednorazowo przenosi stary plik JSON do segmentów:
+          - {"entries": [...]}  (balances_history.json)
+          - {label: bal_str}    (last_balances.json, as_balances=True, ts = mtime pliku)
+        Stary plik dostaje sufiks .migrated.
+        """
+        src = Path(legacy_path)
+        if not src.exists() or self.segments():
+            return
+        try:
+            with open(src, "r") as f:
+                data = json.load(f)
+        except Exception:
+            return
+        if as_balances:
+            ts = datetime.fromtimestamp(src.stat().st_mtime)
+            if isinstance(data, dict) and data:
+                self.append(data, ts)
+        else:
+            for e in data.get("entries", []):
+                try:
+                    self.append(e.get("balances", {}), datetime.fromisoformat(e["ts"]))
+                except (KeyError, TypeError, ValueError):
+                    pass
+        os.replace(src, src.with_name(src.name + ".migrated"))
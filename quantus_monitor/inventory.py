@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Pliki z nodami: jedna linia = "LABEL qADRES" (albo sam adres), # = komentarz.
+
+Walidacja przed jakąkolwiek siecią: każdy adres przechodzi dekodowanie SS58
+(format + checksum) – literówka to wpis w `problems` z plikiem i numerem linii,
+a nie 45 s czekania na bota. Adres powtórzony w kilku plikach zostaje tylko
+w pierwszym (kolejność źródeł). Układ pairs trzyma historię po nazwie, więc
+tam nazwy muszą być unikalne: powtórzona dostaje "#2", "#3"…, a linia z samym
+adresem – początek adresu zamiast pustej nazwy.
+
+Plik parsujemy raz na (mtime, rozmiar) – daemon przy każdym sweepie robi
+tylko stat.
+"""
+
+import os
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+Pairs = List[Tuple[str, str]]          # (label, adres)
+Groups = List[Tuple[str, Pairs]]       # (właściciel, pary)
+Sources = Sequence[Tuple[str, str]]    # (właściciel, ścieżka)
+
+SHORT_ADDRESS = 12                     # nazwa dla linii z samym adresem (unique_labels)
+
+
+class Inventory(NamedTuple):
+    groups: Groups
+    index: Dict[str, Tuple[str, str]]   # adres -> (właściciel, label), w kolejności plików
+    labels: Dict[str, str]              # label -> adres (pierwszy z tą nazwą)
+    problems: List[str]
+
+    def address(self, key: str) -> str:
+        """Nazwa noda albo adres -> adres (nieznany klucz bez zmian)."""
+        return key if key in self.index else self.labels.get(key, key)
+
+
+_FILES: Dict[str, Tuple[tuple, Pairs, List[str]]] = {}       # ścieżka -> (sygnatura, pary, problemy)
+_LOADED: Dict[tuple, Tuple[tuple, Inventory]] = {}           # (źródła, opcje) -> (sygnatury, wynik)
+
+
+def check_address(address: str) -> Optional[str]:
+    """None dla poprawnego q-adresu, inaczej opis błędu."""
+    from .rpc import ss58_decode    # rpc ciągnie asyncio – dopiero gdy jest co sprawdzać
+
+    try:
+        ss58_decode(address)
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def _signature(path: str) -> Optional[tuple]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _parse(path: str) -> Tuple[Pairs, List[str]]:
+    pairs: Pairs = []
+    problems: List[str] = []
+    with open(path, "r") as f:
+        for n, line in enumerate(f, 1):
+            s = line.strip()
+            if not s or s.startswith("#"):
+                continue
+            parts = s.split()
+            label, address = ("", parts[0]) if len(parts) == 1 else (parts[0], parts[-1])
+            err = check_address(address)
+            if err:
+                problems.append(f"{path}:{n}: {address} – {err}, pominięty")
+                continue
+            pairs.append((label, address))
+    return pairs, problems
+
+
+def _read(path: str) -> Tuple[tuple, Pairs, List[str]]:
+    sig = _signature(path)
+    if sig is None:
+        _FILES.pop(path, None)
+        return (), [], []
+    cached = _FILES.get(path)
+    if cached is None or cached[0] != sig:
+        cached = (sig, *_parse(path))
+        _FILES[path] = cached
+    return cached
+
+
+def load_inventory(sources: Sources, unique_labels: bool = False, skip_empty: bool = True) -> Inventory:
+    """
+    Grupy z plików `sources` (brak pliku = pusta grupa), zwalidowane i bez
+    powtórzonych adresów. Dopóki żaden plik się nie zmienił, zwraca ten sam obiekt.
+    """
+    sources = tuple(sources)
+    read = [(owner, path, _read(path)) for owner, path in sources]
+    sigs = tuple(sig for _owner, _path, (sig, _pairs, _problems) in read)
+    key = (sources, unique_labels, skip_empty)
+    cached = _LOADED.get(key)
+    if cached is not None and cached[0] == sigs:
+        return cached[1]
+
+    groups: Groups = []
+    index: Dict[str, Tuple[str, str]] = {}
+    labels: Dict[str, str] = {}
+    problems: List[str] = []
+    for owner, path, (_sig, file_pairs, file_problems) in read:
+        problems.extend(file_problems)
+        seen_here = set()
+        pairs: Pairs = []
+        for label, address in file_pairs:
+            if address in index:
+                prev_owner, prev_label = index[address]
+                problems.append(f"{path}: {address} jest już w {prev_owner}/{prev_label or address}, pominięty")
+                continue
+            if unique_labels:
+                name = label or address[:SHORT_ADDRESS]
+                if name in labels:
+                    n = 2
+                    while f"{name}#{n}" in labels:
+                        n += 1
+                    problems.append(f"{path}: nazwa {name} powtórzona, {address} jako {name}#{n}")
+                    name = f"{name}#{n}"
+                label = name
+            elif label and label in seen_here:
+                problems.append(f"{path}: nazwa {label} powtórzona ({address})")
+            if label:
+                seen_here.add(label)
+                labels.setdefault(label, address)
+            index[address] = (owner, label)
+            pairs.append((label, address))
+        if pairs or not skip_empty:
+            groups.append((owner, pairs))
+
+    inv = Inventory(groups, index, labels, problems)
+    _LOADED[key] = (sigs, inv)
+    return inv
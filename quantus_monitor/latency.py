@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Rozkład czasu odpowiedzi bota – z niego timeout i moment zapytania
+"zabezpieczającego" (hedge) zamiast stałego REPLY_TIMEOUT.
+
+  timeout  = TIMEOUT_FACTOR × p99, w granicach [REPLY_TIMEOUT_MIN, REPLY_TIMEOUT]
+  hedge    = p95: brak odpowiedzi do tego czasu -> ta sama komenda jeszcze raz
+
+Dopóki nie ma MIN_SAMPLES pomiarów, obowiązuje REPLY_TIMEOUT i nie ma hedge.
+Brak odpowiedzi też jest próbką (równą timeoutowi), więc gdy bot zwalnia,
+timeout rośnie razem z nim. Jeden tracker na połączenie, jak limiter –
+w trybie daemon rozkład "uczy się" między sweepami.
+"""
+
+import math
+import weakref
+from collections import deque
+from typing import Optional
+
+WINDOW = 200
+MIN_SAMPLES = 20
+TIMEOUT_FACTOR = 2.0
+
+
+class LatencyTracker:
+    def __init__(self, ceiling: float, floor: float = 5.0, window: int = WINDOW):
+        self.ceiling = ceiling
+        self.floor = min(floor, ceiling)
+        self.samples: deque = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self.samples.append(seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Kwantyl z okna (metoda "nearest rank"); None, gdy za mało próbek."""
+        if len(self.samples) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+    def timeout(self) -> float:
+        p99 = self.quantile(0.99)
+        if p99 is None:
+            return self.ceiling
+        return max(self.floor, min(self.ceiling, TIMEOUT_FACTOR * p99))
+
+    def hedge_after(self) -> Optional[float]:
+        """Po ilu sekundach wysłać komendę drugi raz; None = bez hedge."""
+        p95 = self.quantile(0.95)
+        if p95 is None:
+            return None
+        return p95 if p95 < self.timeout() else None
+
+
+_TRACKERS: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def tracker_for(client, ceiling: float, floor: float = 5.0) -> LatencyTracker:
+    tracker = _TRACKERS.get(client)
+    if tracker is None:
+        tracker = _TRACKERS[client] = LatencyTracker(ceiling, floor)
+    return tracker
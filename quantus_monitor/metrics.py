@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+Metryki w formacie Prometheusa (bez zależności od prometheus_client).
+
+- daemon: endpoint HTTP /metrics (METRICS_PORT / --metrics-port),
+- cron: plik dla textfile collectora node_exportera (METRICS_TEXTFILE /
+  --metrics-textfile), zapisywany przez tmp + os.replace.
+
+Metryki są globalne dla procesu; aktualizuje je także wątek wysyłki na
+Discorda, więc zapis i odczyt idą pod jednym lockiem.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SWEEP_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+_LOCK = threading.Lock()
+_REGISTRY: List["_Metric"] = []
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_value(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        _REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_fmt_labels(self.labelnames, k)} {_fmt_value(v)}" for k, v in self._values.items()]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with _LOCK:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with _LOCK:
+            self._values[self._key(labels)] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with _LOCK:
+            rec = self._values.get(key)
+            if rec is None:
+                rec = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = rec[0]
+            for i, le in enumerate(self.buckets):
+                if value <= le:
+                    counts[i] += 1
+            rec[1] += value
+            rec[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def _samples(self) -> List[str]:
+        out = []
+        for key, (counts, total, n) in self._values.items():
+            for le, c in zip(self.buckets, counts):
+                le_label = 'le="%s"' % _fmt_value(le)
+                out.append(f"{self.name}_bucket{_fmt_labels(self.labelnames, key, le_label)} {c}")
+            out.append(f"{self.name}_sum{_fmt_labels(self.labelnames, key)} {_fmt_value(total)}")
+            out.append(f"{self.name}_count{_fmt_labels(self.labelnames, key)} {n}")
+        return out
+
+
+# ----------------- METRYKI -----------------
+SWEEP_SECONDS = Histogram("quantus_sweep_seconds", "Czas całego sweepa sald", buckets=SWEEP_BUCKETS)
+BOT_REPLY_SECONDS = Histogram(
+    "quantus_bot_reply_seconds", "Czas ask_bot_for_balance (z czekaniem na limiter)", ["result"])
+BOT_MESSAGES = Counter(
+    "quantus_bot_messages_total", "Wiadomości od bota: balance = odpowiedź, ignored = placeholder/echo, "
+    "unmatched = saldo bez komendy, do której da się je przypisać (spóźnione, odrzucone)", ["kind"])
+FLOODWAIT_SECONDS = Counter("quantus_floodwait_seconds_total", "Sekundy FloodWait nałożone przez Telegram")
+REPLY_TIMEOUTS = Counter("quantus_reply_timeouts_total", "Brak odpowiedzi bota w czasie timeoutu", ["address"])
+REPLY_TIMEOUT_SECONDS = Gauge("quantus_reply_timeout_seconds", "Bieżący timeout odpowiedzi bota (z p99)")
+BOT_HEDGES = Counter("quantus_bot_hedges_total", "Komendy wysłane drugi raz po p95 bez odpowiedzi")
+RETRY_ROUNDS = Counter("quantus_retry_rounds_total", "Dodatkowe rundy dla nieudanych adresów na końcu sweepa")
+HISTORY_SECONDS = Histogram("quantus_history_seconds", "Czas odczytu/zapisu historii", ["op"])
+HISTORY_BYTES = Gauge("quantus_history_bytes", "Rozmiar historii na dysku")
+HISTORY_ROWS = Gauge("quantus_history_rows", "Liczba wierszy historii")
+DISCORD_POST_SECONDS = Histogram("quantus_discord_post_seconds", "Czas pojedynczego POST na webhook")
+DISCORD_RESPONSES = Counter("quantus_discord_responses_total", "Odpowiedzi webhooka wg kodu HTTP", ["status"])
+DISCORD_EDITS = Counter("quantus_discord_edits_total", "Wiadomości raportu edytowane w miejscu (DISCORD_EDIT)")
+DISCORD_DELETES = Counter("quantus_discord_deletes_total", "Nadmiarowe wiadomości raportu skasowane (DISCORD_EDIT)")
+DISCORD_SKIPPED = Counter("quantus_discord_skipped_total", "Sloty raportu bez zmian – nic nie wysłane")
+NODE_UP = Gauge("quantus_node_up", "Node odpowiada na JSON-RPC (hosts.txt)", ["host"])
+NODE_PEERS = Gauge("quantus_node_peers", "Liczba peerów z system_health", ["host"])
+NODE_BEST_BLOCK = Gauge("quantus_node_best_block", "Numer najlepszego bloku noda", ["host"])
+MINER_UP = Gauge("quantus_miner_up", "Miner odpowiada po HTTP", ["host"])
+SUBSCRIPTION_BLOCK = Gauge("quantus_subscription_block", "Ostatni blok z subskrypcji noda (--subscribe)")
+BALANCE_CHANGES = Counter("quantus_balance_changes_total", "Zmiany sald zapisane z subskrypcji")
+EARNING_ALERTS = Gauge("quantus_earning_alerts", "Nody z alertem zarobku w STALL_WINDOW (stall / low)", ["kind"])
+ANALYTICS_SECONDS = Histogram("quantus_analytics_seconds", "Czas analizy zarobków floty")
+INVENTORY_PROBLEMS = Gauge("quantus_inventory_problems", "Wpisy plików z nodami pominięte/przemianowane (zły adres, duplikat)")
+
+
+# ----------------- EKSPORT -----------------
+def render() -> str:
+    with _LOCK:
+        return "\n".join(m.render() for m in _REGISTRY) + "\n"
+
+
+def dir_size(path) -> int:
+    """Rozmiar pliku albo katalogu (suma plików) w bajtach."""
+    p = Path(path)
+    try:
+        if p.is_file():
+            return p.stat().st_size
+        return sum(f.stat().st_size for f in p.iterdir() if f.is_file())
+    except OSError:
+        return 0
+
+
+def write_textfile(path: str):
+    """Zapis dla node_exporter --collector.textfile (atomowo)."""
+    if not path:
+        return
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(render())
+    os.replace(tmp, path)
+
+
+def serve(port: int, addr: str = ""):
+    """Startuje /metrics w wątku w tle; port 0 = wyłączone (http.server ładujemy tylko wtedy)."""
+    if not port:
+        return None
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *_args):
+            pass
+
+    server = ThreadingHTTPServer((addr, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Wyjście na konsolę: rich, a w trybie headless (--headless / HEADLESS=1,
+albo gdy rich nie jest zainstalowany) zwykły tekst bez importu rich.
+
+Komunikaty używają znaczników rich ("[red]…[/red]"); PlainConsole je zdejmuje.
+"""
+
+import re
+import sys
+import time
+from typing import List, Optional, Tuple
+
+_MARKUP_RE = re.compile(r"\[/?[a-z][a-z0-9 _.#-]*\]")
+
+
+class PlainConsole:
+    """Tyle API rich.console.Console, ile używamy: print i log."""
+
+    def __init__(self, file=None):
+        self.file = file
+
+    def print(self, *objects, **_kwargs):
+        text = " ".join(str(o) for o in objects)
+        print(_MARKUP_RE.sub("", text), file=self.file or sys.stdout, flush=True)
+
+    def log(self, *objects, **_kwargs):
+        self.print(time.strftime("[%H:%M:%S]"), *objects)
+
+
+_CONSOLE = None
+
+
+def setup(headless: bool = False):
+    """Wybiera konsolę; rich importujemy tylko tu i tylko bez headless."""
+    global _CONSOLE
+    if headless:
+        _CONSOLE = PlainConsole()
+        return _CONSOLE
+    try:
+        from rich.console import Console
+    except ImportError:
+        _CONSOLE = PlainConsole()
+    else:
+        _CONSOLE = Console()
+    return _CONSOLE
+
+
+def console():
+    return _CONSOLE if _CONSOLE is not None else setup(headless=True)
+
+
+def headless() -> bool:
+    return isinstance(console(), PlainConsole)
+
+
+def _plain_table(rows: List[Tuple[str, ...]], headers: Tuple[str, ...], right: Tuple[int, ...]) -> List[str]:
+    widths = [max([len(h)] + [len(r[i]) for r in rows]) for i, h in enumerate(headers)]
+
+    def fmt(cols):
+        return "  ".join(c.rjust(w) if i in right else c.ljust(w) for i, (c, w) in enumerate(zip(cols, widths)))
+
+    return [fmt(headers), "  ".join("-" * w for w in widths)] + [fmt(r) for r in rows]
+
+
+def print_table(rows, title: str, con: Optional[object] = None):
+    """Wiersze (label, adres, Balance) jako tabela."""
+    con = con or console()
+    cells = [(label or "-", addr, str(bal)) for label, addr, bal in rows]
+    headers = ("Nazwa noda", "q-adres", "Balance")
+
+    if isinstance(con, PlainConsole):
+        con.print(title)
+        for line in _plain_table(cells, headers, right=(2,)):
+            con.print(line)
+        con.print("")
+        return
+
+    from rich import box
+    from rich.table import Table
+
+    tb = Table(title=title, box=box.SIMPLE_HEAVY)
+    tb.add_column(headers[0], style="cyan", no_wrap=True)
+    tb.add_column(headers[1], style="green")
+    tb.add_column(headers[2], justify="right")
+    for row in cells:
+        tb.add_row(*row)
+    con.print(tb)
@@ -0,0 +1,480 @@
+# -*- coding: utf-8 -*-
+"""
+Układ "pairs" (dawny qmonitor1.py): nodes.txt (YOU) + nodes_other.txt
+(FRIEND), Δ od poprzedniego pomiaru i sumy na osobę. Okna WINDOWS
+(Δ, tempo, min/max) – w `history NODE`; alerty zarobku (analytics.py) pod
+tabelą. Retencja last_balances.d sięga najdłuższego okna.
+"""
+
+import hashlib
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from . import analytics, inventory, metrics, output, profiling
+from .balance import ERROR, ONE, UNKNOWN, Balance, float_to_planck, format_fixed
+from .checkpoint import SweepCheckpoint
+from .discord import RenderCache, Slot, pack_messages
+from .history import HistoryStore
+from .inventory import Groups, Inventory
+from .settings import Settings
+from .windows import WindowEngine, Windows, WindowStats
+
+Rows = List[Tuple[str, str, Balance]]
+
+SWEEP_EVERY = 1800
+REPORT_EVERY = 1800
+
+# nazwy plików z nodami
+MAIN_NODES_FILE  = "nodes.txt"         # Twoje nody
+OTHER_NODES_FILE = "nodes_other.txt"   # nody drugiej osoby (opcjonalnie)
+
+# poprzednie salda (segmenty JSONL); stary last_balances.json jest migrowany
+LAST_BALANCES_DIR  = "last_balances.d"
+LAST_BALANCES_DAYS = 3                 # minimum retencji; dłuższe okno WINDOWS ją wydłuża
+LAST_BALANCES_PATH = "last_balances.json"
+CHECKPOINT_PATH    = "last_balances.sweep.jsonl"   # wyniki bieżącego sweepa (wznawianie po przerwaniu)
+
+# nazwę osoby można zmienić jak chcesz
+MAIN_OWNER_NAME  = "YOU"
+OTHER_OWNER_NAME = "FRIEND"
+
+NO_INVENTORY = "Brak adresów w nodes.txt / nodes_other.txt"
+
+SLOT = "pairs"                 # DISCORD_EDIT: wiadomość z tabelą edytowana w miejscu
+ALERTS_SLOT = "pairs:alerts"   # j.w. – alerty zarobku (nazwa inna niż w groups, plik stanu jest wspólny)
+_RENDERED = RenderCache()
+
+
+class PairsState:
+    """Store poprzednich sald + ostatni pomiar (nazwa -> plancki) w pamięci."""
+
+    def __init__(self, store: HistoryStore, last: Dict[str, int]):
+        self.store = store
+        self.last = last
+        self.engine: Optional[WindowEngine] = None     # okna kroczące – budowane przy pierwszym window_stats()
+
+
+# ----------------- NODY -----------------
+def load_inventory(cfg: Optional[Settings] = None) -> Inventory:
+    """
+    Zawsze dwie grupy (YOU, FRIEND) – pusta, gdy brak pliku; obie puste = brak nodów.
+    last_balances.d jest po nazwie, więc nazwy muszą być unikalne w obu plikach naraz.
+    """
+    inv = inventory.load_inventory([(MAIN_OWNER_NAME, MAIN_NODES_FILE), (OTHER_OWNER_NAME, OTHER_NODES_FILE)],
+                                   unique_labels=True, skip_empty=False)
+    if not inv.index:
+        return inv._replace(groups=[])
+    return inv
+
+
+# ----------------- HISTORIA -----------------
+def _as_planck(value) -> Optional[int]:
+    """Wpis z last_balances: plancki (int), a ze starych plików tekst '1234.5 QU' (None = nieudany odczyt)."""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return float_to_planck(value)
+    return Balance.parse(str(value)).planck
+
+
+def last_balances_store(path: str = LAST_BALANCES_DIR,
+                        retention: timedelta = timedelta(days=LAST_BALANCES_DAYS)) -> HistoryStore:
+    store = HistoryStore(path, retention)
+    store.import_legacy(LAST_BALANCES_PATH, as_balances=True)
+    return store
+
+
+def _entry_balances(entry: Optional[dict]) -> Dict[str, int]:
+    if not entry:
+        return {}
+    out = {label: _as_planck(v) for label, v in entry.get("balances", {}).items()}
+    return {label: v for label, v in out.items() if v is not None}
+
+
+def _known(rows: Rows) -> Dict[str, int]:
+    """Nazwa -> plancki tylko dla udanych odczytów; nieudane to "unknown", nie 0."""
+    return {label: bal.planck for label, _, bal in rows if bal.ok}
+
+
+def _merged_balances(entries: List[dict]) -> Dict[str, int]:
+    """Ostatnia znana wartość każdej nazwy – wpisy z --subscribe mają tylko zmienione konta."""
+    out: Dict[str, int] = {}
+    for e in entries:
+        out.update(_entry_balances(e))
+    return out
+
+
+def _retention(cfg: Optional[Settings]) -> timedelta:
+    """Najdłuższe okno WINDOWS, dwa okna STALL_WINDOW (bieżące i poprzednie), minimum 3 dni."""
+    longest = 0
+    if cfg:
+        longest = max(mins for _label, mins in cfg.windows)
+        if cfg.stall_window:
+            longest = max(longest, 2 * cfg.stall_window[1])
+    return max(timedelta(days=LAST_BALANCES_DAYS), timedelta(minutes=longest))
+
+
+def open_state(cfg: Optional[Settings] = None, path: str = LAST_BALANCES_DIR, readonly: bool = False) -> PairsState:
+    """
+    Wczytuje poprzednie salda (nazwa -> plancki) – ostatnia wartość każdej nazwy ze store'a.
+    `readonly` (CLI `history`): bez migracji last_balances.json.
+    """
+    with profiling.stage("load_history"), metrics.HISTORY_SECONDS.time(op="load"):
+        store = HistoryStore(path, _retention(cfg)) if readonly else last_balances_store(path, _retention(cfg))
+        try:
+            last = _merged_balances(store.entries())
+        except Exception:
+            last = {}
+    metrics.HISTORY_BYTES.set(metrics.dir_size(path))
+    return PairsState(store, last)
+
+
+def close_state(_state: PairsState):
+    pass
+
+
+def _append(state: PairsState, balances: Dict[str, int]):
+    """Wpis do store'a (i do okien, jeśli już zbudowane) + retencja."""
+    with profiling.stage("save_current_balances"), metrics.HISTORY_SECONDS.time(op="save"):
+        entry = state.store.append(balances)
+        state.store.prune()
+        if state.engine is not None:
+            state.engine.append(datetime.fromisoformat(entry["ts"]).timestamp(), _as_units(balances))
+    metrics.HISTORY_BYTES.set(metrics.dir_size(state.store.dir))
+
+
+def save_current_balances(all_rows: Rows, state: PairsState):
+    """Dopisuje aktualne salda (nazwa -> plancki) do store'a – bez nieudanych odczytów."""
+    _append(state, _known(all_rows))
+
+
+def _as_units(balances: Dict[str, int]) -> Dict[str, float]:
+    return {label: planck / ONE for label, planck in balances.items()}
+
+
+def window_engine(state: PairsState, windows: Windows) -> WindowEngine:
+    """Okna kroczące z całego store'a (nazwa -> saldo); potem aktualizowane przez _append."""
+    if state.engine is None or state.engine.windows != list(windows):
+        rows = []
+        for e in state.store.entries():
+            try:
+                rows.append((datetime.fromisoformat(e["ts"]).timestamp(), _as_units(_entry_balances(e))))
+            except (KeyError, TypeError, ValueError):
+                continue
+        state.engine = WindowEngine.from_rows(windows, rows[0][0] if rows else 0.0, rows)
+    return state.engine
+
+
+def compute_deltas(all_rows: Rows, last: Dict[str, int]):
+    """
+    Wszystko w planckach (int), więc sumy nie dryfują.
+    Nieudane odczyty nie mają ani wartości, ani delty (unknown).
+    Zwraca:
+      now_vals: dict label -> plancki
+      deltas:   dict label -> plancki (Δ od poprzedniego pomiaru)
+      total_now, delta_total
+    """
+    now_vals = _known(all_rows)
+
+    if not last:
+        deltas = {label: 0 for label in now_vals.keys()}
+    else:
+        deltas = {}
+        for label, val in now_vals.items():
+            deltas[label] = val - last.get(label, 0)
+    total_now = sum(now_vals.values())
+    # suma delt, nie różnica sum – node bez odczytu nie wygląda jak spadek salda
+    delta_total = sum(deltas.values())
+
+    return now_vals, deltas, total_now, delta_total
+
+
+def fleet_alerts(state: PairsState, rows_main: Rows, rows_other: Rows, now_s: float, cfg: Settings
+                 ) -> Optional[analytics.Alerts]:
+    """
+    Alerty zarobku (analytics.py) – macierz z wpisów last_balances.d, kolumny
+    to nazwy nodów, grupy to YOU / FRIEND; None przy STALL_WINDOW=0.
+    """
+    if cfg.stall_window is None:
+        return None
+    since = now_s - 2 * cfg.stall_window[1] * 60
+    with profiling.stage("analytics", cpu=True):
+        labels = list(dict.fromkeys(label for label, _, _ in rows_main + rows_other))
+        col = {label: i for i, label in enumerate(labels)}
+
+        def row(balances: Dict[str, int]) -> List[float]:
+            out = [analytics.NAN] * len(labels)
+            for label, planck in balances.items():
+                if label in col:
+                    out[col[label]] = planck / ONE
+            return out
+
+        base: Dict[str, int] = {}
+        ts, m = [since], []
+        for e in state.store.entries():
+            try:
+                t = datetime.fromisoformat(e["ts"]).timestamp()
+            except (KeyError, TypeError, ValueError):
+                continue
+            if t <= since:
+                base.update(_entry_balances(e))
+            else:
+                ts.append(t)
+                m.append(row(_entry_balances(e)))
+        m.insert(0, row(base))
+        now = _known(rows_main + rows_other)
+        if now_s > ts[-1]:
+            ts.append(now_s)
+            m.append(row(now))
+        members = [(owner, [(label, label) for label, _, _ in rows])
+                   for owner, rows in ((MAIN_OWNER_NAME, rows_main), (OTHER_OWNER_NAME, rows_other))]
+        columns = {label: col[label] for label in now}
+        return analytics.fleet_alerts(ts, m, columns, members, now_s, cfg.stall_window, cfg.stall_ratio)
+
+
+def _fmt_units(v: float) -> str:
+    return format_fixed(float_to_planck(v), 3)
+
+
+# ----------------- DISCORD FORMAT -----------------
+def make_table_text(rows_main: Rows, rows_other: Rows, last: dict, now: Optional[datetime] = None,
+                    status: Optional[Dict[str, str]] = None) -> str:
+    """
+    Tekst do Discorda:
+    - najpierw Twoje nody + TOTAL (YOU)
+    - separator
+    - nody drugiej osoby + TOTAL (FRIEND) (jeśli są)
+    - na końcu TOTAL (ALL)
+    `status`: adres -> stan noda/minera (health.status_by_address) na końcu wiersza.
+    """
+    all_rows = rows_main + rows_other
+    with profiling.stage("compute_deltas", cpu=True):
+        now_vals, deltas, total_now_all, delta_total_all = compute_deltas(all_rows, last)
+
+    ts = (now or datetime.now()).strftime("%Y-%m-%d %H:%M")
+    status = status or {}
+    head_tail = "  STATUS" if status else ""
+
+    def tail(addr):
+        st = status.get(addr)
+        return f"  {st}" if st else ""
+
+    def unknown_row(label, addr):
+        return f"{label:<20}{UNKNOWN:>12}{'-':>12}{tail(addr)}"
+
+    lines = [f"**Quantus — Balances (@QuantusFaucetBot)**  \n*{ts}*"]
+    lines.append("```")
+    lines.append(f"{'NODE':<20}{'BALANCE':>12}{'Δ (30 min)':>12}{head_tail}")
+    lines.append("-" * 44)
+
+    # --- Twoje nody ---
+    total_main = 0
+    delta_main = 0
+    for label, addr, _ in rows_main:
+        if label not in now_vals:
+            lines.append(unknown_row(label, addr))
+            continue
+        bal_val = now_vals[label]
+        delta   = deltas.get(label, 0)
+        total_main += bal_val
+        delta_main += delta
+        sign = "+" if delta > 0 else ""
+        lines.append(f"{label:<20}{format_fixed(bal_val, 3):>12}{sign}{format_fixed(delta, 3):>11}{tail(addr)}")
+
+    lines.append("-" * 44)
+    sign_main = "+" if delta_main > 0 else ""
+    lines.append(f"{f'TOTAL ({MAIN_OWNER_NAME})':<20}{format_fixed(total_main, 3):>12}{sign_main}{format_fixed(delta_main, 3):>11}")
+
+    # --- nody drugiej osoby (opcjonalne) ---
+    if rows_other:
+        lines.append("")  # pusta linia wizualnie
+        lines.append(f"{'NODE':<20}{'BALANCE':>12}{'Δ (30 min)':>12}{head_tail}")
+        lines.append("-" * 44)
+
+        total_other = 0
+        delta_other = 0
+        for label, addr, _ in rows_other:
+            if label not in now_vals:
+                lines.append(unknown_row(label, addr))
+                continue
+            bal_val = now_vals[label]
+            delta   = deltas.get(label, 0)
+            total_other += bal_val
+            delta_other += delta
+            sign = "+" if delta > 0 else ""
+            lines.append(f"{label:<20}{format_fixed(bal_val, 3):>12}{sign}{format_fixed(delta, 3):>11}{tail(addr)}")
+
+        lines.append("-" * 44)
+        sign_other = "+" if delta_other > 0 else ""
+        lines.append(f"{f'TOTAL ({OTHER_OWNER_NAME})':<20}{format_fixed(total_other, 3):>12}{sign_other}{format_fixed(delta_other, 3):>11}")
+
+        # --- TOTAL wszystkich razem ---
+        lines.append("-" * 44)
+        sign_all = "+" if delta_total_all > 0 else ""
+        lines.append(f"{'TOTAL (ALL)':<20}{format_fixed(total_now_all, 3):>12}{sign_all}{format_fixed(delta_total_all, 3):>11}")
+
+    lines.append("```")
+    unknown = sum(1 for label, _, _ in all_rows if label not in now_vals)
+    if unknown:
+        lines.append(f"*{UNKNOWN}: brak odpowiedzi ({unknown}) – saldo nie wchodzi do sum*")
+    return "\n".join(lines)
+
+
+# ----------------- SWEEP / RAPORT -----------------
+def checkpoint(cfg: Settings) -> SweepCheckpoint:
+    return SweepCheckpoint(CHECKPOINT_PATH, cfg.sweep_resume_max_age)
+
+
+async def sweep(clients: list, groups: Groups, state: PairsState, cfg: Settings):
+    """
+    Pobiera salda i zapisuje je jako nowe `state.last`.
+    Zwraca (wiersze YOU, wiersze FRIEND, poprzednie salda) – z tego render() składa raport.
+    """
+    with profiling.stage("sweep"), metrics.SWEEP_SECONDS.time():
+        return await _sweep(clients, groups, state, cfg)
+
+
+async def _sweep(clients: list, groups: Groups, state: PairsState, cfg: Settings):
+    from .fetch import fetch_groups     # asyncio/telethon tylko dla sweepa
+
+    ckpt = checkpoint(cfg)
+    with profiling.stage("fetch_balances"):
+        (_, rows_main), (_, rows_other) = await fetch_groups(clients, groups, cfg, fallback=True, checkpoint=ckpt)
+
+    if rows_main:
+        output.print_table(rows_main, "Twoje nody")
+    if rows_other:
+        output.print_table(rows_other, "Nody drugiej osoby")
+
+    # zapisujemy stan dla WSZYSTKICH razem
+    save_current_balances(rows_main + rows_other, state)
+    ckpt.clear()
+    # nieudany odczyt zostawia poprzednią wartość – następna Δ liczy się od niej
+    prev, state.last = state.last, {**state.last, **_known(rows_main + rows_other)}
+    return rows_main, rows_other, prev, fleet_alerts(state, rows_main, rows_other, time.time(), cfg)
+
+
+def render(result, status: Optional[Dict[str, str]] = None, now: Optional[datetime] = None) -> List[str]:
+    rows_main, rows_other, prev, alerts = result
+    text = make_table_text(rows_main, rows_other, prev, now=now, status=status)
+    return pack_messages([text] + analytics.report_blocks(alerts, _fmt_units))
+
+
+def _table_key(rows_main: Rows, rows_other: Rows, prev: Dict[str, int], status: Optional[Dict[str, str]]) -> str:
+    """Klucz treści tabeli: salda, poprzednie salda i statusy (bez czasu raportu)."""
+    status = status or {}
+    sig = [
+        [(label, addr, bal.planck if bal.ok else None, prev.get(label), status.get(addr))
+         for label, addr, bal in rows]
+        for rows in (rows_main, rows_other)
+    ]
+    return hashlib.blake2b(repr((bool(status), bool(prev), sig)).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def render_slots(result, status: Optional[Dict[str, str]] = None, now: Optional[datetime] = None) -> List[Slot]:
+    """Cała tabela to jeden slot (wiadomość edytowana w miejscu); bez zmian – bez renderu i wysyłki."""
+    rows_main, rows_other, prev, alerts = result
+    key = _table_key(rows_main, rows_other, prev, status)
+    text = _RENDERED.get(key, lambda: make_table_text(rows_main, rows_other, prev, now=now, status=status))
+    slots = [(SLOT if i == 0 else f"{SLOT}#{i + 1}", key, msg) for i, msg in enumerate(pack_messages([text]))]
+    return slots + analytics.report_slots(alerts, _fmt_units, ALERTS_SLOT)
+
+
+def history_result(groups: Groups, state: PairsState, cfg: Settings):
+    """
+    (wynik jak z sweep(), czas pomiaru): ostatni zapisany pomiar względem
+    poprzedniego – bez Telegrama i noda; None, gdy nic nie zapisano.
+    """
+    entries = state.store.entries()
+    if not entries:
+        return None
+    latest = _merged_balances(entries)
+    prev = _merged_balances(entries[:-1])
+    now = datetime.fromisoformat(entries[-1]["ts"])
+
+    def rows(pairs):
+        return [
+            (label, addr, Balance(addr, latest[label], ts=now.timestamp()) if label in latest
+             else Balance.failed(addr, ERROR, ts=now.timestamp()))
+            for label, addr in pairs
+        ]
+
+    (_, main_pairs), (_, other_pairs) = groups
+    rows_main, rows_other = rows(main_pairs), rows(other_pairs)
+    alerts = fleet_alerts(state, rows_main, rows_other, now.timestamp(), cfg)
+    return (rows_main, rows_other, prev, alerts), now
+
+
+# ----------------- SUBSKRYPCJA -----------------
+def known_balances(inv: Inventory, state: PairsState) -> Dict[str, int]:
+    """Ostatnie zapisane salda (adres -> plancki) – od nich subskrypcja liczy zmiany."""
+    return {addr: state.last[label] for addr, (_owner, label) in inv.index.items() if label in state.last}
+
+
+def record_changes(inv: Inventory, state: PairsState, changed: Dict[str, int]):
+    """Wpis w last_balances.d tylko ze zmienionymi nodami (nazwa -> plancki)."""
+    _append(state, {inv.index[addr][1]: planck for addr, planck in changed.items() if addr in inv.index})
+
+
+def result_from_balances(groups: Groups, state: PairsState, balances: Dict[str, Balance], cfg: Settings):
+    """
+    Wynik jak z sweep(): Δ liczona od poprzedniego raportu, więc `state.last`
+    przesuwa się tutaj, a nie przy każdej zmianie salda.
+    """
+    (_, main_pairs), (_, other_pairs) = groups
+
+    def rows(pairs):
+        return [(label, addr, balances.get(addr) or Balance.failed(addr, ERROR)) for label, addr in pairs]
+
+    rows_main, rows_other = rows(main_pairs), rows(other_pairs)
+    # nieudany odczyt zostawia poprzednią wartość – następna Δ liczy się od niej
+    prev, state.last = state.last, {**state.last, **_known(rows_main + rows_other)}
+    return rows_main, rows_other, prev, fleet_alerts(state, rows_main, rows_other, time.time(), cfg)
+
+
+# ----------------- HISTORIA (CLI) -----------------
+def has_history(state: PairsState) -> bool:
+    return bool(state.store.segments())
+
+
+def history_info(state: PairsState) -> List[Tuple[str, str]]:
+    segments = state.store.segments()
+    entries = state.store.entries()
+    info = [
+        ("katalog", str(state.store.dir)),
+        ("segmenty", str(len(segments))),
+        ("pomiary", str(len(entries))),
+    ]
+    if entries:
+        info.append(("zakres", f"{entries[0]['ts'][:16]} … {entries[-1]['ts'][:16]}"))
+    info.append(("rozmiar", f"{metrics.dir_size(state.store.dir)} B"))
+    return info
+
+
+def _label(inv: Inventory, key: str) -> str:
+    """Adres z plików -> jego (unikalna) nazwa; nazwa albo nieznany klucz bez zmian."""
+    return inv.index[key][1] if key in inv.index else key
+
+
+def history_series(inv: Inventory, state: PairsState, key: str, since: float) -> List[Tuple[float, int]]:
+    """(ts, plancki) dla nazwy noda (albo adresu z nodes.txt / nodes_other.txt)."""
+    label = _label(inv, key)
+    out = []
+    for e in state.store.entries():
+        try:
+            ts = datetime.fromisoformat(e["ts"]).timestamp()
+        except (KeyError, TypeError, ValueError):
+            continue
+        v = e.get("balances", {}).get(label)
+        planck = _as_planck(v) if v is not None else None
+        if ts >= since and planck is not None:
+            out.append((ts, planck))
+    return out
+
+
+def window_stats(inv: Inventory, state: PairsState, key: str, cfg: Settings) -> Dict[str, Optional[WindowStats]]:
+    """Okna WINDOWS (Δ, tempo, min/max) dla noda – na chwilę ostatniego pomiaru."""
+    latest = state.store.latest()
+    end = datetime.fromisoformat(latest["ts"]).timestamp() if latest else None
+    return window_engine(state, cfg.windows).stats(_label(inv, key), end)
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Cache InputPeer bota – rozwiązujemy username raz na proces i zapisujemy
+(user_id, access_hash) obok pliku sesji, np. quantus_balance_session.peers.json.
+
+Kolejne uruchomienia nie wołają ResolveUsername wcale; wpis kasujemy
+dopiero, gdy Telegram odrzuci peer (PEER_REJECTED).
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from telethon.errors.rpcerrorlist import (
+    InputUserDeactivatedError,
+    PeerIdInvalidError,
+    UserIdInvalidError,
+)
+from telethon.tl.types import InputPeerUser
+
+# błędy, po których zapisany peer uznajemy za nieaktualny
+PEER_REJECTED = (PeerIdInvalidError, UserIdInvalidError, InputUserDeactivatedError)
+
+# (plik cache, username) -> InputPeer
+_MEMORY: Dict[Tuple[str, str], object] = {}
+
+
+def peers_path(client) -> Optional[Path]:
+    """Plik cache obok pliku sesji; None dla sesji bez pliku (StringSession itp.)."""
+    filename = getattr(getattr(client, "session", None), "filename", None)
+    if not filename:
+        return None
+    p = Path(filename)
+    return p.with_name(p.stem + ".peers.json")
+
+
+def _load(path: Optional[Path]) -> dict:
+    if path is None:
+        return {}
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _save(path: Optional[Path], data: dict):
+    if path is None:
+        return
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+async def resolve_peer(client, username: str):
+    """InputPeer dla `username`: pamięć -> plik -> get_input_entity."""
+    path = peers_path(client)
+    name = username.lstrip("@").lower()
+    key = (str(path), name)
+
+    peer = _MEMORY.get(key)
+    if peer is not None:
+        return peer
+
+    data = _load(path)
+    rec = data.get(name)
+    if rec:
+        peer = InputPeerUser(rec["user_id"], rec["access_hash"])
+    else:
+        peer = await client.get_input_entity(username)
+        if isinstance(peer, InputPeerUser):
+            data[name] = {"user_id": peer.user_id, "access_hash": peer.access_hash}
+            _save(path, data)
+
+    _MEMORY[key] = peer
+    return peer
+
+
+def invalidate_peer(client, username: str):
+    """Usuwa peer z pamięci i z pliku (po odrzuceniu przez Telegram)."""
+    path = peers_path(client)
+    name = username.lstrip("@").lower()
+    _MEMORY.pop((str(path), name), None)
+    data = _load(path)
+    if data.pop(name, None) is not None:
+        _save(path, data)
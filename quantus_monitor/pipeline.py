@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Współbieżne pobieranie sald dla wszystkich grup naraz.
+
+Adresy ze wszystkich grup są przeplatane (round-robin), tak aby każda
+grupa posuwała się do przodu równo, i obsługiwane przez `max_in_flight`
+workerów. Tempo wysyłki kontroluje wspólny limiter w funkcji `ask`.
+
+Przy kilku sesjach Telegrama (shardach) każda ma własne workery i limiter,
+ale kolejka jest wspólna: shard wstrzymany przez FloodWait nie bierze
+nowych adresów, a jego nieudane zapytania wracają do kolejki i przejmują
+je pozostałe sesje.
+"""
+
+import asyncio
+from itertools import zip_longest
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+Pairs = List[Tuple[str, str]]
+Rows = List[Tuple[str, str, Any]]
+Ask = Callable[[str], Awaitable[Any]]
+
+
+class Shard:
+    """Jedno źródło zapytań (np. jedna sesja Telegrama) z własnym limiterem."""
+
+    __slots__ = ("ask", "limiter", "name")
+
+    def __init__(self, ask: Ask, limiter=None, name: str = ""):
+        self.ask = ask
+        self.limiter = limiter
+        self.name = name
+
+    async def wait_ready(self, wake: Optional[asyncio.Event] = None) -> bool:
+        """
+        Nie bierzemy pracy, dopóki limiter tej sesji jest na FloodWait.
+        `wake` przerywa czekanie wcześniej – wtedy False (pauza trwa, ale
+        wołający ma sprawdzić, czy jest jeszcze co robić).
+        """
+        while self.limiter is not None and self.limiter.paused:
+            delay = min(1.0, max(0.05, self.limiter.pause_remaining))
+            if wake is None:
+                await asyncio.sleep(delay)
+                continue
+            wake.clear()
+            try:
+                await asyncio.wait_for(wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                continue
+            return False
+        return True
+
+
+def interleave(groups: Sequence[Tuple[str, Pairs]]) -> List[Tuple[int, int]]:
+    """Kolejność zadań jako (nr grupy, nr wiersza), na przemian z każdej grupy."""
+    columns = [[(gi, ri) for ri in range(len(pairs))] for gi, (_owner, pairs) in enumerate(groups)]
+    return [job for batch in zip_longest(*columns) for job in batch if job is not None]
+
+
+async def fetch_pipelined(
+    groups: Sequence[Tuple[str, Pairs]],
+    ask: Union[None, Ask, Sequence[Shard]],
+    max_in_flight: int = 4,
+    retry_values: Tuple[Any, ...] = ("FloodWait",),
+    max_retries: int = 2,
+    known: Optional[Dict[str, Any]] = None,
+    missing: Any = "—",
+    retry: Optional[Callable[[Any], bool]] = None,
+    on_result: Optional[Callable[[str, Any], None]] = None,
+) -> List[Tuple[str, Rows]]:
+    """
+    Zwraca [(owner, [(label, addr, bal), ...]), ...] w kolejności wejścia.
+    Adresy z `known` (np. odczytane z noda albo z cache) nie trafiają do `ask`,
+    a każdy inny adres jest pytany raz, nawet jeśli jest w kilku grupach;
+    bez `ask` brakujące dostają `missing` (albo `missing(addr)`, jeśli to funkcja).
+    `ask` to funkcja albo lista Shardów – wtedy `max_in_flight` jest na shard.
+    Wynik z `retry_values` (np. "FloodWait") – albo taki, dla którego
+    `retry(wynik)` jest prawdą – wraca na koniec kolejki, maksymalnie
+    `max_retries` razy (+1 na każdy dodatkowy shard).
+    `on_result(addr, wynik)` dostaje każdy ostateczny wynik od razu (checkpoint).
+    """
+    if retry is None:
+        retry = retry_values.__contains__
+    if not callable(missing):
+        missing_value = missing
+        missing = lambda _addr: missing_value
+    if ask is None:
+        shards: List[Shard] = []
+    elif callable(ask):
+        shards = [Shard(ask)]
+    else:
+        shards = list(ask)
+    max_retries += max(0, len(shards) - 1)
+
+    known = dict(known or {})
+    # adres występujący w kilku grupach (albo dwa razy w jednej) pytamy raz
+    queue: asyncio.Queue = asyncio.Queue()
+    queued = set()
+    for gi, ri in interleave(groups):
+        addr = groups[gi][1][ri][1]
+        if addr in known or addr in queued:
+            continue
+        if not shards:
+            known[addr] = missing(addr)
+        else:
+            queued.add(addr)
+            queue.put_nowait((addr, 0))
+
+    remaining = len(queued)
+    changed = asyncio.Event()
+
+    async def worker(shard: Shard):
+        nonlocal remaining
+        while remaining > 0:
+            # pauza shardu nie może trzymać sweepa, gdy inne sesje skończyły kolejkę
+            if not await shard.wait_ready(changed):
+                continue
+            try:
+                addr, attempt = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                # kolejka pusta, ale ktoś jeszcze może oddać adres (FloodWait)
+                changed.clear()
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=1.0)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            bal = await shard.ask(addr)
+            known[addr] = bal
+            if retry(bal) and attempt < max_retries:
+                queue.put_nowait((addr, attempt + 1))
+            else:
+                remaining -= 1
+                if on_result is not None:
+                    on_result(addr, bal)
+            changed.set()
+
+    per_shard = max(1, min(max_in_flight, queue.qsize()))
+    await asyncio.gather(*(worker(sh) for sh in shards for _ in range(per_shard)))
+
+    return [
+        (owner, [(label, addr, known[addr] if addr in known else missing(addr)) for label, addr in pairs])
+        for owner, pairs in groups
+    ]
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Tryb --profile: czas ścienny każdego etapu uruchomienia.
+
+Etapy zagnieżdżają się (ścieżka "sweep;fetch_balances;Cerveza;qz..."), także
+w równoległych zadaniach asyncio – stos etapów siedzi w contextvar, więc
+każdy worker dziedziczy ścieżkę z miejsca, w którym go utworzono.
+
+Wynik:
+  profile.json    – etapy z czasem, liczbą wywołań i startem względem początku,
+  profile.folded  – "a;b;c <µs>" (czas własny) dla flamegraph.pl / speedscope,
+  profile.pstats  – cProfile etapów oznaczonych cpu=True (--profile-cpu).
+
+Bez enable() wszystkie funkcje są no-op (cProfile/pstats nie są nawet importowane).
+"""
+
+import contextvars
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+_STACK: contextvars.ContextVar = contextvars.ContextVar("profile_stack", default=())
+
+
+class Profiler:
+    def __init__(self, cpu: bool = False, t0: Optional[float] = None):
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.records: List[Tuple[Tuple[str, ...], float, float]] = []
+        self.cpu = None
+        if cpu:
+            import cProfile
+
+            self.cpu = cProfile.Profile()
+        self._cpu_depth = 0
+
+    def add(self, path: Tuple[str, ...], start: float, end: float):
+        self.records.append((path, start, end))
+
+    @contextmanager
+    def stage(self, *names: str, cpu: bool = False):
+        """Etap `names[-1]` pod ścieżką `names[:-1]` (pośrednie etapy bez własnego pomiaru)."""
+        path = _STACK.get() + tuple(str(n) for n in names)
+        token = _STACK.set(path)
+        profile_cpu = cpu and self.cpu is not None
+        if profile_cpu:
+            # cProfile nie lubi zagnieżdżonego enable()
+            if self._cpu_depth == 0:
+                self.cpu.enable()
+            self._cpu_depth += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            if profile_cpu:
+                self._cpu_depth -= 1
+                if self._cpu_depth == 0:
+                    self.cpu.disable()
+            _STACK.reset(token)
+            self.add(path, start, end)
+
+    # ----------------- RAPORT -----------------
+    def _nodes(self) -> Dict[Tuple[str, ...], dict]:
+        """
+        Węzeł na każdą ścieżkę. Etap bez własnego pomiaru (np. grupa, gdy
+        mierzymy tylko adresy) dostaje czas od pierwszego startu do ostatniego
+        końca swoich potomków.
+        """
+        nodes: Dict[Tuple[str, ...], dict] = {}
+        for path, start, end in self.records:
+            for i in range(1, len(path) + 1):
+                n = nodes.setdefault(path[:i], {"calls": 0, "wall": 0.0, "start": start, "end": end})
+                n["start"] = min(n["start"], start)
+                n["end"] = max(n["end"], end)
+            leaf = nodes[path]
+            leaf["calls"] += 1
+            leaf["wall"] += end - start
+        for n in nodes.values():
+            if not n["calls"]:
+                n["wall"] = n["end"] - n["start"]
+        return nodes
+
+    def report(self) -> dict:
+        nodes = self._nodes()
+        stages = [
+            {
+                "stage": ";".join(path),
+                "depth": len(path) - 1,
+                "calls": n["calls"],
+                "wall_s": round(n["wall"], 6),
+                "start_s": round(n["start"] - self.t0, 6),
+            }
+            for path, n in sorted(nodes.items(), key=lambda kv: (kv[1]["start"], len(kv[0])))
+        ]
+        out = {"total_s": round(time.perf_counter() - self.t0, 6), "stages": stages}
+        if self.cpu is not None:
+            import io
+            import pstats
+
+            buf = io.StringIO()
+            pstats.Stats(self.cpu, stream=buf).sort_stats("cumulative").print_stats(25)
+            out["cpu_top"] = buf.getvalue().splitlines()
+        return out
+
+    def folded(self) -> str:
+        """Czas własny etapu (bez dzieci) w µs; równoległe dzieci mogą go wyzerować."""
+        nodes = self._nodes()
+        child_wall: Dict[Tuple[str, ...], float] = {}
+        for path, n in nodes.items():
+            if len(path) > 1:
+                child_wall[path[:-1]] = child_wall.get(path[:-1], 0.0) + n["wall"]
+        lines = []
+        for path, n in nodes.items():
+            own = max(0.0, n["wall"] - child_wall.get(path, 0.0))
+            us = int(round(own * 1e6))
+            if us:
+                lines.append(f"{';'.join(p.replace(';', ',') for p in path)} {us}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str):
+        p = Path(path)
+        with open(p, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        with open(p.with_suffix(".folded"), "w") as f:
+            f.write(self.folded())
+        if self.cpu is not None:
+            self.cpu.dump_stats(str(p.with_suffix(".pstats")))
+
+
+_ACTIVE: Optional[Profiler] = None
+
+
+def enable(cpu: bool = False, t0: Optional[float] = None) -> Profiler:
+    global _ACTIVE
+    _ACTIVE = Profiler(cpu, t0)
+    return _ACTIVE
+
+
+def active() -> Optional[Profiler]:
+    return _ACTIVE
+
+
+@contextmanager
+def stage(*names: str, cpu: bool = False):
+    if _ACTIVE is None:
+        yield
+        return
+    with _ACTIVE.stage(*names, cpu=cpu):
+        yield
+
+
+def record(name: str, start: float, end: float):
+    """Etap zmierzony z zewnątrz (np. importy przed parsowaniem argumentów)."""
+    if _ACTIVE is not None:
+        _ACTIVE.add(_STACK.get() + (name,), start, end)
+
+
+def dump(path: str):
+    if _ACTIVE is not None and path:
+        _ACTIVE.dump(path)
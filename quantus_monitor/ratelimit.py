@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Adaptacyjny token bucket dla komend wysyłanych do bota.
+
+Po FloodWaitError wstrzymujemy wysyłkę na czas podany przez Telegram
+i obcinamy tempo o połowę; każda udana wysyłka podnosi je z powrotem
+o 10% maksymalnego tempa (AIMD), aż do wartości startowej.
+Tempo math.inf = bez limitu; pauza po FloodWait nadal obowiązuje.
+"""
+
+import asyncio
+import time
+import weakref
+
+
+class AdaptiveTokenBucket:
+    def __init__(self, rate: float, burst: float = 1.0, min_rate: float = None):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self.capacity = max(1.0, burst)
+        self.tokens = self.capacity
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        if now > self._last:
+            self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+            self._last = now
+
+    async def acquire(self):
+        """Czeka na token (kolejność FIFO dzięki lockowi)."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+    def on_flood_wait(self, seconds: float):
+        """FloodWait: pauza na `seconds` i tempo / 2."""
+        until = time.monotonic() + max(0.0, seconds)
+        if until > self._paused_until:
+            self._paused_until = until
+        self.rate = max(self.min_rate, self.rate / 2)
+        self.tokens = 0.0
+        self._last = self._paused_until
+
+    def on_success(self):
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.1)
+
+    @property
+    def paused(self) -> bool:
+        return time.monotonic() < self._paused_until
+
+    @property
+    def pause_remaining(self) -> float:
+        return max(0.0, self._paused_until - time.monotonic())
+
+
+# jeden limiter na połączenie – w trybie daemon tempo "uczy się" między sweepami
+_LIMITERS: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def limiter_for(client, rate: float, burst: float = 1.0) -> AdaptiveTokenBucket:
+    limiter = _LIMITERS.get(client)
+    if limiter is None:
+        limiter = _LIMITERS[client] = AdaptiveTokenBucket(rate, burst)
+    return limiter
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Wspólny cache wyników: adres -> (plancki, jednostka, kiedy pobrane).
+
+Z tego samego pliku korzystają oba układy (sweep --layout groups / pairs),
+więc adres odpytany przez jeden proces nie jest odpytywany przez drugi, dopóki
+wynik jest świeższy niż TTL. Dostęp jest chroniony flockiem na pliku .lock,
+a zapis idzie przez tmp + os.replace.
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable
+
+from .balance import Balance
+
+try:
+    import fcntl
+except ImportError:  # Windows – bez blokady między procesami
+    fcntl = None
+
+
+class BalanceCache:
+    def __init__(self, path: str, ttl: float):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        if fcntl is None:
+            yield
+            return
+        with open(self.lock_path, "a") as lf:
+            fcntl.flock(lf.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lf.fileno(), fcntl.LOCK_UN)
+
+    def _read(self) -> Dict[str, Balance]:
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except Exception:
+            return {}
+        out = {}
+        for addr, v in data.items():
+            try:
+                if len(v) == 2:
+                    # stary format: [tekst salda, ts]
+                    out[addr] = Balance.parse(v[0], addr, float(v[1]))
+                else:
+                    out[addr] = Balance(addr, int(v[0]), v[1], ts=float(v[2]))
+            except (TypeError, ValueError, IndexError):
+                continue
+        return out
+
+    def get_fresh(self, addresses: Iterable[str], now: float = None) -> Dict[str, Balance]:
+        """Adres -> saldo dla wpisów młodszych niż TTL (z czasem pobrania)."""
+        if self.ttl <= 0:
+            return {}
+        now = now or time.time()
+        with self._locked(exclusive=False):
+            data = self._read()
+        out = {}
+        for addr in addresses:
+            rec = data.get(addr)
+            if rec and rec.ok and now - rec.ts < self.ttl:
+                out[addr] = rec
+        return out
+
+    def update(self, results: Dict[str, Balance], now: float = None):
+        """
+        Dopisuje poprawne salda (błędów i timeoutów nie cache'ujemy);
+        przy okazji wyrzuca wpisy starsze niż 2×TTL.
+        """
+        if self.ttl <= 0:
+            return
+        now = now or time.time()
+        fresh = {a: b for a, b in results.items() if b.ok}
+        if not fresh:
+            return
+        with self._locked(exclusive=True):
+            data = self._read()
+            data.update(fresh)
+            data = {a: b for a, b in data.items() if b.ok and now - b.ts < 2 * self.ttl}
+            tmp = self.path.with_name(self.path.name + f".{os.getpid()}.tmp")
+            with open(tmp, "w") as f:
+                json.dump({a: [b.planck, b.unit, b.ts] for a, b in data.items()}, f)
+            os.replace(tmp, self.path)
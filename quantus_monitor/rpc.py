@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Salda prosto z noda (JSON-RPC, domyślnie port 9944).
+
+Czytamy storage System.Account dla wszystkich adresów jednym wywołaniem
+state_queryStorageAt (albo, gdy node go nie obsługuje, jednym batchem
+state_getStorage). Połączenie HTTP jest współdzielone (requests.Session).
+requests importujemy dopiero w kliencie – dekodowanie adresów go nie wymaga.
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .balance import Balance
+
+# twox128("System") + twox128("Account")
+SYSTEM_ACCOUNT_PREFIX = "26aa394eea5630e07c48ae0c9558cef7b99d880ec681799c0cf30e8886371da9"
+
+B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_B58_INDEX = {c: i for i, c in enumerate(B58_ALPHABET)}
+
+
+class RpcError(Exception):
+    pass
+
+
+# ----------------- ADRESY -----------------
+def b58decode(s: str) -> bytes:
+    n = 0
+    for c in s:
+        if c not in _B58_INDEX:
+            raise ValueError(f"niepoprawny znak base58: {c!r}")
+        n = n * 58 + _B58_INDEX[c]
+    raw = n.to_bytes((n.bit_length() + 7) // 8, "big") if n else b""
+    pad = len(s) - len(s.lstrip("1"))
+    return b"\x00" * pad + raw
+
+
+def ss58_decode(address: str) -> bytes:
+    """q-adres (SS58) -> 32-bajtowe AccountId; ValueError przy złym formacie/checksumie."""
+    data = b58decode(address.strip())
+    if len(data) < 3:
+        raise ValueError("adres za krótki")
+    prefix_len = 2 if data[0] & 0b0100_0000 else 1
+    body, checksum = data[:-2], data[-2:]
+    account = body[prefix_len:]
+    if len(account) != 32:
+        raise ValueError(f"nieoczekiwana długość AccountId: {len(account)}")
+    expected = hashlib.blake2b(b"SS58PRE" + body, digest_size=64).digest()[:2]
+    if checksum != expected:
+        raise ValueError("zły checksum SS58")
+    return account
+
+
+def system_account_key(account_id: bytes) -> str:
+    """Klucz storage System.Account(account_id) – hasher blake2_128_concat."""
+    h = hashlib.blake2b(account_id, digest_size=16).digest()
+    return "0x" + SYSTEM_ACCOUNT_PREFIX + h.hex() + account_id.hex()
+
+
+def decode_free_balance(value_hex: Optional[str]) -> int:
+    """
+    AccountInfo (SCALE): nonce u32, consumers u32, providers u32, sufficients u32,
+    potem AccountData { free u128, reserved u128, frozen u128, flags u128 }.
+    Brak wpisu = konto puste = 0.
+    """
+    if not value_hex:
+        return 0
+    raw = bytes.fromhex(value_hex[2:] if value_hex.startswith("0x") else value_hex)
+    if len(raw) < 32:
+        raise RpcError(f"za krótki AccountInfo: {len(raw)} B")
+    return int.from_bytes(raw[16:32], "little")
+
+
+# ----------------- KLIENT -----------------
+class NodeRpc:
+    """Prosty klient JSON-RPC po HTTP z jedną, współdzieloną sesją."""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+        import requests
+
+        self.session = requests.Session()
+        self.session.headers["Content-Type"] = "application/json"
+        self._ids = 0
+        self._lock = threading.Lock()
+
+    def _next_id(self) -> int:
+        with self._lock:
+            self._ids += 1
+            return self._ids
+
+    def call(self, method: str, params: Optional[list] = None):
+        payload = {"jsonrpc": "2.0", "id": self._next_id(), "method": method, "params": params or []}
+        r = self.session.post(self.url, json=payload, timeout=self.timeout)
+        r.raise_for_status()
+        data = r.json()
+        if data.get("error"):
+            raise RpcError(f"{method}: {data['error']}")
+        return data.get("result")
+
+    def batch(self, calls: List[tuple]) -> list:
+        """[(method, params), ...] -> wyniki w tej samej kolejności (błąd -> RpcError)."""
+        payload = [
+            {"jsonrpc": "2.0", "id": self._next_id(), "method": m, "params": p}
+            for m, p in calls
+        ]
+        r = self.session.post(self.url, json=payload, timeout=self.timeout)
+        r.raise_for_status()
+        by_id = {item.get("id"): item for item in r.json()}
+        out = []
+        for req in payload:
+            item = by_id.get(req["id"], {})
+            if item.get("error") or "result" not in item:
+                raise RpcError(f"{req['method']}: {item.get('error', 'brak odpowiedzi')}")
+            out.append(item["result"])
+        return out
+
+    def close(self):
+        self.session.close()
+
+    def query_free_balances(self, addresses: Iterable[str]) -> Dict[str, int]:
+        """Adres -> free (planck). Adresy, których nie da się zdekodować, są pomijane."""
+        keys: Dict[str, str] = {}
+        for addr in addresses:
+            try:
+                keys[addr] = system_account_key(ss58_decode(addr))
+            except ValueError:
+                continue
+        if not keys:
+            return {}
+
+        health = self.call("system_health")
+        if health and health.get("isSyncing"):
+            raise RpcError("node się synchronizuje – salda mogą być nieaktualne")
+
+        key_list = list(dict.fromkeys(keys.values()))
+        try:
+            result = self.call("state_queryStorageAt", [key_list])
+            values = {}
+            for change_set in result or []:
+                for k, v in change_set.get("changes", []):
+                    values[k] = v
+        except RpcError:
+            vals = self.batch([("state_getStorage", [k]) for k in key_list])
+            values = dict(zip(key_list, vals))
+
+        return {addr: decode_free_balance(values.get(k)) for addr, k in keys.items()}
+
+
+_CLIENTS: Dict[Tuple[str, float], NodeRpc] = {}
+
+
+def get_rpc(url: str, timeout: float = 5.0) -> NodeRpc:
+    """Jeden klient (pula połączeń) na URL i timeout na proces."""
+    key = (url, timeout)
+    rpc = _CLIENTS.get(key)
+    if rpc is None:
+        rpc = _CLIENTS[key] = NodeRpc(url, timeout)
+    return rpc
+
+
+async def fetch_balances_rpc(
+    url: str,
+    addresses: Iterable[str],
+    decimals: int = 12,
+    unit: str = "QU",
+    timeout: float = 5.0,
+) -> Dict[str, Balance]:
+    """
+    Adres -> Balance dla adresów, które odczytał node.
+    Przy błędzie połączenia/RPC zwraca {} – wtedy wszystko idzie przez bota.
+    """
+    import requests
+
+    rpc = get_rpc(url, timeout)
+    try:
+        amounts = await asyncio.to_thread(rpc.query_free_balances, list(addresses))
+    except (requests.RequestException, RpcError, ValueError):
+        return {}
+    now = time.time()
+    return {addr: Balance.from_units(addr, v, decimals, unit, ts=now) for addr, v in amounts.items()}
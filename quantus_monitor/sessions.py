@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+Konfiguracja sesji Telegrama do shardowania zapytań.
+
+  SESSION_NAME_1=konto_a   PHONE_1=+48...
+  SESSION_NAME_2=konto_b   PHONE_2=+48...
+
+Bez SESSION_NAME_<n> zostaje jedna sesja z SESSION_NAME / PHONE.
+Brakujący PHONE_<n> dziedziczy PHONE.
+"""
+
+import os
+from typing import List, Mapping, Optional, Tuple
+
+
+def session_configs(
+    env: Optional[Mapping[str, str]] = None,
+    default_name: str = "quantus_balance_session",
+) -> List[Tuple[str, Optional[str]]]:
+    """[(nazwa sesji, telefon), ...] w kolejności numerów."""
+    env = os.environ if env is None else env
+    phone = env.get("PHONE")
+    out: List[Tuple[str, Optional[str]]] = []
+    n = 1
+    while env.get(f"SESSION_NAME_{n}"):
+        out.append((env[f"SESSION_NAME_{n}"], env.get(f"PHONE_{n}") or phone))
+        n += 1
+    if not out:
+        out.append((env.get("SESSION_NAME", default_name), phone))
+    return out
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Ustawienia z env (.env wczytuje cli przed Settings(), więc wartości z pliku
+też działają – wcześniej skrypty czytały je przy imporcie, przed load_dotenv).
+"""
+
+import os
+from typing import Mapping, Optional
+
+from .windows import Windows, parse_windows
+
+BOT_USERNAME = "QuantusFaucetBot"
+CMD_TEMPLATE = "/balance {}"
+
+
+def _flag(v: str) -> bool:
+    return v.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _windows(name: str, spec: str) -> Windows:
+    """parse_windows dla zmiennej `name`; zła wartość = jedna linia błędu zamiast tracebacka."""
+    try:
+        return parse_windows(spec)
+    except ValueError as e:
+        raise SystemExit(f"{name}: {e}") from None
+
+
+class Settings:
+    def __init__(self, env: Optional[Mapping[str, str]] = None):
+        env = os.environ if env is None else env
+        get = env.get
+
+        self.layout = get("MONITOR_LAYOUT", "groups")               # groups | pairs
+        self.bot_username = BOT_USERNAME
+        self.cmd_template = CMD_TEMPLATE
+
+        self.api_id = int(get("API_ID", "0") or 0)
+        self.api_hash = get("API_HASH", "")
+        self.discord_webhook = get("DISCORD_WEBHOOK", "")
+        # raport "w miejscu": edycja wiadomości z poprzedniego raportu, tylko zmienione grupy
+        self.discord_edit = _flag(get("DISCORD_EDIT", "0"))
+        self.discord_state_path = get("DISCORD_STATE_PATH", "discord_messages.json")
+
+        self.reply_timeout = int(get("REPLY_TIMEOUT", "45"))
+        self.delay_between = float(get("DELAY_BETWEEN", "1.8"))     # bazowy odstęp między komendami; 0 = bez limitu
+        self.max_in_flight = int(get("MAX_IN_FLIGHT", "4"))         # ile /balance naraz czeka na odpowiedź
+        self.burst = float(get("BURST", "3"))
+        self.debug = get("DEBUG", "0") == "1"
+        self.headless = _flag(get("HEADLESS", "0"))                 # bez rich – zwykły tekst na stdout
+
+        # timeout odpowiedzi bota = 2 × p99 w granicach [REPLY_TIMEOUT_MIN, REPLY_TIMEOUT];
+        # HEDGE: po p95 bez odpowiedzi komenda idzie drugi raz; nieudane adresy dostają
+        # RETRY_ROUNDS rund na końcu sweepa (pauza RETRY_BACKOFF s, potem ×2)
+        self.reply_timeout_min = float(get("REPLY_TIMEOUT_MIN", "5"))
+        self.hedge = _flag(get("HEDGE", "1"))
+        self.retry_rounds = int(get("RETRY_ROUNDS", "2"))
+        self.retry_backoff = float(get("RETRY_BACKOFF", "5"))
+
+        # skąd brać salda: bot | rpc | auto (node, a czego node nie da – bot)
+        self.balance_backend = get("BALANCE_BACKEND", "auto").lower()
+        self.node_rpc_url = get("NODE_RPC_URL", "http://127.0.0.1:9944")
+        self.node_ws_url = get("NODE_WS_URL", "")                   # --subscribe; puste = NODE_RPC_URL po ws://
+        self.token_decimals = int(get("TOKEN_DECIMALS", "12"))
+
+        # wspólny dla obu układów cache wyników; TTL w sekundach, 0 = wyłączony
+        self.balance_cache_path = get("BALANCE_CACHE_PATH", "balance_cache.json")
+        self.balance_cache_ttl = float(get("BALANCE_CACHE_TTL", "300"))
+
+        # przerwany sweep wznawia się z checkpointu; wyniki starsze niż tyle s pytamy od nowa, 0 = bez checkpointu
+        self.sweep_resume_max_age = float(get("SWEEP_RESUME_MAX_AGE", "1800"))
+
+        # ile trzymać każdą warstwę historii kolumnowej; 0 = bez limitu
+        self.history_raw_days = int(get("HISTORY_RAW_DAYS", "90"))
+        self.history_hourly_days = int(get("HISTORY_HOURLY_DAYS", "365"))
+        self.history_daily_days = int(get("HISTORY_DAILY_DAYS", "0"))
+        # okna delt w raporcie groups i w `history NODE`, np. "1h,12h,24h,7d,30d"
+        self.windows = _windows("WINDOWS", get("WINDOWS", "12h,24h"))
+        # alerty pod raportem: nody bez zarobku / z tempem < STALL_RATIO × mediana grupy w oknie; 0 = wyłączone
+        stall_window = get("STALL_WINDOW", "6h").strip()
+        self.stall_window = _windows("STALL_WINDOW", stall_window)[0] if stall_window not in ("", "0") else None
+        self.stall_ratio = float(get("STALL_RATIO", "0.5"))
+
+        # adaptacyjne odpytywanie: aktywne adresy co sweep, uśpione rzadziej (max co MAX_STALENESS s)
+        self.adaptive_polling = get("ADAPTIVE_POLLING", "0") == "1"
+        self.max_staleness = float(get("MAX_STALENESS", "21600"))
+        self.min_poll_interval = float(get("MIN_POLL_INTERVAL", "0"))
+
+        # stan nodów/minerów z hosts.txt (brak pliku = wyłączone)
+        self.hosts_file = get("HOSTS_FILE", "hosts.txt")
+        self.health_timeout = float(get("HEALTH_TIMEOUT", "5"))
+        self.max_block_lag = int(get("MAX_BLOCK_LAG", "20"))       # ile bloków za resztą floty = "lag"
+        self.miner_path = get("MINER_PATH", "/")
+
+        # daemon / eksport; interwały puste = domyślne danego układu
+        self.sweep_interval = get("SWEEP_INTERVAL", "")
+        self.report_interval = get("REPORT_INTERVAL", "")
+        self.metrics_port = int(get("METRICS_PORT", "0") or 0)
+        self.metrics_textfile = get("METRICS_TEXTFILE", "")
+
+    @property
+    def use_bot(self) -> bool:
+        return self.balance_backend != "rpc"
+
+    @property
+    def use_rpc(self) -> bool:
+        return self.balance_backend in ("rpc", "auto")
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Tryb subskrypcji (`sweep --subscribe`): zamiast sweepów co N minut jedno
+połączenie WebSocket z nodem.
+
+  chain_subscribeNewHeads   – numer bloku (do logów i metryk),
+  state_subscribeStorage    – klucze System.Account śledzonych adresów.
+
+Node przysyła wpis storage tylko wtedy, gdy konto się zmieniło, więc do
+historii trafiają wyłącznie zmienione salda, z dokładnością do bloku i bez
+odpytywania. Pierwsze powiadomienie po (ponownym) połączeniu niesie bieżące
+wartości wszystkich kluczy – porównujemy je z ostatnimi znanymi, więc to,
+co zmieniło się w czasie rozłączenia, też trafi do historii (jako jedna zmiana).
+
+Wymaga pakietu websockets (importowany dopiero tutaj, jak telethon w fetch.py).
+"""
+
+import asyncio
+import json
+import time
+from typing import Callable, Dict, List, Optional
+
+from . import metrics
+from .balance import Balance
+from .inventory import Groups
+from .rpc import RpcError, decode_free_balance, ss58_decode, system_account_key
+
+MAX_BACKOFF = 60.0
+
+OnChange = Callable[[Dict[str, int], Optional[int]], None]
+
+
+def ws_url(http_url: str) -> str:
+    """http://host:9944 -> ws://host:9944 (node Substrate ma RPC i WS na jednym porcie)."""
+    if http_url.startswith("https://"):
+        return "wss://" + http_url[len("https://"):]
+    if http_url.startswith("http://"):
+        return "ws://" + http_url[len("http://"):]
+    return http_url
+
+
+class BalanceWatch:
+    """Bieżące salda śledzonych adresów, aktualizowane powiadomieniami noda."""
+
+    def __init__(self, groups: Groups, known: Dict[str, int], decimals: int = 12, unit: str = "QU"):
+        self.decimals = decimals
+        self.unit = unit
+        self.keys: Dict[str, str] = {}          # klucz storage -> adres
+        self.invalid: List[str] = []
+        for _owner, pairs in groups:
+            for _label, addr in pairs:
+                try:
+                    self.keys.setdefault(system_account_key(ss58_decode(addr)), addr)
+                except ValueError:
+                    self.invalid.append(addr)
+        # plancki ostatnio zapisane w historii; Balance dopiero po odczycie z noda
+        tracked = set(self.keys.values())
+        self.known: Dict[str, int] = {a: v for a, v in known.items() if a in tracked}
+        self.balances: Dict[str, Balance] = {}
+        self.best: Optional[int] = None
+        self.synced = False
+
+    def apply(self, changes: list) -> Dict[str, int]:
+        """[[klucz, wartość], ...] z state_storage -> adres -> plancki tylko dla zmienionych kont."""
+        now = time.time()
+        changed = {}
+        for key, value in changes:
+            addr = self.keys.get(key)
+            if addr is None:
+                continue
+            bal = Balance.from_units(addr, decode_free_balance(value), self.decimals, self.unit, ts=now)
+            self.balances[addr] = bal
+            if self.known.get(addr) != bal.planck:
+                self.known[addr] = bal.planck
+                changed[addr] = bal.planck
+        self.synced = True
+        return changed
+
+
+def _import_websockets():
+    try:
+        import websockets
+    except ImportError:
+        raise SystemExit("--subscribe wymaga pakietu websockets (pip install websockets)")
+    return websockets
+
+
+async def _listen(ws, watch: BalanceWatch, on_change: OnChange):
+    await ws.send(json.dumps({"jsonrpc": "2.0", "id": 1, "method": "chain_subscribeNewHeads", "params": []}))
+    await ws.send(json.dumps({"jsonrpc": "2.0", "id": 2, "method": "state_subscribeStorage",
+                              "params": [list(watch.keys)]}))
+    async for raw in ws:
+        msg = json.loads(raw)
+        if "id" in msg:
+            if msg.get("error"):
+                raise RpcError(f"subskrypcja: {msg['error']}")
+            continue
+        result = (msg.get("params") or {}).get("result") or {}
+        method = msg.get("method")
+        if method == "chain_newHead":
+            try:
+                watch.best = int(result.get("number"), 16)
+            except (TypeError, ValueError):
+                continue
+            metrics.SUBSCRIPTION_BLOCK.set(watch.best)
+        elif method == "state_storage":
+            changed = watch.apply(result.get("changes") or [])
+            if changed:
+                metrics.BALANCE_CHANGES.inc(len(changed))
+                on_change(changed, watch.best)
+
+
+async def watch_balances(url: str, watch: BalanceWatch, on_change: OnChange, stop: asyncio.Event, log=None):
+    """
+    Słucha powiadomień do `stop`; po zerwaniu łączy ponownie (backoff 1s, 2s … MAX_BACKOFF).
+    `on_change(adres -> plancki, numer bloku)` dostaje tylko konta, których saldo się zmieniło.
+    """
+    websockets = _import_websockets()
+    delay = 1.0
+    while not stop.is_set():
+        try:
+            async with websockets.connect(url, max_size=None) as ws:
+                if log:
+                    log(f"Subskrypcja: {url}, {len(watch.keys)} adresów")
+                delay = 1.0
+                listener = asyncio.ensure_future(_listen(ws, watch, on_change))
+                stopper = asyncio.ensure_future(stop.wait())
+                try:
+                    await asyncio.wait({listener, stopper}, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    stopper.cancel()
+                    if not listener.done():
+                        listener.cancel()
+                if stop.is_set():
+                    return
+                listener.result()       # błąd z _listen -> except niżej
+                raise ConnectionError("node zamknął połączenie")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if log:
+                log(f"Subskrypcja: {e}, ponowna próba za {delay:.0f}s")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+        delay = min(MAX_BACKOFF, delay * 2)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Indeks czasowy historii: posortowane znaczniki (epoch s) + salda jako floaty
++ pozycja pierwszego wystąpienia każdego adresu.
+
+Indeks budujemy raz z listy wpisów (compute_deltas dla historii bez
+ColumnarHistory), a bazę dla każdego okna znajdujemy bisectem w O(log n).
+"""
+
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+_EMPTY: Dict[str, float] = {}
+
+
+class TimeIndex:
+    __slots__ = ("ts", "balances", "first_seen")
+
+    def __init__(self):
+        self.ts: List[float] = []
+        self.balances: List[Dict[str, float]] = []
+        self.first_seen: Dict[str, int] = {}   # adres -> pozycja w ts
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[dict]) -> "TimeIndex":
+        idx = cls()
+        rows = []
+        for e in entries:
+            try:
+                ts = datetime.fromisoformat(e["ts"]).timestamp()
+                bal = {k: float(v) for k, v in e.get("balances", {}).items()}
+            except (KeyError, TypeError, ValueError):
+                continue
+            rows.append((ts, bal))
+        rows.sort(key=lambda r: r[0])
+        for ts, bal in rows:
+            idx._push(ts, bal)
+        return idx
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def _push(self, ts: float, balances: Dict[str, float]):
+        pos = len(self.ts)
+        self.ts.append(ts)
+        self.balances.append(balances)
+        for addr in balances:
+            if addr not in self.first_seen:
+                self.first_seen[addr] = pos
+
+    def baseline_pos(self, target: float) -> int:
+        """Pozycja ostatniego pomiaru z ts <= target; -1 gdy brak."""
+        return bisect_right(self.ts, target) - 1
+
+    def baseline(self, target: float) -> Dict[str, float]:
+        pos = self.baseline_pos(target)
+        return self.balances[pos] if pos >= 0 else _EMPTY
+
+    def first_seen_ts(self, addr: str) -> Optional[float]:
+        pos = self.first_seen.get(addr)
+        return self.ts[pos] if pos is not None else None
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Okna kroczące (1h … 30d) liczone przyrostowo.
+
+Dla każdego adresu bufor pomiarów (ts, saldo) sięgający najdłuższego okna,
+a dla każdego okna:
+
+  wskaźnik bazy   – ostatni pomiar z ts <= koniec - okno (saldo na początku okna),
+  kolejki min/max – monotoniczne, czoło to min/max od bazy do ostatniego pomiaru.
+
+Dopisanie pomiaru przesuwa wskaźniki i kolejki (zamortyzowane O(1) na okno),
+odczyt Δ / tempa / min / max to O(1) na adres i okno – bez skanowania historii.
+Powtórzone saldo nie jest zapisywane (nie zmienia ani Δ, ani min/max), więc
+bufor uśpionego noda ma jeden wpis.
+
+Okna w WINDOWS (.env): "1h,12h,24h,7d,30d"; jednostki m, h, d, w.
+"""
+
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+Windows = List[Tuple[str, int]]     # (etykieta, minuty) – jak TIMEFRAMES
+
+_UNITS = {"m": 1, "h": 60, "d": 1440, "w": 10080}
+
+
+def parse_windows(spec: str) -> Windows:
+    """'12h,24h,7d' -> [("12h", 720), ("24h", 1440), ("7d", 10080)] – od najkrótszego."""
+    out: Dict[int, str] = {}
+    for part in spec.replace(" ", "").split(","):
+        if not part:
+            continue
+        m = re.fullmatch(r"(\d+)([mhdw])", part.lower())
+        if not m or int(m.group(1)) == 0:
+            raise ValueError(f"niepoprawne okno {part!r} (np. 1h, 12h, 7d)")
+        out.setdefault(int(m.group(1)) * _UNITS[m.group(2)], part.lower())
+    if not out:
+        raise ValueError("brak okien")
+    return [(label, mins) for mins, label in sorted(out.items())]
+
+
+class WindowStats(NamedTuple):
+    start: float        # saldo na początku okna
+    delta: float        # saldo teraz - start
+    rate: float         # Δ na godzinę
+    low: float
+    high: float
+
+
+class _Series:
+    """Pomiary jednego adresu; indeksy bezwzględne (od pierwszego pomiaru), bufor ucinany z przodu."""
+
+    __slots__ = ("ts", "vals", "dropped", "end", "base", "lows", "highs")
+
+    def __init__(self, n_windows: int):
+        self.ts = array("d")
+        self.vals = array("d")
+        self.dropped = 0                    # ile pomiarów ucięto z przodu bufora
+        self.end = float("-inf")            # do kiedy przesunięto okna
+        self.base = [0] * n_windows         # indeks bazy każdego okna
+        self.lows = [deque() for _ in range(n_windows)]
+        self.highs = [deque() for _ in range(n_windows)]
+
+    @classmethod
+    def load(cls, ts: Sequence[float], vals: Sequence[float], spans: List[float]) -> Optional["_Series"]:
+        """
+        Cała kolumna naraz (NaN = brak pomiaru) – ten sam stan co push + advance
+        pomiar po pomiarze. Kolejki min/max to kolejne nowe minima/maksima
+        liczone od końca; krótsze okno bierze z nich sufiks od swojej bazy.
+        """
+        s = cls(len(spans))
+        end = None
+        for t, v in zip(ts, vals):
+            if v != v:
+                continue
+            end = t
+            if not s.vals or v != s.vals[-1]:
+                s.ts.append(t)
+                s.vals.append(v)
+        if end is None:
+            return None
+        lows: List[int] = []
+        highs: List[int] = []
+        for i in range(len(s.vals) - 1, -1, -1):
+            v = s.vals[i]
+            if not lows or v < s.vals[lows[-1]]:
+                lows.append(i)
+            if not highs or v > s.vals[highs[-1]]:
+                highs.append(i)
+        lows.reverse()
+        highs.reverse()
+        s.end = end
+        for k, span in enumerate(spans):
+            p = max(0, bisect_right(s.ts, end - span) - 1)
+            s.base[k] = p
+            s.lows[k] = deque(lows[bisect_left(lows, p):])
+            s.highs[k] = deque(highs[bisect_left(highs, p):])
+        return s
+
+    def value(self, idx: int) -> float:
+        return self.vals[idx - self.dropped]
+
+    def push(self, ts: float, v: float):
+        idx = self.dropped + len(self.vals)
+        self.ts.append(ts)
+        self.vals.append(v)
+        for lows, highs in zip(self.lows, self.highs):
+            while lows and self.value(lows[-1]) >= v:
+                lows.pop()
+            lows.append(idx)
+            while highs and self.value(highs[-1]) <= v:
+                highs.pop()
+            highs.append(idx)
+
+    def advance(self, end: float, spans: List[float]):
+        """Przesuwa bazy okien do `end`; czasu nie cofamy."""
+        if end <= self.end:
+            return
+        self.end = end
+        last = self.dropped + len(self.ts) - 1
+        for k, span in enumerate(spans):
+            start = end - span
+            p = self.base[k]
+            while p < last and self.ts[p + 1 - self.dropped] <= start:
+                p += 1
+            self.base[k] = p
+            lows, highs = self.lows[k], self.highs[k]
+            while lows[0] < p:
+                lows.popleft()
+            while highs[0] < p:
+                highs.popleft()
+        # najdłuższe okno ma najstarszą bazę – wszystko przed nią jest już zbędne
+        cut = self.base[-1] - self.dropped
+        if cut > 64 and cut * 2 > len(self.ts):
+            del self.ts[:cut]
+            del self.vals[:cut]
+            self.dropped += cut
+
+
+class WindowEngine:
+    def __init__(self, windows: Windows, start: float = float("-inf")):
+        self.windows = list(windows)
+        self.spans = [mins * 60.0 for _label, mins in self.windows]
+        self.start = start                  # od kiedy engine zna salda (baza zbudowana z historii)
+        self.series: Dict[str, _Series] = {}
+
+    @classmethod
+    def from_rows(cls, windows: Windows, start: float,
+                  rows: Iterable[Tuple[float, Dict[str, float]]]) -> "WindowEngine":
+        """`rows`: (ts, adres -> saldo) od najstarszego; pierwszy to zwykle stan na `start`."""
+        engine = cls(windows, start)
+        for ts, balances in rows:
+            engine.append(ts, balances)
+        return engine
+
+    @classmethod
+    def from_columns(cls, windows: Windows, start: float, ts: Sequence[float],
+                     columns: Iterable[Tuple[str, Sequence[float]]]) -> "WindowEngine":
+        """
+        Jak from_rows, ale z kolumn macierzy historii: `ts` rosnąco, `columns`
+        to (adres, salda przy tych ts), NaN = brak pomiaru. Bez słownika na wiersz.
+        """
+        engine = cls(windows, start)
+        for addr, vals in columns:
+            s = _Series.load(ts, vals, engine.spans)
+            if s is not None:
+                engine.series[addr] = s
+        return engine
+
+    def __contains__(self, addr: str) -> bool:
+        return addr in self.series
+
+    def append(self, ts: float, balances: Dict[str, float]):
+        """Pomiar (może być rzadki – tylko część adresów); starsze niż ostatni są pomijane."""
+        for addr, v in balances.items():
+            s = self.series.get(addr)
+            if s is None:
+                s = self.series[addr] = _Series(len(self.spans))
+            elif ts < s.ts[-1]:
+                continue
+            if not s.ts or v != s.vals[-1]:
+                s.push(ts, float(v))
+            s.advance(ts, self.spans)
+
+    def stats(self, addr: str, end: Optional[float] = None) -> Dict[str, Optional[WindowStats]]:
+        """
+        Etykieta okna -> WindowStats albo None (adres młodszy niż okno).
+        `end` przesuwa okna do tej chwili (saldo od ostatniego pomiaru stałe).
+        """
+        s = self.series.get(addr)
+        if s is None:
+            return {label: None for label, _ in self.windows}
+        if end is not None:
+            s.advance(end, self.spans)
+        end = s.end
+        now_v = s.vals[-1]
+        out: Dict[str, Optional[WindowStats]] = {}
+        for k, (label, _mins) in enumerate(self.windows):
+            span = self.spans[k]
+            p = s.base[k]
+            if s.ts[p - s.dropped] > end - span:
+                out[label] = None
+                continue
+            start = s.value(p)
+            delta = now_v - start
+            low, high = s.value(s.lows[k][0]), s.value(s.highs[k][0])
+            out[label] = WindowStats(start, delta, delta * 3600.0 / span, low, high)
+        return out
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+import hashlib
+
+import pytest
+
+from quantus_monitor.rpc import B58_ALPHABET
+
+
+def ss58_encode(account: bytes, prefix: int = 189) -> str:
+    """AccountId -> q-adres (prefiks dwubajtowy, jak w sieci Quantus)."""
+    body = bytes([((prefix & 0xFC) >> 2) | 0x40, (prefix >> 8) | ((prefix & 3) << 6)]) + account
+    data = body + hashlib.blake2b(b"SS58PRE" + body, digest_size=64).digest()[:2]
+    n = int.from_bytes(data, "big")
+    out = ""
+    while n:
+        n, r = divmod(n, 58)
+        out = B58_ALPHABET[r] + out
+    return "1" * (len(data) - len(data.lstrip(b"\0"))) + out
+
+
+def account_info(free: int, reserved: int = 7) -> str:
+    """AccountInfo (SCALE): 4 x u32, potem free/reserved/frozen/flags jako u128 little-endian."""
+    raw = (1).to_bytes(4, "little") * 4
+    raw += free.to_bytes(16, "little") + reserved.to_bytes(16, "little") + bytes(32)
+    return "0x" + raw.hex()
+
+
+@pytest.fixture
+def address():
+    """address(i) -> poprawny, deterministyczny q-adres."""
+    return lambda i: ss58_encode(hashlib.sha256(str(i).encode()).digest())
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""Adaptacyjne odpytywanie: tempo zmian z historii, interwał i podział na due/skipped."""
+
+from quantus_monitor.adaptive import change_rate, plan_polls, poll_interval
+
+HOUR = 3600.0
+
+
+class _History:
+    def __init__(self, series):
+        self._series = series
+
+    def series(self, addr, since):
+        return [(ts, v) for ts, v in self._series.get(addr, []) if ts >= since]
+
+
+def test_change_rate_counts_changes_per_second():
+    assert change_rate([]) is None
+    assert change_rate([(0.0, 1.0)]) is None
+    assert change_rate([(5.0, 1.0), (5.0, 2.0)]) is None           # zerowy czas obserwacji
+    assert change_rate([(0.0, 1.0), (HOUR, 1.0), (2 * HOUR, 1.0)]) == 0.0
+    assert change_rate([(0.0, 1.0), (HOUR, 2.0), (2 * HOUR, 2.0), (4 * HOUR, 3.0)]) == 2 / (4 * HOUR)
+
+
+def test_poll_interval_is_half_the_mean_gap_clamped():
+    assert poll_interval(None, 60, 6 * HOUR) == 0.0                 # bez historii – zawsze
+    assert poll_interval(0.0, 60, 6 * HOUR) == 6 * HOUR             # uśpiony – co MAX_STALENESS
+    assert poll_interval(1 / (2 * HOUR), 60, 6 * HOUR) == HOUR
+    assert poll_interval(1.0, 60, 6 * HOUR) == 60                   # nie częściej niż MIN_POLL_INTERVAL
+    assert poll_interval(1 / (100 * HOUR), 60, 6 * HOUR) == 6 * HOUR
+
+
+def test_plan_polls_splits_due_and_skipped():
+    now = 100 * HOUR
+    history = _History({
+        # zmiana co godzinę -> interwał 30 min; ostatni pomiar 10 min temu
+        "qzBusy": [(now - (9 - i) * HOUR - 600, float(i)) for i in range(10)],
+        # stoi od 2 dni, ostatni pomiar 1h temu -> pomijany (co 6h)
+        "qzIdle": [(now - 49 * HOUR, 5.0), (now - HOUR, 5.0)],
+        # stoi, ale ostatni pomiar 7h temu -> due
+        "qzStale": [(now - 30 * HOUR, 5.0), (now - 7 * HOUR, 5.0)],
+        # jedyny pomiar poza oknem 3 dni -> jak bez historii
+        "qzOld": [(now - 80 * HOUR, 1.0)],
+    })
+    plan = plan_polls(history, ["qzBusy", "qzIdle", "qzStale", "qzOld", "qzNew"], now, min_interval=60)
+    assert plan.due == ["qzStale", "qzOld", "qzNew"]
+    assert plan.skipped == {"qzBusy": (now - 600, 9.0), "qzIdle": (now - HOUR, 5.0)}
+    assert plan.intervals["qzBusy"] == HOUR / 2 and plan.intervals["qzIdle"] == 6 * HOUR
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Analiza zarobków floty: zgodność numpy z czystym Pythonem i alerty stall / low."""
+
+import math
+import random
+
+import pytest
+
+from quantus_monitor import analytics
+from quantus_monitor.analytics import NodeStats, find_alerts
+
+NAN = float("nan")
+HOUR = 3600.0
+END = 100 * HOUR
+SPAN = 6 * HOUR
+
+
+def _fleet(seed=1, rows=60, cols=12):
+    """Salda rosnące w różnym tempie, z dziurami (NaN) i jednym adresem młodszym niż okno."""
+    rng = random.Random(seed)
+    ts = sorted(END - 2 * SPAN - HOUR + rng.uniform(0, 2 * SPAN + HOUR) for _ in range(rows - 1)) + [END]
+    m = []
+    for r, t in enumerate(ts):
+        row = []
+        for c in range(cols):
+            if c == cols - 1 and t < END - SPAN / 2:
+                row.append(NAN)                                     # adres dołączył w połowie okna
+            elif r and rng.random() < 0.3:
+                row.append(NAN)                                     # brak pomiaru w tym wierszu
+            else:
+                row.append(1000.0 + c * 3 + (t - ts[0]) / HOUR * (c % 4) * 0.25)
+        m.append(row)
+    return ts, m
+
+
+def test_numpy_and_python_agree():
+    np = pytest.importorskip("numpy")
+    ts, m = _fleet()
+    got_np = analytics._stats_numpy(np, ts, m, END, SPAN)
+    got_py = analytics._stats_python(ts, m, END, SPAN)
+
+    assert got_py[-1] is None and got_np[-1] is None
+    assert len(got_np) == len(got_py)
+    for a, b in zip(got_np[:-1], got_py[:-1]):
+        for x, y in zip(a, b):
+            assert math.isclose(x, y, rel_tol=1e-9, abs_tol=1e-9)
+
+
+def test_python_stats_without_numpy(monkeypatch):
+    monkeypatch.setattr(analytics, "_NUMPY", [None])
+    ts = [END - 2 * SPAN, END - SPAN, END - SPAN / 2, END]
+    m = [[10.0, 5.0], [12.0, 5.0], [NAN, 5.0], [14.0, 5.0]]
+    flat, rising = analytics.fleet_stats(ts, m, END, SPAN)[::-1]
+    assert rising.earned == 2.0 and rising.earned_prev == 2.0
+    assert math.isclose(rising.rate, 2.0 / 6)
+    assert (flat.rate, flat.earned, flat.earned_prev) == (0.0, 0.0, 0.0)
+
+
+def test_find_alerts_stall_and_low():
+    stats = {
+        "a": NodeStats(rate=1.0, earned=6.0, earned_prev=6.0),
+        "b": NodeStats(rate=1.2, earned=7.0, earned_prev=6.0),
+        "c": NodeStats(rate=0.1, earned=0.6, earned_prev=6.0),      # low: < 0.5 × mediana
+        "d": NodeStats(rate=0.0, earned=0.0, earned_prev=5.0),      # stall: stoi, wcześniej rosło
+        "e": None,                                                  # młodszy niż okno
+        "x": NodeStats(rate=0.0, earned=0.0, earned_prev=0.0),
+    }
+    groups = [("g", [("n1", "a"), ("n2", "b"), ("n3", "c"), ("n4", "d"), ("n5", "e")]),
+              ("solo", [("s1", "x")])]                              # sam w grupie i nigdy nie rósł
+
+    alerts = find_alerts(stats, groups, SPAN, 0.5)
+    assert [(a.kind, a.group, a.label) for a in alerts] == [("low", "g", "n3"), ("stall", "g", "n4")]
+    stall = alerts[1]
+    assert (stall.earned, stall.earned_prev) == (0.0, 5.0)
+    assert math.isclose(stall.expected, 0.55 * 6)                   # mediana tempa grupy × 6 h
+
+
+def test_low_needs_a_big_enough_group():
+    stats = {"a": NodeStats(1.0, 6.0, 6.0), "b": NodeStats(0.1, 0.6, 0.6)}
+    assert find_alerts(stats, [("g", [("n1", "a"), ("n2", "b")])], SPAN, 0.5) == []
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Salda w planckach: parsowanie tekstu bota, formatowanie i rekord Balance bez floatów."""
+
+import pytest
+
+from quantus_monitor.balance import (
+    ERROR, FLOOD, ONE, TIMEOUT, Balance, format_fixed, format_planck, looks_like_placeholder, parse_q_amount,
+)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Balance: 1234.56 QU", (1_234_560_000_000_000, "QU")),
+    ("Saldo: 1 234,56 qnt", (1_234_560_000_000_000, "QNT")),
+    ("1,234.5 QU", (1_234_500_000_000_000, "QU")),
+    ("0.000000000001 QU", (1, "QU")),
+    ("0.0000000000019 QU", (1, "QU")),                              # ponad 12 miejsc – ucięte
+    ("Brak salda", None),
+    ("", None),
+])
+def test_parse_q_amount(text, expected):
+    assert parse_q_amount(text) == expected
+
+
+def test_large_amounts_survive_parse_and_format_exactly():
+    planck = 2 ** 53 * ONE + 1                                      # poza precyzją float64
+    text = format_planck(planck)
+    assert text == "9007199254740992.000000000001 QU"
+    assert parse_q_amount(text) == (planck, "QU")
+    for planck in (0, 1, ONE - 1, ONE, 123_456_789_012_345_678_901):
+        assert parse_q_amount(format_planck(planck, "QNT")) == (planck, "QNT")
+
+
+def test_format_fixed_rounds_half_away_from_zero():
+    assert format_fixed(1_234_550_000_000_000, 1) == "1234.6"
+    assert format_fixed(-1_234_550_000_000_000, 1) == "-1234.6"
+    assert format_fixed(-40_000_000_000, 1) == "0.0"                 # bez "-0.0"
+    assert format_fixed(2_500_000_000_000, 0) == "3"
+
+
+def test_balance_record():
+    assert str(Balance.parse("1234.5 QU", "qzA")) == "1234.5 QU"
+    assert [Balance.parse(t).status for t in ("—", "FloodWait", "ERROR: timeout", "bzdura")] == \
+        [TIMEOUT, FLOOD, ERROR, ERROR]
+    failed = Balance.failed("qzA", FLOOD)
+    assert not failed.ok and failed.amount == 0 and str(failed) == "FloodWait"
+    assert Balance("qzA").status == ERROR                            # OK bez kwoty nie istnieje
+    assert Balance.from_units("qzA", 5, 10).planck == 500
+    assert Balance.from_units("qzA", 12_345, 15).planck == 12
+    assert looks_like_placeholder("/balance qzA") and looks_like_placeholder("Checking balance...")
+    assert not looks_like_placeholder("Balance: 5 QU")
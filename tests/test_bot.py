@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""Przypisywanie odpowiedzi bota do komend (ReplyDispatcher) na FakeClient z bench.py."""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("telethon")
+
+from telethon.errors.rpcerrorlist import FloodWaitError  # noqa: E402
+
+from quantus_monitor import peers  # noqa: E402
+from quantus_monitor.bench import FakeBot, FakeClient, _Message  # noqa: E402
+from quantus_monitor.bot import ReplyDispatcher  # noqa: E402
+from quantus_monitor.fetch import fetch_balances, parse_bot_reply  # noqa: E402
+from quantus_monitor.settings import Settings  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _fresh_peers(monkeypatch):
+    monkeypatch.setattr(peers, "_MEMORY", {})
+
+
+class ScriptedClient(FakeClient):
+    """Bot nie odpowiada sam – test decyduje, co i kiedy przychodzi."""
+
+    def __init__(self):
+        super().__init__(FakeBot())
+        self.sent = []
+
+    async def send_message(self, _entity, text: str) -> _Message:
+        sent = _Message(next(self._ids), text, 0)
+        self.sent.append(sent)
+        return sent
+
+
+def _planck(text: str) -> int:
+    return parse_bot_reply(text)[0]
+
+
+async def _attach(client) -> ReplyDispatcher:
+    return await ReplyDispatcher.attach(client, "QuantusFaucetBot", parse_bot_reply)
+
+
+async def _until_sent(client, n: int):
+    while len(client.sent) < n:
+        await asyncio.sleep(0)
+
+
+def test_replies_are_matched_by_reply_to_id_out_of_order():
+    async def run():
+        client = ScriptedClient()
+        disp = await _attach(client)
+        asks = [asyncio.ensure_future(disp.ask(f"/balance A{i}", f"A{i}", 1.0)) for i in range(3)]
+        await _until_sent(client, 3)
+        for sent in reversed(client.sent):
+            await client.deliver(f"Balance: {sent.id} QU", sent.id)
+        return await asyncio.gather(*asks), [s.id for s in client.sent]
+
+    results, ids = asyncio.run(run())
+    assert [got[0] for got in results] == [_planck(f"Balance: {i} QU") for i in ids]
+
+
+def test_reply_is_matched_by_address_in_text():
+    async def run():
+        client = ScriptedClient()
+        disp = await _attach(client)
+        a = asyncio.ensure_future(disp.ask("/balance qzA", "qzA", 1.0))
+        b = asyncio.ensure_future(disp.ask("/balance qzB", "qzB", 1.0))
+        await _until_sent(client, 2)
+        await client.deliver("Balance of qzB: 2 QU")
+        await client.deliver("Balance of qzA: 1 QU")
+        return await a, await b
+
+    a, b = asyncio.run(run())
+    assert (a[0], b[0]) == (_planck("Balance: 1 QU"), _planck("Balance: 2 QU"))
+
+
+def test_placeholder_is_ignored_and_timeout_returns_none():
+    async def run():
+        client = ScriptedClient()
+        disp = await _attach(client)
+        pending = asyncio.ensure_future(disp.ask("/balance qzA", "qzA", 0.05))
+        await _until_sent(client, 1)
+        await client.deliver("Checking balance of qzA...", client.sent[0].id)
+        return await pending, disp
+
+    got, disp = asyncio.run(run())
+    assert got is None
+    assert not disp._pending and not disp._by_msg_id
+
+
+def test_concurrent_attach_looks_up_the_bot_once():
+    class SlowLookup(ScriptedClient):
+        lookups = 0
+
+        async def get_input_entity(self, username):
+            self.lookups += 1
+            await asyncio.sleep(0.01)
+            return await super().get_input_entity(username)
+
+    async def run():
+        client = SlowLookup()
+        disps = await asyncio.gather(*(_attach(client) for _ in range(5)))
+        return client, disps
+
+    client, disps = asyncio.run(run())
+    assert client.lookups == 1 and len(client._handlers) == 1
+    assert all(d is disps[0] for d in disps)
+
+
+@pytest.mark.parametrize("max_in_flight", [1, 4])
+def test_anonymous_out_of_order_replies_are_never_misattributed(tmp_path, monkeypatch, max_in_flight):
+    monkeypatch.chdir(tmp_path)
+    bot = FakeBot(latency=0.01, jitter=0.009, placeholder=False, tail=1.5, seed=3, anonymous=True)
+    pairs = [(f"n{i}", f"qzTest{i:04d}") for i in range(40)]
+    cfg = Settings({
+        "BALANCE_BACKEND": "bot", "BALANCE_CACHE_TTL": "0", "DELAY_BETWEEN": "0.001", "BURST": "10",
+        "MAX_IN_FLIGHT": str(max_in_flight), "REPLY_TIMEOUT": "1", "REPLY_TIMEOUT_MIN": "0.05",
+        "RETRY_ROUNDS": "3", "RETRY_BACKOFF": "0.01", "SWEEP_RESUME_MAX_AGE": "0",
+    })
+
+    rows = asyncio.run(fetch_balances(FakeClient(bot), pairs, cfg))
+
+    wrong = [addr for _label, addr, bal in rows if bal.ok and bal.planck != bot.expected(addr)]
+    assert wrong == []
+    assert sum(1 for _label, _addr, bal in rows if bal.ok) >= 38
+
+
+def test_zero_delay_between_means_no_rate_limit(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bot = FakeBot(latency=0.01, placeholder=False)
+    cfg = Settings({
+        "BALANCE_BACKEND": "bot", "BALANCE_CACHE_TTL": "0", "DELAY_BETWEEN": "0", "BURST": "1",
+        "MAX_IN_FLIGHT": "8", "REPLY_TIMEOUT": "2", "SWEEP_RESUME_MAX_AGE": "0",
+    })
+    pairs = [(f"n{i}", f"qzTest{i:04d}") for i in range(16)]
+
+    rows = asyncio.run(asyncio.wait_for(fetch_balances(FakeClient(bot), pairs, cfg), 5))
+    assert [bal.planck for _label, _addr, bal in rows] == [bot.expected(addr) for _label, addr in pairs]
+
+
+def test_anonymous_reply_with_several_pending_is_dropped():
+    async def run():
+        client = ScriptedClient()
+        disp = await _attach(client)
+        asks = [asyncio.ensure_future(disp.ask(f"/balance A{i}", f"A{i}", 5.0)) for i in range(3)]
+        await _until_sent(client, 3)
+        await client.deliver("Balance: 7 QU")
+        return await asyncio.gather(*asks), disp
+
+    results, disp = asyncio.run(run())
+    assert results == [None, None, None]
+    assert disp.serial
+
+
+def test_late_anonymous_reply_after_timeout_goes_nowhere():
+    async def run():
+        client = ScriptedClient()
+        disp = await _attach(client)
+        first = asyncio.ensure_future(disp.ask("/balance A", "A", 1.0))
+        await _until_sent(client, 1)
+        await client.deliver("Balance: 1 QU")
+        assert (await first)[0] == _planck("Balance: 1 QU")
+        assert disp.serial
+
+        assert await disp.ask("/balance B", "B", 0.05) is None        # B: timeout
+        nxt = asyncio.ensure_future(disp.ask("/balance C", "C", 1.0))
+        await asyncio.sleep(0.01)
+        assert len(client.sent) == 2                                   # C czeka na spóźnioną odpowiedź B
+        await client.deliver("Balance: 2 QU")                          # ...która przychodzi
+        await _until_sent(client, 3)
+        await client.deliver("Balance: 3 QU")
+        return await nxt
+
+    assert asyncio.run(run())[0] == _planck("Balance: 3 QU")
+
+
+def test_hedged_duplicate_reply_is_not_reassigned():
+    async def run():
+        client = ScriptedClient()
+        disp = await _attach(client)
+        hedged = asyncio.ensure_future(disp.ask("/balance A", "A", 1.0, hedge_after=0.01))
+        await _until_sent(client, 2)                                   # komenda + hedge
+        first_id, second_id = client.sent[0].id, client.sent[1].id
+        await client.deliver("Balance: 1 QU", second_id)
+        got_a = await hedged
+
+        other = asyncio.ensure_future(disp.ask("/balance B", "B", 1.0))
+        await _until_sent(client, 3)
+        await client.deliver("Balance: 1 QU", first_id)               # spóźniony duplikat A
+        await asyncio.sleep(0)
+        assert not other.done()
+        await client.deliver("Balance: 2 QU", client.sent[2].id)
+        return got_a, await other
+
+    got_a, got_b = asyncio.run(run())
+    assert got_a[0] == _planck("Balance: 1 QU")
+    assert got_b[0] == _planck("Balance: 2 QU")
+
+
+@pytest.mark.parametrize("flood_in", ["send", "before_hedge"])
+def test_flood_wait_on_hedge_keeps_waiting_for_first_command(flood_in):
+    bot = FakeBot(latency=0.1, placeholder=False, flood_every=2 if flood_in == "send" else 0)
+
+    async def before_hedge():
+        if flood_in == "before_hedge":
+            raise FloodWaitError(request=None, capture=30)
+
+    async def run():
+        disp = await _attach(FakeClient(bot))
+        got = await disp.ask("/balance qzA", "qzA", 1.0, hedge_after=0.02, before_hedge=before_hedge)
+        return got, disp
+
+    got, disp = asyncio.run(run())
+    assert got[0] == bot.expected("qzA")
+    assert bot.commands == (2 if flood_in == "send" else 1)
+    assert not disp._pending and not disp._by_msg_id
+
+
+def test_late_reply_with_address_is_dropped_not_fifo():
+    async def run():
+        client = ScriptedClient()
+        disp = await _attach(client)
+        assert await disp.ask("/balance qzA", "qzA", 0.02) is None
+        other = asyncio.ensure_future(disp.ask("/balance qzB", "qzB", 1.0))
+        await _until_sent(client, 2)
+        await client.deliver("Balance of qzA: 5 QU")
+        await asyncio.sleep(0)
+        assert not other.done()
+        await client.deliver("Balance of qzB: 6 QU")
+        return await other, disp
+
+    got, disp = asyncio.run(run())
+    assert got[0] == _planck("Balance: 6 QU")
+    assert not disp.serial
+
+
+def test_reply_before_send_returns_is_kept():
+    class EagerClient(ScriptedClient):
+        async def send_message(self, entity, text):
+            sent = await super().send_message(entity, text)
+            await self.deliver("Balance: 4 QU", sent.id)     # odpowiedź przed powrotem send_message
+            return sent
+
+    async def run():
+        client = EagerClient()
+        disp = await _attach(client)
+        return await disp.ask("/balance A", "A", 0.5)
+
+    assert asyncio.run(run())[0] == _planck("Balance: 4 QU")
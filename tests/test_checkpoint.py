@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Checkpoint sweepa: zapis wyników na bieżąco i wznowienie przerwanego sweepa."""
+
+import asyncio
+import time
+
+import pytest
+
+from quantus_monitor.balance import ERROR, Balance, parse_q_amount
+from quantus_monitor.checkpoint import SweepCheckpoint
+
+
+def test_records_only_good_balances_and_skips_torn_line(tmp_path):
+    path = tmp_path / "sweep.ckpt"
+    ckpt = SweepCheckpoint(str(path), max_age=600)
+    now = time.time()
+    ckpt.record({"qzA": Balance("qzA", 10, ts=now), "qzB": Balance.failed("qzB", ERROR)})
+    with open(path, "a") as f:
+        f.write('["qzC", 3')                                      # przerwany zapis
+    ckpt.record({"qzD": Balance("qzD", 40, ts=now)})
+
+    got = ckpt.load(now)
+    assert {a: b.planck for a, b in got.items()} == {"qzA": 10, "qzD": 40}
+
+    assert ckpt.load(now + 601) == {}                               # za stare
+    ckpt.clear()
+    assert ckpt.load(now) == {} and not path.exists()
+
+
+def test_disabled_checkpoint_writes_nothing(tmp_path):
+    ckpt = SweepCheckpoint(str(tmp_path / "sweep.ckpt"), max_age=0)
+    ckpt.record({"qzA": Balance("qzA", 1, ts=time.time())})
+    assert not ckpt.path.exists() and ckpt.load() == {}
+
+
+def test_interrupted_sweep_resumes_without_asking_again(tmp_path, monkeypatch):
+    pytest.importorskip("telethon")
+    from quantus_monitor.bench import FakeBot, FakeClient
+    from quantus_monitor.fetch import fetch_groups
+    from quantus_monitor.settings import Settings
+
+    monkeypatch.chdir(tmp_path)
+    cfg = Settings({
+        "BALANCE_BACKEND": "bot", "BALANCE_CACHE_TTL": "0", "DELAY_BETWEEN": "0.001", "BURST": "10",
+        "MAX_IN_FLIGHT": "2", "REPLY_TIMEOUT": "2", "RETRY_ROUNDS": "0", "SWEEP_RESUME_MAX_AGE": "600",
+    })
+    groups = [("g", [(f"n{i}", f"qzTest{i:04d}") for i in range(24)])]
+    ckpt = SweepCheckpoint(str(tmp_path / "sweep.ckpt"), cfg.sweep_resume_max_age)
+
+    first = FakeBot(latency=0.05, placeholder=False)
+    with pytest.raises(asyncio.TimeoutError):                       # "crash" w połowie sweepa
+        asyncio.run(asyncio.wait_for(fetch_groups([FakeClient(first)], groups, cfg, checkpoint=ckpt), 0.25))
+    done = ckpt.load()
+    assert 0 < len(done) < 24
+
+    second = FakeBot(latency=0.01, placeholder=False)
+    ((_owner, rows),) = asyncio.run(fetch_groups([FakeClient(second)], groups, cfg, checkpoint=ckpt))
+    assert second.commands == 24 - len(done)
+    assert all(bal.ok and (bal.planck, bal.unit) == parse_q_amount(f"{second.balance(addr)} QU")
+               for _label, addr, bal in rows)
+    assert len(ckpt.load()) == 24
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""CLI: `history` tylko czyta historię – bez niej nic nie tworzy na dysku."""
+
+from datetime import datetime
+
+import pytest
+
+from quantus_monitor import cli
+from quantus_monitor.columnar import ColumnarHistory
+from quantus_monitor.groups import HISTORY_COL_DIR
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in ("MONITOR_LAYOUT", "WINDOWS", "STALL_WINDOW"):
+        monkeypatch.delenv(name, raising=False)
+    return tmp_path
+
+
+@pytest.mark.parametrize("layout", cli.LAYOUTS)
+@pytest.mark.parametrize("node", [[], ["qzA"]])
+def test_history_without_history_creates_nothing(workdir, capsys, layout, node):
+    assert cli.main(["history", "--layout", layout] + node) == 1
+    assert "Brak historii" in capsys.readouterr().out
+    assert list(workdir.iterdir()) == []
+
+
+def test_history_info_reads_existing_store(workdir, capsys):
+    store = ColumnarHistory(HISTORY_COL_DIR)
+    store.append({"qzA": 1.5}, datetime(2026, 3, 1, 12, 0))
+    store.close()
+    before = sorted(p.name for p in (workdir / HISTORY_COL_DIR).iterdir())
+
+    assert cli.main(["history", "--layout", "groups"]) == 0
+    out = capsys.readouterr().out
+    assert "warstwa raw" in out and "1 wierszy" in out
+    assert sorted(p.name for p in (workdir / HISTORY_COL_DIR).iterdir()) == before
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""ColumnarHistory: przerwane zapisy, poszerzanie o nowe kolumny, rollup raw -> 1h -> 1d."""
+
+import math
+import os
+from datetime import datetime, timedelta
+
+from quantus_monitor.balance import ONE
+from quantus_monitor.columnar import ColumnarHistory
+from quantus_monitor.groups import compute_deltas
+
+T0 = datetime(2026, 1, 1)
+
+
+def _store(path, raw_days=None, hourly_days=None):
+    return ColumnarHistory(
+        str(path),
+        raw_retention=timedelta(days=raw_days) if raw_days else None,
+        hourly_retention=timedelta(days=hourly_days) if hourly_days else None,
+        daily_retention=None,
+    )
+
+
+def test_torn_header_leaves_store_usable(tmp_path):
+    store = _store(tmp_path)
+    store.append({"qzA": 1.0, "qzB": 2.0, "qzC": 3.0}, T0)
+    store.close()
+    raw = tmp_path / "raw.f64"
+    os.truncate(raw, 20)                 # przerwany pierwszy zapis: pół nagłówka
+
+    store = _store(tmp_path)
+    assert len(store) == 0
+    store.append({"qzA": 5.0}, T0 + timedelta(minutes=5))
+    store.close()
+
+    store = _store(tmp_path)
+    assert store.latest() == {"qzA": 5.0}
+    store.close()
+
+
+def test_torn_last_row_is_dropped(tmp_path):
+    store = _store(tmp_path)
+    store.append({"qzA": 1.0, "qzB": 2.0}, T0)
+    store.append({"qzA": 3.0, "qzB": 4.0}, T0 + timedelta(minutes=5))
+    store.close()
+    raw = tmp_path / "raw.f64"
+    os.truncate(raw, raw.stat().st_size - 4)
+    torn_size = raw.stat().st_size
+
+    readonly = ColumnarHistory(str(tmp_path), readonly=True)       # np. `history` w trakcie zapisu daemona
+    assert len(readonly) == 1 and readonly.latest() == {"qzA": 1.0, "qzB": 2.0}
+    readonly.close()
+    assert raw.stat().st_size == torn_size
+
+    store = _store(tmp_path)
+    assert len(store) == 1
+    assert store.latest() == {"qzA": 1.0, "qzB": 2.0}
+    store.append({"qzA": 6.0}, T0 + timedelta(minutes=10))
+    assert store.latest() == {"qzA": 6.0, "qzB": 2.0}
+    store.close()
+
+
+def test_new_address_widens_existing_rows(tmp_path):
+    store = _store(tmp_path)
+    for i in range(10):
+        store.append({"qzA": float(i)}, T0 + timedelta(minutes=5 * i))
+    store.append({"qzA": 10.0, "qzB": 100.0}, T0 + timedelta(minutes=50))
+    assert store.tiers["raw"].width == 3
+    assert store.series("qzA") == [((T0 + timedelta(minutes=5 * i)).timestamp(), float(i)) for i in range(11)]
+    assert store.series("qzB") == [((T0 + timedelta(minutes=50)).timestamp(), 100.0)]
+    store.close()
+
+
+def test_rollup_moves_old_rows_to_hourly_and_daily(tmp_path):
+    store = _store(tmp_path, raw_days=2, hourly_days=4)
+    step = timedelta(minutes=10)
+    n = 6 * 24 * 7                       # tydzień co 10 min
+    for i in range(n):
+        bal = {"qzA": float(i)}
+        if i % 2:
+            bal["qzB"] = float(-i)       # rzadkie wiersze: qzB co drugi pomiar
+        if i == n // 2:
+            bal["qzC"] = 1.0             # nowa kolumna w połowie
+        store.append(bal, T0 + step * i)
+    now = T0 + step * n
+    latest = store.latest()
+
+    store.rollup(now)
+
+    raw, hourly, daily = (store.tiers[name] for name in ("raw", "1h", "1d"))
+    raw_cutoff = (now - timedelta(days=2)).replace(hour=0, minute=0).timestamp()
+    hourly_cutoff = (now - timedelta(days=4)).replace(hour=0, minute=0).timestamp()
+    assert raw.ts(0) >= raw_cutoff
+    assert hourly.ts(0) >= hourly_cutoff and hourly.ts(hourly.rows - 1) < raw_cutoff
+    assert daily.ts(daily.rows - 1) < hourly_cutoff
+    assert store.latest() == latest
+
+    # 1h: ostatnia wartość z każdej godziny (qzB z ostatniego wiersza, który ją miał)
+    for r in range(hourly.rows):
+        ts = hourly.ts(r)
+        i = round((ts - T0.timestamp()) / step.total_seconds())
+        assert (T0 + step * i).minute == 50
+        row = hourly.row(r)
+        assert row[0] == float(i)
+        assert row[1] == float(-i)
+    # 1d: ostatni pomiar dnia
+    for r in range(daily.rows):
+        assert datetime.fromtimestamp(daily.ts(r)).strftime("%H:%M") == "23:50"
+
+    # po rollupie baseline sprzed granicy raw czyta z 1h: ostatni pomiar poprzedniej godziny
+    t = (T0 + timedelta(days=3, hours=5, minutes=30)).timestamp()
+    assert store.baseline(t)["qzA"] == float((3 * 24 + 4) * 6 + 5)
+    store.close()
+
+    reopened = _store(tmp_path, raw_days=2, hourly_days=4)
+    assert reopened.latest() == latest
+    assert not math.isnan(reopened.tiers["1d"].row(0)[0])
+    reopened.close()
+
+
+def test_compute_deltas_are_exact_in_planck(tmp_path):
+    store = _store(tmp_path / "h")
+    then = {"qzA": 123_456_789_012_345, "qzB": 2 ** 51 - 1, "qzC": 7}        # pełne 12 miejsc po przecinku
+    now = {"qzA": then["qzA"] + 1, "qzB": then["qzB"] - 999_999_999_999, "qzC": 7}
+    store.append({a: p / ONE for a, p in then.items()}, T0)
+
+    for history in (store, [{"ts": T0.isoformat(), "balances": {a: p / ONE for a, p in then.items()}}]):
+        deltas = compute_deltas(now, history, T0 + timedelta(hours=13), windows=[("12h", 720)])
+        assert {a: d["12h"] for a, d in deltas.items()} == {"qzA": 1, "qzB": -999_999_999_999, "qzC": 0}
+
+
+def test_compute_deltas_above_float_precision_are_off_by_a_few_planck(tmp_path):
+    store = _store(tmp_path / "h")
+    planck = 10 ** 9 * ONE + 1                                     # miliard QU: poza 2^53 plancków
+    store.append({"qzA": planck / ONE}, T0)
+    deltas = compute_deltas({"qzA": planck + ONE}, store, T0 + timedelta(hours=13), windows=[("12h", 720)])
+    assert abs(deltas["qzA"]["12h"] - ONE) < 10 ** 6                # < 0.000001 QU, raport pokazuje 0.1
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Scheduler trybu --daemon: interwały, zadania po kolei, błędy i ponowne łączenie."""
+
+import asyncio
+import time
+
+from quantus_monitor.daemon import ensure_connected, run_jobs
+
+
+def test_jobs_run_immediately_then_every_interval_never_overlapping():
+    events, running = [], []
+
+    def job(name, duration):
+        async def fn():
+            assert not running                                     # nigdy dwa naraz
+            running.append(name)
+            events.append((name, time.monotonic()))
+            await asyncio.sleep(duration)
+            running.pop()
+        return fn
+
+    async def run():
+        stop = asyncio.Event()
+        asyncio.get_running_loop().call_later(0.35, stop.set)
+        t0 = time.monotonic()
+        await run_jobs([("sweep", 0.1, job("sweep", 0.02)), ("report", 0.25, job("report", 0.0))], stop)
+        return t0
+
+    t0 = asyncio.run(run())
+    sweeps = [t - t0 for name, t in events if name == "sweep"]
+    reports = [t - t0 for name, t in events if name == "report"]
+    assert len(sweeps) == 4 and sweeps[0] < 0.02
+    assert all(0.08 < b - a < 0.14 for a, b in zip(sweeps, sweeps[1:]))
+    assert len(reports) == 2 and reports[0] < 0.05 and 0.24 < reports[1] < 0.3     # co 0.25 od startu
+
+
+def test_failing_job_is_reported_and_retried_next_interval():
+    errors, calls = [], []
+
+    async def broken():
+        calls.append(1)
+        raise RuntimeError("node padł")
+
+    async def run():
+        stop = asyncio.Event()
+        asyncio.get_running_loop().call_later(0.12, stop.set)
+        await run_jobs([("sweep", 0.05, broken)], stop, on_error=lambda name, e: errors.append((name, str(e))))
+
+    asyncio.run(run())
+    assert len(calls) == 3
+    assert errors == [("sweep", "node padł")] * 3
+
+
+def test_long_job_does_not_trigger_catch_up_runs():
+    calls = []
+
+    async def slow():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            await asyncio.sleep(0.2)                               # 4 "zaległe" interwały
+
+    async def run():
+        stop = asyncio.Event()
+        asyncio.get_running_loop().call_later(0.29, stop.set)
+        await run_jobs([("sweep", 0.05, slow)], stop)
+
+    asyncio.run(run())
+    assert len(calls) == 3                                         # 0, po sweepie (0.2), 0.25
+    assert calls[2] - calls[1] > 0.04
+
+
+class _Client:
+    def __init__(self, failures):
+        self.failures = failures
+        self.attempts = 0
+        self.connected = False
+
+    def is_connected(self):
+        return self.connected
+
+    async def connect(self):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise ConnectionError("brak sieci")
+        self.connected = True
+
+
+def test_ensure_connected_retries_with_backoff(monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    client = _Client(failures=4)
+    logs = []
+    asyncio.run(ensure_connected(client, max_delay=5.0, log=logs.append))
+    assert client.connected and client.attempts == 5
+    assert sleeps == [1.0, 2.0, 4.0, 5.0]
+    assert logs[-1] == "Telegram: połączono ponownie"
+
+    asyncio.run(ensure_connected(client))                          # już połączony – nic nie robi
+    asyncio.run(ensure_connected(None))
+    assert client.attempts == 5
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""Discord: pakowanie raportu, wysyłka przez webhook (429, limity) i DISCORD_EDIT (edycja, kasowanie slotów)."""
+
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from quantus_monitor import groups
+from quantus_monitor.balance import Balance, float_to_planck
+from quantus_monitor.discord import DISCORD_LIMIT, FENCE, MessageBoard, pack_messages, split_block
+
+NOW = datetime(2026, 3, 10, 12, 0)
+
+
+def test_split_block_closes_and_reopens_code_fences():
+    table = "\n".join([FENCE] + [f"node{i:03d} {i * 1.5:>10.1f} QU" for i in range(200)] + [FENCE])
+    chunks = split_block(table, limit=500)
+    assert len(chunks) > 1
+    assert all(len(c) <= 500 for c in chunks)
+    assert all(c.startswith(FENCE) and c.endswith(FENCE) for c in chunks)
+    body = [line for c in chunks for line in c.split("\n") if line != FENCE]
+    assert body == table.split("\n")[1:-1]
+
+
+def test_pack_messages_fills_up_to_the_limit_with_header_in_each():
+    blocks = [f"{FENCE}\ngrupa {i}\n" + "x" * 600 + f"\n{FENCE}" for i in range(5)]
+    msgs = pack_messages(blocks, header="**Raport**")
+    assert len(msgs) == 2 and msgs[0].count("grupa") == 3
+    assert all(m.startswith("**Raport**\n") and len(m) <= DISCORD_LIMIT for m in msgs)
+    assert "".join(msgs).count("grupa") == 5
+    assert pack_messages(["krótko"]) == ["krótko"]
+
+
+def _report(stale_minutes):
+    rows = [("n1", "qzA", Balance("qzA", float_to_planck(5))), ("n2", "qzB", Balance("qzB", float_to_planck(7)))]
+    now_vals = {addr: bal.planck for _label, addr, bal in rows}
+    stale = {"qzB": (NOW - timedelta(minutes=stale_minutes)).timestamp()}
+    return [("Cerveza", rows)], now_vals, {}, stale
+
+
+def test_stale_group_key_does_not_change_with_report_time():
+    groups_with_rows, now_vals, deltas, stale = _report(10)
+    first = groups.make_discord_slots(groups_with_rows, now_vals, deltas, stale, now=NOW)
+    later = groups.make_discord_slots(groups_with_rows, now_vals, deltas, stale, now=NOW + timedelta(minutes=30))
+    assert [key for _slot, key, _msg in first] == [key for _slot, key, _msg in later]
+    assert "najstarsze z 11:50" in first[0][2]
+
+
+class _Hook:
+    """
+    Webhook na localhost: POST (?wait=true zwraca id), PATCH i DELETE /messages/{id}.
+    Kolejne POST-y dostają najpierw odpowiedzi ze `script`.
+    """
+
+    def __init__(self, script=()):
+        self.script = list(script)
+        self.received = []
+        self.messages = {}
+        self.deleted = []
+        hook = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *_args):
+                pass
+
+            def _reply(self, code, headers=None, body=None):
+                data = json.dumps(body).encode() if body is not None else b""
+                self.send_response(code)
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _content(self):
+                return json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")["content"]
+
+            def _id(self):
+                return self.path.split("?")[0].rstrip("/").split("/")[-1]
+
+            def do_POST(self):
+                content = self._content()
+                if hook.script:
+                    code, headers, body = hook.script.pop(0)
+                else:
+                    mid = str(1000 + len(hook.received))
+                    hook.messages[mid] = content
+                    code, headers, body = 200, {}, {"id": mid}
+                hook.received.append((content, code, time.monotonic()))
+                self._reply(code, headers, body)
+
+            def do_PATCH(self):
+                mid, content = self._id(), self._content()
+                if mid not in hook.messages:
+                    return self._reply(404, body={"message": "Unknown Message"})
+                hook.messages[mid] = content
+                self._reply(200, body={"id": mid})
+
+            def do_DELETE(self):
+                mid = self._id()
+                if hook.messages.pop(mid, None) is None:
+                    return self._reply(404, body={"message": "Unknown Message"})
+                hook.deleted.append(mid)
+                self._reply(204)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api/webhooks/1/token"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def webhook():
+    pytest.importorskip("requests")
+    from quantus_monitor.discord import DiscordWebhook
+
+    made = []
+
+    def make(script=(), **kw):
+        server = _Hook(script)
+        hook = DiscordWebhook(server.url, timeout=5.0, **kw)
+        made.append((server, hook))
+        return server, hook
+
+    yield make
+    for server, hook in made:
+        hook.close()
+        server.close()
+
+
+def test_429_waits_for_retry_after_and_retries(webhook):
+    server, hook = webhook([
+        (429, {"Retry-After": "5"}, {"retry_after": 0.2}),        # retry_after z treści ma pierwszeństwo
+        (429, {"Retry-After": "0.1"}, None),
+    ])
+    assert hook.post("raport")
+    (_c1, code1, t1), (_c2, code2, t2), (c3, code3, t3) = server.received
+    assert (code1, code2, code3) == (429, 429, 200) and c3 == "raport"
+    assert 0.2 <= t2 - t1 < 1.0 and 0.1 <= t3 - t2 < 1.0
+
+
+def test_exhausted_bucket_delays_the_next_message(webhook):
+    server, hook = webhook([(200, {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "0.25"}, {})])
+    assert hook.post("pierwsza") and hook.post("druga")
+    (_a, _ca, ta), (_b, _cb, tb) = server.received
+    assert tb - ta >= 0.24
+
+
+def test_client_error_is_not_retried_and_retries_are_bounded(webhook):
+    server, hook = webhook([(400, {}, {"message": "Cannot send an empty message"})])
+    assert not hook.post("") and len(server.received) == 1
+
+    logs = []
+    server, hook = webhook([(429, {"Retry-After": "0.01"}, None)] * 3, max_retries=2, log=logs.append)
+    assert not hook.post("raport") and len(server.received) == 3
+    assert "porzucona" in logs[-1]
+
+
+def test_submitted_messages_arrive_in_order_from_background_thread(webhook):
+    server, hook = webhook([(429, {"Retry-After": "0.05"}, None)])
+    t0 = time.monotonic()
+    for i in range(5):
+        hook.submit(f"wiadomość {i}")
+    assert time.monotonic() - t0 < 0.05                              # submit nie czeka na sieć
+    hook.flush()
+    delivered = [content for content, code, _t in server.received if code != 429]
+    assert delivered == [f"wiadomość {i}" for i in range(5)]
+
+
+def test_board_keeps_slots_between_runs_and_reports_only_changes(tmp_path):
+    path = tmp_path / "board.json"
+    board = MessageBoard(str(path))
+    board.record("Cerveza", "101", "k1")
+    board.record("Baku", "102", "k1")
+
+    again = MessageBoard(str(path))                                   # następne uruchomienie
+    assert again.message_id("Cerveza") == "101" and again.message_id("nowa") is None
+    report = [("Cerveza", "k1", "bez zmian"), ("Baku", "k2", "nowe saldo"), ("nowa", "k1", "...")]
+    assert [slot for slot, _key, _msg in again.changed(report)] == ["Baku", "nowa"]
+
+    path.write_text("{")                                              # uszkodzony plik = pusta tablica
+    assert MessageBoard(str(path)).slots == {}
+
+
+def test_upsert_edits_in_place_and_reposts_deleted_message(webhook, tmp_path):
+    server, hook = webhook()
+    board = MessageBoard(str(tmp_path / "board.json"))
+    assert hook.upsert(board, "Cerveza", "k1", "v1")
+    mid = board.message_id("Cerveza")
+    assert hook.upsert(board, "Cerveza", "k2", "v2")
+    assert server.messages == {mid: "v2"} and len(server.received) == 1   # PATCH, bez nowego POST
+
+    server.messages.clear()                                           # ktoś skasował wiadomość na kanale
+    assert hook.upsert(board, "Cerveza", "k3", "v3")
+    assert board.message_id("Cerveza") != mid and list(server.messages.values()) == ["v3"]
+    assert board.changed([("Cerveza", "k3", "v3")]) == []
+
+
+def test_board_reports_and_forgets_surplus_slots(tmp_path):
+    path = tmp_path / "board.json"
+    board = MessageBoard(str(path))
+    for slot in ("Cerveza", "Cerveza#2", "alerts"):
+        board.record(slot, f"id-{slot}", "k")
+    assert board.surplus([("Cerveza", "k", "..."), ("alerts", "k", "...")]) == ["Cerveza#2"]
+    board.forget("Cerveza#2")
+    assert set(MessageBoard(str(path)).slots) == {"Cerveza", "alerts"}
+
+
+def test_shrinking_report_deletes_surplus_messages(webhook, tmp_path):
+    server, hook = webhook()
+    board = MessageBoard(str(tmp_path / "board.json"))
+    for slot in ("Cerveza", "Cerveza#2", "Baku"):
+        assert hook.upsert(board, slot, "k1", f"{slot} v1")
+    assert len(server.messages) == 3
+
+    report = [("Cerveza", "k2", "Cerveza v2")]
+    for slot, key, msg in board.changed(report):
+        assert hook.upsert(board, slot, key, msg)
+    for slot in board.surplus(report):
+        assert hook.delete_slot(board, slot)
+
+    assert sorted(server.messages.values()) == ["Cerveza v2"]
+    assert len(server.deleted) == 2
+    assert set(board.slots) == {"Cerveza"}
+    board.slots["gone"] = {"id": "999", "key": "k"}                 # skasowana ręcznie na kanale
+    assert hook.delete_slot(board, "gone") and "gone" not in board.slots
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Stan nodów i minerów: hosts.txt, zapytania do lokalnych serwerów HTTP i statusy w raporcie."""
+
+import asyncio
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from quantus_monitor import health
+
+NODES = {
+    "/ok": ({"isSyncing": False, "peers": 8}, 1000),
+    "/behind": ({"isSyncing": True, "peers": 0}, 900),
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *_args):
+        pass
+
+    def _reply(self, code, obj):
+        data = json.dumps(obj).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        calls = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path == "/slow":
+            time.sleep(1.0)
+        node_health, best = NODES.get(self.path, NODES["/ok"])
+        results = {"system_health": node_health, "chain_getHeader": {"number": hex(best)}}
+        self._reply(200, [{"jsonrpc": "2.0", "id": c["id"], "result": results[c["method"]]} for c in calls])
+
+    def do_GET(self):
+        self._reply(503 if self.path == "/miner-broken" else 200, {})
+
+
+@pytest.fixture
+def server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    srv.server_close()
+
+
+def _closed_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_read_hosts_fills_default_ports(tmp_path):
+    path = tmp_path / "hosts.txt"
+    path.write_text(
+        "# LABEL NODE MINER\n"
+        "Baku-1    10.0.0.5\n"
+        "Baku-2    http://10.0.0.6:9955    10.0.0.6:9000   # komentarz\n"
+        "Cerveza   node.example.org  -\n"
+        "samotny\n"
+    )
+    targets = health.read_hosts(str(path), miner_path="/metrics")
+    assert [(t.label, t.node_url, t.miner_url) for t in targets] == [
+        ("Baku-1", "http://10.0.0.5:9944", "http://10.0.0.5:9833/metrics"),
+        ("Baku-2", "http://10.0.0.6:9955", "http://10.0.0.6:9000/metrics"),
+        ("Cerveza", "http://node.example.org:9944", ""),
+    ]
+    assert health.read_hosts(str(tmp_path / "brak.txt")) == []
+
+
+def test_collect_against_local_hosts(server):
+    pytest.importorskip("requests")
+    dead = f"http://127.0.0.1:{_closed_port()}"
+    targets = [
+        health.HostTarget("n1", f"{server}/ok", f"{server}/miner"),
+        health.HostTarget("n2", f"{server}/behind", f"{server}/miner-broken"),
+        health.HostTarget("n3", dead, ""),
+        health.HostTarget("n4", f"{server}/slow", ""),
+    ]
+    results = asyncio.run(health.collect(targets, timeout=0.3))
+
+    n1, n2, n3, n4 = (results[label] for label in ("n1", "n2", "n3", "n4"))
+    assert (n1.node_ok, n1.best, n1.peers, n1.miner_ok) == (True, 1000, 8, True)
+    assert (n2.node_ok, n2.syncing, n2.best, n2.miner_ok) == (True, True, 900, False)
+    assert not n3.node_ok and n3.error.startswith("node:") and n3.miner_ok is None
+    assert not n4.node_ok and n4.error
+
+    groups = [("Baku", [("n1", "qzA"), ("n2", "qzB"), ("n3", "qzC"), ("n5", "qzE")]), ("Cerveza", [("x", "n4")])]
+    status = health.status_by_address(groups, results, max_lag=50)
+    assert status == {
+        "qzA": health.OK,
+        "qzB": "syncing, no peers, lag 100, miner down",
+        "qzC": "node down",
+        "n4": "node down",                                        # host po adresie zamiast nazwy
+    }
+    lines = health.summary_lines(results, max_lag=50)
+    assert len(lines) == 4 and "miner down" in lines[1]
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""Historia JSONL (segmenty dzienne) i delty liczone z listy wpisów przez TimeIndex."""
+
+from datetime import datetime, timedelta
+
+from quantus_monitor.balance import float_to_planck
+from quantus_monitor.groups import compute_deltas
+from quantus_monitor.history import HistoryStore
+
+NOW = datetime(2026, 3, 10, 12, 0)
+
+
+def test_torn_line_is_skipped_and_next_append_starts_fresh(tmp_path):
+    store = HistoryStore(str(tmp_path), timedelta(days=3))
+    store.append({"qzA": 1}, NOW - timedelta(hours=2))
+    segment = store.segments()[0]
+    with open(segment, "a") as f:
+        f.write('{"ts": "2026-03-10T11:00:00", "bal')       # przerwany zapis
+    store.append({"qzA": 2}, NOW - timedelta(hours=1))
+    assert [e["balances"] for e in store.entries(NOW)] == [{"qzA": 1}, {"qzA": 2}]
+    assert store.latest()["balances"] == {"qzA": 2}
+
+
+def test_prune_drops_whole_old_segments(tmp_path):
+    store = HistoryStore(str(tmp_path), timedelta(days=1))
+    for days in (3, 2, 1, 0):
+        store.append({"qzA": days}, NOW - timedelta(days=days))
+    assert store.prune(NOW) == 2
+    assert [e["balances"]["qzA"] for e in store.entries(NOW)] == [1, 0]
+
+
+def test_compute_deltas_from_entry_list():
+    entries = [
+        {"ts": (NOW - timedelta(hours=h)).isoformat(), "balances": {"qzA": 100 - h, **({"qzB": 5} if h < 6 else {})}}
+        for h in (30, 24, 12, 5, 1)
+    ]
+    now_vals = {"qzA": float_to_planck(100), "qzB": float_to_planck(9)}
+    deltas = compute_deltas(now_vals, entries, NOW, windows=[("12h", 720), ("24h", 1440)])
+    assert deltas["qzA"] == {"12h": float_to_planck(12), "24h": float_to_planck(24)}
+    assert deltas["qzB"] == {"12h": None, "24h": None}           # młodszy niż okno
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Pliki z nodami: walidacja, duplikaty i wyszukiwanie po nazwie/adresie w obu układach."""
+
+import os
+
+import pytest
+
+from quantus_monitor import groups, pairs
+
+
+@pytest.fixture
+def nodes(tmp_path, monkeypatch, address):
+    monkeypatch.chdir(tmp_path)
+    a = [address(i) for i in range(5)]
+    bad = a[4][:-1] + ("x" if a[4][-1] != "x" else "y")
+    (tmp_path / "nodes.txt").write_text(f"# komentarz\nn1 {a[0]}\nn2 {a[1]}\nn1 {a[2]}\n{a[3]}\nzly {bad}\n")
+    (tmp_path / "nodes_other.txt").write_text(f"f1 {a[0]}\nn2 {a[4]}\n")
+    return a
+
+
+def test_groups_layout_validates_and_resolves_names(nodes):
+    a = nodes
+    inv = groups.load_inventory()
+    assert [owner for owner, _pairs in inv.groups] == [groups._owner("nodes.txt"), "nodes_other"]
+    assert inv.groups[1][1] == [("n2", a[4])]                  # a[0] już jest w nodes.txt
+    assert any("zły checksum" in p for p in inv.problems)
+    assert any(a[0] in p and "pominięty" in p for p in inv.problems)
+    assert inv.address("n2") == a[1]                            # pierwszy z tą nazwą
+    assert inv.address(a[2]) == a[2]
+    assert inv.address("nieznany") == "nieznany"
+    assert groups.load_inventory() is inv                       # pliki bez zmian – z cache
+
+
+def test_pairs_layout_makes_names_unique(nodes):
+    a = nodes
+    inv = pairs.load_inventory()
+    labels = {addr: label for _owner, group in inv.groups for label, addr in group}
+    assert labels == {a[0]: "n1", a[1]: "n2", a[2]: "n1#2", a[3]: a[3][:12], a[4]: "n2#2"}
+    assert pairs._label(inv, a[2]) == "n1#2"
+    assert pairs._label(inv, "n2#2") == "n2#2"
+
+
+def test_inventory_reloads_changed_file(nodes, tmp_path):
+    inv = groups.load_inventory()
+    path = tmp_path / "nodes_other.txt"
+    path.write_text(f"f1 {nodes[4]}\n# dopisany komentarz\n")
+    os.utime(path, ns=(1, 1))
+    again = groups.load_inventory()
+    assert again is not inv
+    assert again.groups[1][1] == [("f1", nodes[4])]
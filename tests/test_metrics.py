@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""Metryki Prometheusa: format tekstowy, histogramy, textfile i endpoint /metrics."""
+
+import socket
+import urllib.error
+import urllib.request
+
+import pytest
+
+from quantus_monitor import metrics
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    """Osobny rejestr – metryki testu nie mieszają się z globalnymi."""
+    monkeypatch.setattr(metrics, "_REGISTRY", [])
+    return metrics._REGISTRY
+
+
+def test_counter_and_gauge_render_with_escaped_labels(registry):
+    c = metrics.Counter("t_replies_total", "Odpowiedzi", ["result"])
+    g = metrics.Gauge("t_rows", "Wiersze")
+    c.inc(result="ok")
+    c.inc(2, result="ok")
+    c.inc(result='zły "adres"\n')
+    g.set(12.5)
+    assert metrics.render() == (
+        "# HELP t_replies_total Odpowiedzi\n"
+        "# TYPE t_replies_total counter\n"
+        't_replies_total{result="ok"} 3\n'
+        't_replies_total{result="zły \\"adres\\"\\n"} 1\n'
+        "# HELP t_rows Wiersze\n"
+        "# TYPE t_rows gauge\n"
+        "t_rows 12.5\n"
+    )
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    h = metrics.Histogram("t_seconds", "Czas", ["op"], buckets=(0.5, 0.1, 1.0))
+    for v in (0.05, 0.3, 0.3, 2.0):
+        h.observe(v, op="load")
+    lines = metrics.render().splitlines()[2:]
+    assert lines == [
+        't_seconds_bucket{op="load",le="0.1"} 1',
+        't_seconds_bucket{op="load",le="0.5"} 3',
+        't_seconds_bucket{op="load",le="1"} 3',
+        't_seconds_bucket{op="load",le="+Inf"} 4',
+        't_seconds_sum{op="load"} 2.65',
+        't_seconds_count{op="load"} 4',
+    ]
+    with h.time(op="save"):
+        pass
+    assert 't_seconds_count{op="save"} 1' in metrics.render()
+
+
+def test_textfile_is_written_atomically(registry, tmp_path):
+    metrics.Gauge("t_up", "Up").set(1)
+    path = tmp_path / "quantus.prom"
+    metrics.write_textfile(str(path))
+    assert path.read_text().endswith("t_up 1\n")
+    assert [p.name for p in tmp_path.iterdir()] == ["quantus.prom"]
+    metrics.write_textfile("")                                      # wyłączone – nic się nie dzieje
+    assert metrics.dir_size(tmp_path) == path.stat().st_size == metrics.dir_size(path)
+    assert metrics.dir_size(tmp_path / "brak") == 0
+
+
+def test_http_endpoint_serves_metrics_only(registry):
+    metrics.Counter("t_sweeps_total", "Sweepy").inc()
+    assert metrics.serve(0) is None
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = metrics.serve(port, "127.0.0.1")
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as r:
+            assert r.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert "t_sweeps_total 1" in r.read().decode()
+        with pytest.raises(urllib.error.HTTPError) as err:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=5)
+        assert err.value.code == 404
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""Cache InputPeer bota: pamięć, plik obok sesji i ponowne rozwiązanie po odrzuceniu peera."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("telethon")
+
+from telethon.errors.rpcerrorlist import PeerIdInvalidError  # noqa: E402
+from telethon.tl.types import InputPeerUser  # noqa: E402
+
+from quantus_monitor import peers  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _fresh_memory(monkeypatch):
+    monkeypatch.setattr(peers, "_MEMORY", {})
+
+
+class _Client:
+    def __init__(self, session_file, user_id=777):
+        self.session = SimpleNamespace(filename=str(session_file))
+        self.user_id = user_id
+        self.resolved = 0
+
+    async def get_input_entity(self, _username):
+        self.resolved += 1
+        return InputPeerUser(self.user_id, 42)
+
+
+def test_peer_is_resolved_once_and_stored_next_to_session(tmp_path, monkeypatch):
+    client = _Client(tmp_path / "quantus_balance_session.session")
+    assert peers.peers_path(client) == tmp_path / "quantus_balance_session.peers.json"
+
+    first = asyncio.run(peers.resolve_peer(client, "@QuantusFaucetBot"))
+    again = asyncio.run(peers.resolve_peer(client, "quantusfaucetbot"))
+    assert again is first and client.resolved == 1
+    stored = json.loads((tmp_path / "quantus_balance_session.peers.json").read_text())
+    assert stored == {"quantusfaucetbot": {"user_id": 777, "access_hash": 42}}
+
+    monkeypatch.setattr(peers, "_MEMORY", {})                     # nowy proces
+    fresh = _Client(tmp_path / "quantus_balance_session.session")
+    peer = asyncio.run(peers.resolve_peer(fresh, "QuantusFaucetBot"))
+    assert fresh.resolved == 0
+    assert (peer.user_id, peer.access_hash) == (777, 42)
+
+
+def test_invalidate_drops_memory_and_file_entry(tmp_path):
+    client = _Client(tmp_path / "s.session")
+    asyncio.run(peers.resolve_peer(client, "QuantusFaucetBot"))
+    peers.invalidate_peer(client, "QuantusFaucetBot")
+    assert json.loads((tmp_path / "s.peers.json").read_text()) == {}
+
+    client.user_id = 888
+    assert asyncio.run(peers.resolve_peer(client, "QuantusFaucetBot")).user_id == 888
+    assert client.resolved == 2
+
+
+def test_session_without_file_is_kept_in_memory_only(tmp_path):
+    client = _Client("")
+    assert peers.peers_path(client) is None
+    asyncio.run(peers.resolve_peer(client, "QuantusFaucetBot"))
+    asyncio.run(peers.resolve_peer(client, "QuantusFaucetBot"))
+    assert client.resolved == 1 and list(tmp_path.iterdir()) == []
+
+
+def test_dispatcher_re_resolves_rejected_peer_and_resends(tmp_path):
+    from quantus_monitor.bot import ReplyDispatcher
+
+    class Client(_Client):
+        def __init__(self):
+            super().__init__(tmp_path / "s.session")
+            self.sent = []
+
+        def add_event_handler(self, *_args):
+            pass
+
+        def remove_event_handler(self, *_args):
+            pass
+
+        async def send_message(self, entity, text):
+            self.sent.append(entity.user_id)
+            if entity.user_id == 777:
+                raise PeerIdInvalidError(None)
+            return SimpleNamespace(id=len(self.sent))
+
+    async def run():
+        client = Client()
+        disp = await ReplyDispatcher.attach(client, "QuantusFaucetBot", lambda _t: None)
+        client.user_id = 888                                       # bot ma nowy peer
+        assert await disp.ask("/balance qzA", "qzA", 0.01) is None
+        return client, disp
+
+    client, disp = asyncio.run(run())
+    assert client.sent == [777, 888] and client.resolved == 2
+    assert disp.peer_id == 888
+    assert json.loads((tmp_path / "s.peers.json").read_text())["quantusfaucetbot"]["user_id"] == 888
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""Współbieżne pobieranie: przeplatanie grup, limit zapytań w locie i ponawianie FloodWait."""
+
+import asyncio
+import random
+
+from quantus_monitor.pipeline import fetch_pipelined, interleave
+
+GROUPS = [
+    ("Baku", [("b1", "qzB1"), ("b2", "qzB2"), ("b3", "qzB3")]),
+    ("Cerveza", [("c1", "qzC1")]),
+    ("Dubaj", [("d1", "qzD1"), ("d2", "qzD2")]),
+]
+
+
+def test_interleave_round_robin():
+    assert interleave(GROUPS) == [(0, 0), (1, 0), (2, 0), (0, 1), (2, 1), (0, 2)]
+    assert interleave([]) == []
+
+
+def test_rows_keep_input_order_with_bounded_concurrency():
+    asked, in_flight, peak = [], 0, 0
+    rnd = random.Random(7)
+
+    async def ask(addr):
+        nonlocal in_flight, peak
+        asked.append(addr)
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(rnd.uniform(0, 0.01))
+        in_flight -= 1
+        return f"{addr}=ok"
+
+    got = asyncio.run(fetch_pipelined(GROUPS, ask, max_in_flight=2))
+    assert got == [(owner, [(label, addr, f"{addr}=ok") for label, addr in pairs]) for owner, pairs in GROUPS]
+    assert peak == 2
+    assert asked[:3] == ["qzB1", "qzC1", "qzD1"]              # pierwsze zapytania z każdej grupy
+
+
+def test_flood_wait_is_requeued_up_to_max_retries():
+    calls = {}
+
+    async def ask(addr):
+        calls[addr] = calls.get(addr, 0) + 1
+        if addr == "qzC1" or (addr == "qzB2" and calls[addr] == 1):
+            return "FloodWait"
+        return "1 QU"
+
+    ((_b, baku), (_c, cerveza), _d) = asyncio.run(fetch_pipelined(GROUPS, ask, max_in_flight=3, max_retries=2))
+    assert baku[1] == ("b2", "qzB2", "1 QU") and calls["qzB2"] == 2
+    assert cerveza == [("c1", "qzC1", "FloodWait")] and calls["qzC1"] == 3
+    assert calls["qzD1"] == 1
+
+
+def test_known_addresses_skip_ask_and_missing_fills_the_rest():
+    known = {"qzB1": "5.0 QU", "qzD2": "1.0 QU"}
+    asked = []
+
+    async def ask(addr):
+        asked.append(addr)
+        return "2.0 QU"
+
+    got = asyncio.run(fetch_pipelined(GROUPS, ask, known=known))
+    assert sorted(asked) == ["qzB2", "qzB3", "qzC1", "qzD1"]
+    assert got[0][1][0] == ("b1", "qzB1", "5.0 QU") and got[2][1][1] == ("d2", "qzD2", "1.0 QU")
+
+    offline = asyncio.run(fetch_pipelined(GROUPS, None, known=known, missing="?"))
+    assert [bal for _label, _addr, bal in offline[2][1]] == ["?", "1.0 QU"]
+
+
+def test_address_listed_in_several_groups_is_asked_once():
+    asked = []
+
+    async def ask(addr):
+        asked.append(addr)
+        return f"{addr}=ok"
+
+    groups = [("Baku", [("b1", "qzX"), ("b2", "qzB2")]), ("Cerveza", [("c1", "qzX"), ("c2", "qzX")])]
+    got = asyncio.run(fetch_pipelined(groups, ask))
+    assert sorted(asked) == ["qzB2", "qzX"]
+    assert [bal for _label, _addr, bal in got[1][1]] == ["qzX=ok", "qzX=ok"]
+
+
+def test_flooded_shard_stops_taking_work_and_others_take_over():
+    from quantus_monitor.pipeline import Shard
+    from quantus_monitor.ratelimit import AdaptiveTokenBucket
+
+    asked = {"a": [], "b": []}
+    flooded = AdaptiveTokenBucket(rate=100.0)
+
+    async def ask_a(addr):
+        asked["a"].append(addr)
+        flooded.on_flood_wait(0.3)                                   # sesja A dostaje FloodWait
+        return "FloodWait"
+
+    async def ask_b(addr):
+        asked["b"].append(addr)
+        await asyncio.sleep(0.01)
+        return "1 QU"
+
+    shards = [Shard(ask_a, flooded, "a"), Shard(ask_b, AdaptiveTokenBucket(rate=100.0), "b")]
+    got = asyncio.run(asyncio.wait_for(fetch_pipelined(GROUPS, shards, max_in_flight=1), 5))
+    assert all(bal == "1 QU" for _owner, rows in got for _label, _addr, bal in rows)
+    assert len(asked["a"]) == 1                                       # po FloodWait A nie bierze nic nowego
+    assert sorted(asked["b"]) == sorted(addr for _owner, pairs in GROUPS for _label, addr in pairs)
+
+
+def test_long_flood_pause_does_not_hold_the_sweep_after_others_finish():
+    from quantus_monitor.pipeline import Shard
+    from quantus_monitor.ratelimit import AdaptiveTokenBucket
+
+    flooded = AdaptiveTokenBucket(rate=100.0)
+
+    async def ask_a(_addr):
+        flooded.on_flood_wait(30)                                    # pauza dłuższa niż cały sweep
+        return "FloodWait"
+
+    async def ask_b(_addr):
+        await asyncio.sleep(0.01)
+        return "1 QU"
+
+    async def run():
+        shards = [Shard(ask_a, flooded, "a"), Shard(ask_b, AdaptiveTokenBucket(rate=100.0), "b")]
+        started = asyncio.get_running_loop().time()
+        got = await asyncio.wait_for(fetch_pipelined(GROUPS, shards, max_in_flight=2), 5)
+        return got, asyncio.get_running_loop().time() - started
+
+    got, took = asyncio.run(run())
+    assert all(bal == "1 QU" for _owner, rows in got for _label, _addr, bal in rows)
+    assert took < 1.0 and flooded.paused
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""--profile: ścieżki etapów (także w zadaniach asyncio), raport, format folded i zrzut plików."""
+
+import asyncio
+import json
+
+import pytest
+
+from quantus_monitor import profiling
+
+
+@pytest.fixture(autouse=True)
+def _no_active_profiler(monkeypatch):
+    monkeypatch.setattr(profiling, "_ACTIVE", None)
+
+
+def test_report_spans_unmeasured_parents_and_folded_uses_own_time():
+    p = profiling.Profiler(t0=0.0)
+    p.add(("sweep",), 1.0, 4.0)
+    p.add(("sweep", "Cerveza", "qzA"), 1.5, 2.0)
+    p.add(("sweep", "Cerveza", "qzB"), 1.5, 2.5)
+    p.add(("sweep", "Cerveza", "qzA"), 3.0, 3.25)                   # retry tego samego adresu
+
+    stages = {s["stage"]: s for s in p.report()["stages"]}
+    assert stages["sweep"]["wall_s"] == 3.0 and stages["sweep"]["calls"] == 1
+    cerveza = stages["sweep;Cerveza"]                                 # grupa bez własnego pomiaru
+    assert (cerveza["calls"], cerveza["wall_s"], cerveza["start_s"], cerveza["depth"]) == (0, 1.75, 1.5, 1)
+    assert stages["sweep;Cerveza;qzA"]["calls"] == 2 and stages["sweep;Cerveza;qzA"]["wall_s"] == 0.75
+
+    assert p.folded().splitlines() == [
+        "sweep 1250000",                                              # 3.0 - 1.75 na grupę
+        "sweep;Cerveza;qzA 750000",
+        "sweep;Cerveza;qzB 1000000",
+    ]
+
+
+def test_stage_path_is_inherited_by_asyncio_tasks():
+    p = profiling.Profiler()
+
+    async def worker(addr):
+        with p.stage("Cerveza", addr):
+            await asyncio.sleep(0.01)
+
+    async def run():
+        with p.stage("sweep"):
+            await asyncio.gather(worker("qzA"), worker("qzB;x"))
+        with p.stage("report"):
+            pass
+
+    asyncio.run(run())
+    assert sorted(path for path, _s, _e in p.records) == [
+        ("report",), ("sweep",), ("sweep", "Cerveza", "qzA"), ("sweep", "Cerveza", "qzB;x"),
+    ]
+    assert "sweep;Cerveza;qzB,x " in p.folded()
+
+
+def test_module_functions_are_noop_until_enabled(tmp_path):
+    with profiling.stage("sweep"):
+        profiling.record("imports", 0.0, 1.0)
+    profiling.dump(str(tmp_path / "profile.json"))
+    assert profiling.active() is None and list(tmp_path.iterdir()) == []
+
+    prof = profiling.enable(cpu=True)
+    with profiling.stage("sweep"):
+        with profiling.stage("parse", cpu=True):
+            sum(range(1000))
+    profiling.record("imports", prof.t0, prof.t0 + 0.5)
+    profiling.dump(str(tmp_path / "profile.json"))
+
+    report = json.loads((tmp_path / "profile.json").read_text())
+    assert [s["stage"] for s in report["stages"]] == ["imports", "sweep", "sweep;parse"]
+    assert report["cpu_top"]
+    assert "imports 500000" in (tmp_path / "profile.folded").read_text().splitlines()
+    assert (tmp_path / "profile.pstats").stat().st_size > 0
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Adaptacyjny token bucket: burst, tempo, pauza po FloodWait i powrót do tempa (AIMD)."""
+
+import asyncio
+import math
+import time
+
+from quantus_monitor.ratelimit import AdaptiveTokenBucket
+
+
+def _timed(bucket: AdaptiveTokenBucket, n: int) -> float:
+    async def run():
+        t0 = time.monotonic()
+        for _ in range(n):
+            await bucket.acquire()
+        return time.monotonic() - t0
+
+    return asyncio.run(run())
+
+
+def test_burst_is_free_then_rate_applies():
+    bucket = AdaptiveTokenBucket(rate=50.0, burst=3)
+    assert _timed(bucket, 3) < 0.015
+    assert _timed(bucket, 2) >= 0.03                      # 2 tokeny po 1/50 s
+
+
+def test_flood_wait_pauses_and_halves_rate_then_success_ramps_up():
+    bucket = AdaptiveTokenBucket(rate=100.0, burst=1, min_rate=20.0)
+    bucket.on_flood_wait(0.1)
+    assert bucket.paused and bucket.rate == 50.0 and bucket.tokens == 0.0
+    assert _timed(bucket, 1) >= 0.09
+    assert not bucket.paused
+
+    for _ in range(3):
+        bucket.on_flood_wait(0)
+    assert bucket.rate == 20.0                            # nie schodzi poniżej min_rate
+
+    bucket.on_success()
+    assert bucket.rate == 30.0                            # +10% tempa startowego
+    for _ in range(20):
+        bucket.on_success()
+    assert bucket.rate == 100.0
+
+
+def test_default_min_rate_is_a_sixteenth():
+    bucket = AdaptiveTokenBucket(rate=1.0)
+    for _ in range(10):
+        bucket.on_flood_wait(0)
+    assert bucket.rate == 1.0 / 16
+
+
+def test_limiter_is_kept_per_client():
+    from quantus_monitor.ratelimit import limiter_for
+
+    class Client:
+        pass
+
+    a, b = Client(), Client()
+    first = limiter_for(a, 2.0, 3)
+    first.on_flood_wait(0.5)
+    assert limiter_for(a, 2.0, 3) is first and first.rate == 1.0      # tempo "nauczone" zostaje
+    assert 0.4 < first.pause_remaining <= 0.5
+    assert limiter_for(b, 2.0, 3) is not first
+
+
+def test_unlimited_rate_still_pauses_on_flood_wait():
+    bucket = AdaptiveTokenBucket(rate=math.inf, burst=1)
+    assert _timed(bucket, 200) < 0.05
+    bucket.on_flood_wait(0.1)
+    assert bucket.rate == math.inf
+    assert 0.09 <= _timed(bucket, 1) < 0.5
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Wspólny cache wyników: TTL, tylko poprawne salda i zapis pod flockiem z kilku procesów."""
+
+import json
+import multiprocessing
+
+import pytest
+
+from quantus_monitor.balance import ERROR, FLOOD, TIMEOUT, Balance
+from quantus_monitor.resultcache import BalanceCache, fcntl
+
+
+def test_fresh_entries_only_within_ttl(tmp_path):
+    cache = BalanceCache(str(tmp_path / "cache.json"), ttl=300)
+    a, b = Balance("qzA", 5 * 10 ** 12, ts=1000.0), Balance("qzB", 15, "QNT", ts=1000.0)
+    cache.update({"qzA": a, "qzB": b}, now=1000.0)
+    assert cache.get_fresh(["qzA", "qzB", "qzC"], now=1299.0) == {"qzA": a, "qzB": b}
+    assert cache.get_fresh(["qzA"], now=1299.0)["qzA"].ts == 1000.0
+    assert cache.get_fresh(["qzA"], now=1300.0) == {}
+
+
+def test_failures_are_not_cached_and_old_entries_are_pruned(tmp_path):
+    path = tmp_path / "cache.json"
+    cache = BalanceCache(str(path), ttl=100)
+    cache.update({
+        "qzA": Balance("qzA", 5, ts=1000.0),
+        "qzB": Balance.failed("qzB", FLOOD), "qzC": Balance.failed("qzC", TIMEOUT), "qzD": Balance.failed("qzD", ERROR),
+    }, now=1000.0)
+    assert json.loads(path.read_text()) == {"qzA": [5, "QU", 1000.0]}
+
+    cache.update({"qzE": Balance("qzE", 2, ts=1200.0)}, now=1200.0)   # qzA ma już 2×TTL
+    assert set(json.loads(path.read_text())) == {"qzE"}
+
+
+def test_zero_ttl_disables_cache(tmp_path):
+    cache = BalanceCache(str(tmp_path / "cache.json"), ttl=0)
+    cache.update({"qzA": Balance("qzA", 5)})
+    assert cache.get_fresh(["qzA"]) == {}
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_old_text_format_and_broken_entries(tmp_path):
+    path = tmp_path / "cache.json"
+    path.write_text(json.dumps({"qzA": ["1 234,5 QU", 10.0], "qzB": ["FloodWait", 10.0], "qzC": [None, "QU"]}))
+    cache = BalanceCache(str(path), ttl=300)
+    assert cache.get_fresh(["qzA", "qzB", "qzC"], now=20.0) == {"qzA": Balance("qzA", 1_234_500_000_000_000)}
+
+    path.write_text('{"qzA": ["5.0 QU", 10')                       # przerwany zapis
+    assert cache.get_fresh(["qzA"], now=20.0) == {}
+    cache.update({"qzB": Balance("qzB", 1, ts=20.0)}, now=20.0)
+    assert cache.get_fresh(["qzA", "qzB"], now=20.0) == {"qzB": Balance("qzB", 1)}
+
+
+def _writer(path: str, worker: int, n: int):
+    cache = BalanceCache(path, ttl=3600)
+    for i in range(n):
+        cache.update({f"qz{worker}-{i}": Balance(f"qz{worker}-{i}", i)})
+
+
+@pytest.mark.skipif(fcntl is None, reason="flock tylko na POSIX")
+def test_concurrent_writers_do_not_lose_updates(tmp_path):
+    path = str(tmp_path / "cache.json")
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_writer, args=(path, w, 25)) for w in range(4)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(30)
+    assert all(p.exitcode == 0 for p in procs)
+    fresh = BalanceCache(path, ttl=3600).get_fresh([f"qz{w}-{i}" for w in range(4) for i in range(25)])
+    assert len(fresh) == 100
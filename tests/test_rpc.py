@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""Backend RPC: adresy SS58, klucze System.Account, AccountInfo i odczyt z fałszywego noda."""
+
+import asyncio
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from conftest import account_info, ss58_encode
+from quantus_monitor.rpc import (
+    SYSTEM_ACCOUNT_PREFIX, RpcError, decode_free_balance, ss58_decode, system_account_key,
+)
+
+
+# ----------------- ADRESY / SCALE -----------------
+def test_ss58_roundtrip_and_errors():
+    account = hashlib.sha256(b"node").digest()
+    addr = ss58_encode(account)
+    assert addr.startswith("qz")
+    assert ss58_decode(addr) == account
+    assert ss58_decode(f"  {addr}\n") == account
+
+    broken = addr[:-1] + ("x" if addr[-1] != "x" else "y")
+    with pytest.raises(ValueError, match="checksum"):
+        ss58_decode(broken)
+    with pytest.raises(ValueError, match="base58"):
+        ss58_decode(addr[:-1] + "0")
+    with pytest.raises(ValueError, match="długość"):
+        ss58_decode(ss58_encode(account[:20]))
+
+
+def test_system_account_key_is_blake2_128_concat():
+    account = bytes(range(32))
+    key = system_account_key(account)
+    h = hashlib.blake2b(account, digest_size=16).hexdigest()
+    assert key == "0x" + SYSTEM_ACCOUNT_PREFIX + h + account.hex()
+
+
+def test_decode_free_balance():
+    assert decode_free_balance(account_info(123_456_789_000_000)) == 123_456_789_000_000
+    assert decode_free_balance(account_info(2 ** 100)[2:]) == 2 ** 100
+    assert decode_free_balance(None) == 0                     # brak wpisu = puste konto
+    with pytest.raises(RpcError):
+        decode_free_balance("0x" + "00" * 20)
+
+
+# ----------------- FAŁSZYWY NODE -----------------
+class _Node:
+    """JSON-RPC po HTTP: system_health, state_queryStorageAt (albo jego brak) i state_getStorage."""
+
+    def __init__(self, storage, query_at=True, syncing=False):
+        self.storage = storage
+        self.methods = []
+        node = self
+
+        def handle(req):
+            method, params = req["method"], req.get("params", [])
+            node.methods.append(method)
+            if method == "system_health":
+                return {"result": {"isSyncing": syncing, "peers": 3}}
+            if method == "state_queryStorageAt" and query_at:
+                changes = [[k, node.storage.get(k)] for k in params[0]]
+                return {"result": [{"block": "0x01", "changes": changes}]}
+            if method == "state_getStorage":
+                return {"result": node.storage.get(params[0])}
+            return {"error": {"code": -32601, "message": "Method not found"}}
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *_args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if isinstance(body, list):
+                    out = [{"jsonrpc": "2.0", "id": r["id"], **handle(r)} for r in body]
+                else:
+                    out = {"jsonrpc": "2.0", "id": body["id"], **handle(body)}
+                data = json.dumps(out).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def accounts(address):
+    addrs = [address(i) for i in range(3)]
+    storage = {
+        system_account_key(ss58_decode(addrs[0])): account_info(5 * 10 ** 12),
+        system_account_key(ss58_decode(addrs[1])): account_info(1),
+    }
+    return addrs, storage
+
+
+@pytest.mark.parametrize("query_at", [True, False])
+def test_query_free_balances(accounts, query_at):
+    pytest.importorskip("requests")
+    from quantus_monitor.rpc import NodeRpc
+
+    addrs, storage = accounts
+    node = _Node(storage, query_at=query_at)
+    rpc = NodeRpc(node.url)
+    try:
+        got = rpc.query_free_balances(addrs + ["qzZepsuty", addrs[0]])
+    finally:
+        rpc.close()
+        node.close()
+    assert got == {addrs[0]: 5 * 10 ** 12, addrs[1]: 1, addrs[2]: 0}
+    if not query_at:
+        assert node.methods.count("state_getStorage") == 3        # jeden batch, klucze bez powtórzeń
+
+
+def test_fetch_balances_rpc_falls_back_to_nothing_when_node_is_syncing(accounts):
+    pytest.importorskip("requests")
+    from quantus_monitor.rpc import fetch_balances_rpc
+
+    addrs, storage = accounts
+    synced, syncing = _Node(storage), _Node(storage, syncing=True)
+    try:
+        got = asyncio.run(fetch_balances_rpc(synced.url, addrs, decimals=12))
+        assert {a: b.planck for a, b in got.items()} == {addrs[0]: 5 * 10 ** 12, addrs[1]: 1, addrs[2]: 0}
+        assert asyncio.run(fetch_balances_rpc(syncing.url, addrs)) == {}
+    finally:
+        synced.close()
+        syncing.close()
+    assert asyncio.run(fetch_balances_rpc(synced.url, addrs, timeout=0.5)) == {}   # node nie odpowiada
+
+
+def test_get_rpc_caches_per_url_and_timeout(monkeypatch):
+    pytest.importorskip("requests")
+    from quantus_monitor import rpc
+
+    monkeypatch.setattr(rpc, "_CLIENTS", {})
+    url = "http://127.0.0.1:9944"
+    fast, slow = rpc.get_rpc(url, 0.5), rpc.get_rpc(url, 5.0)
+    assert (fast.timeout, slow.timeout) == (0.5, 5.0)
+    assert rpc.get_rpc(url, 0.5) is fast and rpc.get_rpc(url) is slow
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""Sesje Telegrama do shardowania: SESSION_NAME_<n>/PHONE_<n> i zgodność wstecz."""
+
+from quantus_monitor.sessions import session_configs
+
+
+def test_numbered_sessions_inherit_phone():
+    env = {
+        "PHONE": "+48100", "SESSION_NAME": "stara",
+        "SESSION_NAME_1": "konto_a", "PHONE_1": "+48111",
+        "SESSION_NAME_2": "konto_b",
+        "SESSION_NAME_4": "za_dziura",                               # bez _3 dalej nie czytamy
+    }
+    assert session_configs(env) == [("konto_a", "+48111"), ("konto_b", "+48100")]
+
+
+def test_single_session_fallback():
+    assert session_configs({"SESSION_NAME": "moja", "PHONE": "+48100"}) == [("moja", "+48100")]
+    assert session_configs({}, default_name="quantus_balance_session") == [("quantus_balance_session", None)]
+    assert session_configs({"SESSION_NAME_1": ""}) == [("quantus_balance_session", None)]
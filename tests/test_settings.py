@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""Settings z env: okna WINDOWS / STALL_WINDOW i błędy konfiguracji."""
+
+import pytest
+
+from quantus_monitor.settings import Settings
+
+
+def test_windows_and_stall_window():
+    cfg = Settings({"WINDOWS": "24h, 1h,7d", "STALL_WINDOW": "3h"})
+    assert cfg.windows == [("1h", 60), ("24h", 1440), ("7d", 10080)]
+    assert cfg.stall_window == ("3h", 180)
+    assert Settings({"STALL_WINDOW": "0"}).stall_window is None
+
+
+@pytest.mark.parametrize("name, value, token", [
+    ("WINDOWS", "12h,2x", "'2x'"),
+    ("WINDOWS", ",", "brak okien"),
+    ("STALL_WINDOW", "6hours", "'6hours'"),
+])
+def test_bad_window_exits_with_one_line_naming_the_variable(name, value, token):
+    with pytest.raises(SystemExit) as exc:
+        Settings({name: value})
+    msg = str(exc.value.code)
+    assert msg.startswith(f"{name}: ") and token in msg and "\n" not in msg
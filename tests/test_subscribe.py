@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""Tryb subskrypcji: powiadomienia storage z noda po WebSocket, zmiany sald i ponowne połączenie."""
+
+import asyncio
+import json
+
+import pytest
+
+from conftest import account_info
+from quantus_monitor.rpc import ss58_decode, system_account_key
+from quantus_monitor.subscribe import BalanceWatch, watch_balances, ws_url
+
+websockets = pytest.importorskip("websockets")
+
+
+def test_ws_url():
+    assert ws_url("http://10.0.0.5:9944") == "ws://10.0.0.5:9944"
+    assert ws_url("https://node.example.org") == "wss://node.example.org"
+    assert ws_url("ws://host:9944") == "ws://host:9944"
+
+
+class _Node:
+    """Node na WebSocket: każde połączenie to lista (blok, {adres: free}) wysyłana po subskrypcji."""
+
+    def __init__(self, sessions):
+        self.sessions = list(sessions)
+        self.requests = []
+
+    async def handler(self, ws):
+        keys = None
+        for _ in range(2):
+            req = json.loads(await ws.recv())
+            self.requests.append(req["method"])
+            if req["method"] == "state_subscribeStorage":
+                keys = req["params"][0]
+            await ws.send(json.dumps({"jsonrpc": "2.0", "id": req["id"], "result": f"sub{req['id']}"}))
+        session = self.sessions.pop(0) if self.sessions else []
+        for block, balances in session:
+            await ws.send(json.dumps({"jsonrpc": "2.0", "method": "chain_newHead",
+                                      "params": {"subscription": "sub1", "result": {"number": hex(block)}}}))
+            changes = [[k, account_info(balances[k])] for k in keys if k in balances]
+            await ws.send(json.dumps({"jsonrpc": "2.0", "method": "state_storage",
+                                      "params": {"subscription": "sub2",
+                                                 "result": {"block": hex(block), "changes": changes}}}))
+        if self.sessions:
+            return                      # zerwane połączenie – klient ma się połączyć ponownie
+        await ws.wait_closed()
+
+
+def test_watch_reports_only_changes_and_catches_up_after_reconnect(address):
+    a, b = address(1), address(2)
+    ka, kb = (system_account_key(ss58_decode(x)) for x in (a, b))
+    groups = [("g", [("n1", a), ("n2", b), ("zly", "qzZepsuty")])]
+    watch = BalanceWatch(groups, {a: 5, b: 1}, decimals=12)
+    assert watch.invalid == ["qzZepsuty"]
+
+    node = _Node([
+        [(16, {ka: 5, kb: 7}), (17, {ka: 6})],          # start: tylko b się różni; potem zmiana a
+        [(19, {ka: 6, kb: 9})],                         # po reconnect: b zmienione w czasie przerwy
+    ])
+    seen = []
+
+    async def run():
+        stop = asyncio.Event()
+
+        def on_change(changed, block):
+            seen.append((changed, block))
+            if len(seen) == 3:
+                stop.set()
+
+        async with websockets.serve(node.handler, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            await asyncio.wait_for(watch_balances(f"ws://127.0.0.1:{port}", watch, on_change, stop), 10)
+
+    asyncio.run(run())
+    assert seen == [({b: 7}, 16), ({a: 6}, 17), ({b: 9}, 19)]
+    assert node.requests == ["chain_subscribeNewHeads", "state_subscribeStorage"] * 2
+    assert watch.synced and watch.best == 19
+    assert {addr: bal.planck for addr, bal in watch.balances.items()} == {a: 6, b: 9}